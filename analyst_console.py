@@ -0,0 +1,361 @@
+import argparse
+import itertools
+import string
+import threading
+
+from decryption_buffer import DecryptionBuffer
+from final_attempt_best_results import evaluate_decryption, load_encrypted_book
+from letter_tables import ENGLISH_FREQUENCY_ORDER
+from top_keys import load_checkpoint
+
+HELP = """Commands:
+  x:y, a:b        map cipher letters to plaintext letters
+  lock abc        keep letters fixed (the solver never touches them)
+  unlock abc      release letters again
+  undo / redo     step back and forth through the changes
+  next / prev     move the window by its width
+  goto N          move the window to character N
+  solver on|off   start or pause the background solver
+  key             show the current key
+  save FILE       write the complete decryption to FILE
+  help            show this help
+  exit            quit"""
+
+
+# Background hill climbing on the unlocked letters
+class BackgroundPolisher(threading.Thread):
+    """
+    Solver thread that polishes the unlocked letters while the analyst is typing.
+    
+    The console hands it a snapshot of the key (with a version number) after every
+    change. The thread tries all swaps of two unlocked letters on the sample text,
+    keeping improvements, until a full round brings none; every improvement is
+    published as a proposal for the version it started from. The console applies
+    a proposal only if the key has not been changed since, so the solver never
+    overrides a guess typed in the meantime.
+    """
+    
+    def __init__(self, sample_text, enabled=True):
+        super().__init__(daemon=True)
+        self.sample_text = sample_text
+        self.enabled = enabled
+        self._condition = threading.Condition()
+        self._snapshot = None
+        self._proposal = None
+    
+    def submit(self, version, mapping, locked):
+        """Start polishing a new version of the key."""
+        with self._condition:
+            self._snapshot = (version, dict(mapping), frozenset(locked))
+            self._proposal = None
+            self._condition.notify()
+    
+    def take_proposal(self):
+        """Return and clear the latest proposal (version, mapping, score), or None."""
+        with self._condition:
+            proposal, self._proposal = self._proposal, None
+            return proposal
+    
+    def _superseded(self, version):
+        """Whether a newer key was submitted (or the solver paused) while polishing 'version'."""
+        with self._condition:
+            return not self.enabled or (self._snapshot is not None and self._snapshot[0] != version)
+    
+    def run(self):
+        while True:
+            with self._condition:
+                while self._snapshot is None or not self.enabled:
+                    self._condition.wait()
+                version, mapping, locked = self._snapshot
+                self._snapshot = None
+            self._polish(version, mapping, locked)
+    
+    def _polish(self, version, mapping, locked):
+        buffer = DecryptionBuffer(self.sample_text, _full_mapping(mapping))
+        best_score = evaluate_decryption(buffer.data)
+        unlocked = [letter for letter in string.ascii_lowercase if letter not in locked]
+        improved = True
+        while improved:
+            improved = False
+            for letter1, letter2 in itertools.combinations(unlocked, 2):
+                # Give up as soon as the analyst changed the key
+                if self._superseded(version):
+                    return
+                buffer.swap(letter1, letter2)
+                buffer.swap(letter1.upper(), letter2.upper())
+                score = evaluate_decryption(buffer.data)
+                if score > best_score:
+                    best_score = score
+                    improved = True
+                    with self._condition:
+                        self._proposal = (version, {letter: buffer.mapping[letter] for letter in string.ascii_lowercase}, best_score)
+                else:
+                    buffer.swap(letter1, letter2)
+                    buffer.swap(letter1.upper(), letter2.upper())
+
+
+# Whether a string is one ASCII letter
+def _is_ascii_letter(text):
+    return len(text) == 1 and text in string.ascii_letters
+
+
+# Mapping for both cases from a lowercase mapping
+def _full_mapping(mapping):
+    full = dict(mapping)
+    full.update({cipher.upper(): plain.upper() for cipher, plain in mapping.items()})
+    return full
+
+
+# Interactive decryption session
+class AnalystConsole:
+    """
+    Interactive decryption of a ciphertext by letter guesses, with undo and a helper solver.
+    
+    The decryption lives in a DecryptionBuffer, so a guess rewrites only the
+    positions of the letters it changes, and only the visible window is decoded
+    and printed. The frequency panel is updated incrementally as well: a change
+    of one cipher letter moves its count from the old plaintext letter to the
+    new one. Every change is a list of (cipher letter, old, new) triples, so undo
+    and redo cost as much as the letters they change.
+    
+    Attributes:
+        buffer (DecryptionBuffer): The current decryption.
+        locked (set): Cipher letters the solver must not change.
+        offset (int): Start of the visible window (in characters of the text).
+        width (int): Size of the visible window.
+    """
+    
+    def __init__(self, encrypted_text, mapping, width=1000, sample_length=20000, solver_enabled=True):
+        self.encrypted_text = encrypted_text
+        self.buffer = DecryptionBuffer(encrypted_text, _full_mapping(mapping))
+        self.locked = set()
+        self.offset = 0
+        self.width = width
+        self.version = 0
+        self._undo = []
+        self._redo = []
+        
+        # Occurrences of every cipher letter (both cases), and of the plaintext letters they map to
+        self.cipher_counts = {letter: len(self.buffer.positions[letter]) + len(self.buffer.positions[letter.upper()]) for letter in string.ascii_lowercase}
+        self.plain_counts = dict.fromkeys(string.ascii_lowercase, 0)
+        for cipher, count in self.cipher_counts.items():
+            self.plain_counts[mapping[cipher]] += count
+        
+        self.solver = BackgroundPolisher(encrypted_text[:sample_length], solver_enabled)
+        self.solver.start()
+        self._submit()
+    
+    @property
+    def mapping(self):
+        """The current lowercase mapping."""
+        return {letter: self.buffer.mapping[letter] for letter in string.ascii_lowercase}
+    
+    def _submit(self):
+        self.version += 1
+        self.solver.submit(self.version, self.mapping, self.locked)
+    
+    def _apply(self, changes):
+        """Apply a list of (cipher, old, new) changes to the buffer and the frequency panel."""
+        for cipher, old, new in changes:
+            self.buffer.assign(cipher, new)
+            self.buffer.assign(cipher.upper(), new.upper())
+            self.plain_counts[old] -= self.cipher_counts[cipher]
+            self.plain_counts[new] += self.cipher_counts[cipher]
+    
+    def change(self, guesses):
+        """
+        Map cipher letters to new plaintext letters as one undoable change.
+        
+        Args:
+            guesses (dict): Cipher letter -> plaintext letter (ASCII, either case).
+        
+        Returns:
+            list: The (cipher, old, new) triples that were applied.
+        
+        Raises:
+            ValueError: If a guess is not a pair of ASCII letters.
+        """
+        changes = []
+        for cipher, plain in guesses.items():
+            if not _is_ascii_letter(cipher) or not _is_ascii_letter(plain):
+                raise ValueError(f"a guess maps an ASCII letter to an ASCII letter, not {cipher!r} to {plain!r}")
+            cipher, plain = cipher.lower(), plain.lower()
+            old = self.buffer.mapping[cipher]
+            if old != plain:
+                changes.append((cipher, old, plain))
+        if changes:
+            self._apply(changes)
+            self._undo.append(changes)
+            self._redo.clear()
+            self._submit()
+        return changes
+    
+    def undo(self):
+        """Revert the most recent change; returns False if there is none."""
+        if not self._undo:
+            return False
+        changes = self._undo.pop()
+        self._apply([(cipher, new, old) for cipher, old, new in reversed(changes)])
+        self._redo.append(changes)
+        self._submit()
+        return True
+    
+    def redo(self):
+        """Apply the most recently undone change again; returns False if there is none."""
+        if not self._redo:
+            return False
+        changes = self._redo.pop()
+        self._apply(changes)
+        self._undo.append(changes)
+        self._submit()
+        return True
+    
+    def accept_solver_proposal(self):
+        """Apply the solver's latest improvement if the key has not changed since it started."""
+        proposal = self.solver.take_proposal()
+        if proposal is None or proposal[0] != self.version:
+            return None
+        _, mapping, score = proposal
+        changes = [(cipher, self.buffer.mapping[cipher], plain) for cipher, plain in mapping.items()
+                   if cipher not in self.locked and self.buffer.mapping[cipher] != plain]
+        if not changes:
+            return None
+        self._apply(changes)
+        self._undo.append(changes)
+        self._redo.clear()
+        # The solver keeps going from its own state, which is this version's key now
+        self.version += 1
+        self.solver.submit(self.version, self.mapping, self.locked)
+        return score
+    
+    def window(self):
+        """The decoded visible window of the decryption."""
+        # Swapping ASCII letters never moves a character, so the ciphertext gives the byte positions
+        start = len(self.encrypted_text[:self.offset].encode("utf-8"))
+        end = start + len(self.encrypted_text[self.offset:self.offset + self.width].encode("utf-8"))
+        return self.buffer.data[start:end].decode("utf-8")
+    
+    def frequency_panel(self):
+        """Cipher letters by frequency with their current plaintext, next to the plaintext letter counts."""
+        total = max(sum(self.cipher_counts.values()), 1)
+        by_frequency = sorted(string.ascii_lowercase, key=lambda letter: -self.cipher_counts[letter])
+        lines = []
+        for rank, cipher in enumerate(by_frequency):
+            plain = self.buffer.mapping[cipher]
+            lock = "*" if cipher in self.locked else " "
+            duplicate = "!" if list(self.buffer.mapping[letter] for letter in string.ascii_lowercase).count(plain) > 1 else " "
+            lines.append(
+                f"{cipher}->{plain}{lock}{duplicate} {100 * self.cipher_counts[cipher] / total:5.2f}%   "
+                f"{plain}: {100 * self.plain_counts[plain] / total:5.2f}% (English #{ENGLISH_FREQUENCY_ORDER.index(plain) + 1:>2}, here #{rank + 1:>2})"
+            )
+        return "\n".join(lines)
+    
+    def render(self):
+        """The visible window and the frequency panel, ready to print."""
+        return f"\nDecrypted Text (characters {self.offset}-{self.offset + self.width}):\n\n{self.window()}\n\n{self.frequency_panel()}"
+    
+    def handle(self, command):
+        """
+        Run one console command.
+        
+        Returns:
+            str: A message for the analyst, or None to quit.
+        """
+        command = command.strip()
+        words = command.split()
+        if not words:
+            return ""
+        verb = words[0].lower()
+        if verb == "exit":
+            return None
+        if verb == "help":
+            return HELP
+        if verb in ("lock", "unlock"):
+            letters = {letter for letter in "".join(words[1:]).lower() if letter in string.ascii_lowercase}
+            if verb == "lock":
+                self.locked |= letters
+            else:
+                self.locked -= letters
+            self._submit()
+            return f"Locked: {''.join(sorted(self.locked)) or '-'}"
+        if verb == "undo":
+            return "Undone." if self.undo() else "Nothing to undo."
+        if verb == "redo":
+            return "Redone." if self.redo() else "Nothing to redo."
+        if verb in ("next", "prev"):
+            self.offset = max(0, min(len(self.encrypted_text) - 1, self.offset + (self.width if verb == "next" else -self.width)))
+            return ""
+        if verb == "goto" and len(words) == 2 and words[1].isdigit():
+            self.offset = min(int(words[1]), len(self.encrypted_text) - 1)
+            return ""
+        if verb == "solver" and len(words) == 2 and words[1] in ("on", "off"):
+            self.solver.enabled = words[1] == "on"
+            self._submit()
+            return f"Solver {words[1]}."
+        if verb == "key":
+            return "".join(self.buffer.mapping[letter] for letter in string.ascii_lowercase)
+        if verb == "save" and len(words) == 2:
+            with open(words[1], "wb") as file:
+                file.write(self.buffer.data)
+            return f"Decrypted text saved to {words[1]}"
+        
+        # Letter guesses: 'x:y, a:b'
+        guesses = {}
+        for pair in command.split(","):
+            try:
+                cipher, plain = (part.strip() for part in pair.split(":"))
+            except ValueError:
+                return "Invalid format. Use 'X:Y' pairs separated by commas (or 'help')."
+            if not _is_ascii_letter(cipher) or not _is_ascii_letter(plain):
+                return f"Invalid pair '{pair.strip()}'."
+            guesses[cipher] = plain
+        changes = self.change(guesses)
+        return "New letter mappings: " + (", ".join(f"'{cipher}' -> '{new}'" for cipher, _, new in changes) or "none")
+
+
+# Frequency-based starting mapping
+def mapping_by_frequency(encrypted_text):
+    """Map the cipher letters, most frequent first, to English letters by frequency."""
+    counts = {letter: encrypted_text.count(letter) + encrypted_text.count(letter.upper()) for letter in string.ascii_lowercase}
+    by_frequency = sorted(string.ascii_lowercase, key=lambda letter: -counts[letter])
+    return dict(zip(by_frequency, ENGLISH_FREQUENCY_ORDER))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decrypt a ciphertext interactively, with a solver polishing the letters you have not locked.")
+    parser.add_argument("filename", nargs="?", default="encrypted_book.txt", help="file containing the encrypted text")
+    parser.add_argument("--key", default=None, help="26 letters to start from: the plaintext of cipher letters a..z")
+    parser.add_argument("--checkpoint", default=None, help="start from the best key of a grid search checkpoint")
+    parser.add_argument("--width", type=int, default=1000, help="characters shown per window")
+    parser.add_argument("--sample-length", type=int, default=20000, help="characters the background solver scores")
+    parser.add_argument("--no-solver", action="store_true", help="start with the background solver paused")
+    args = parser.parse_args()
+    
+    encrypted_text = load_encrypted_book(args.filename)
+    if args.checkpoint is not None:
+        top_keys, _ = load_checkpoint(args.checkpoint)
+        if not top_keys.items():
+            parser.error(f"the checkpoint {args.checkpoint} holds no keys yet")
+        args.key = top_keys.items()[0][1]
+    if args.key is not None:
+        if len(args.key) != 26 or not all(_is_ascii_letter(letter) for letter in args.key):
+            parser.error("the key must have exactly 26 ASCII letters")
+        mapping = dict(zip(string.ascii_lowercase, args.key.lower()))
+    else:
+        mapping = mapping_by_frequency(encrypted_text)
+    
+    console = AnalystConsole(encrypted_text, mapping, args.width, args.sample_length, solver_enabled=not args.no_solver)
+    print(HELP)
+    message = ""
+    while message is not None:
+        score = console.accept_solver_proposal()
+        if score is not None:
+            message = (message + "\n" if message else "") + f"Solver improved the unlocked letters (sample score {score})."
+        print(console.render())
+        if message:
+            print(f"\n{message}")
+        try:
+            command = input("\n> ")
+        except EOFError:
+            break
+        message = console.handle(command)
@@ -0,0 +1,296 @@
+import argparse
+import concurrent.futures
+import functools
+import string
+import time
+
+import numpy as np
+
+from final_attempt_best_results import NGRAM_TABLES, evaluate_decryption, substitute_text
+from letter_tables import ENGLISH_FREQUENCY_ORDER, LETTER_PAIRS
+
+# Code of every character that is not a lowercase letter (and of the padding)
+SEPARATOR = 26
+
+# Size of the code alphabet: the 26 letters and the separator
+RADIX = 27
+
+# Length of the longest scored n-gram, the window looked up at every position
+WINDOW = 5
+
+# Messages solved together in one batch (small batches keep the working arrays in the CPU cache)
+DEFAULT_BATCH_SIZE = 16
+
+
+# Weight of every 5-gram window, covering all n-grams scored by evaluate_decryption
+@functools.lru_cache(maxsize=None)
+def window_table(digraph_weight=2, trigram_weight=3, quadgram_weight=4, pentagram_weight=5, penalty_weight=1):
+    """
+    Build the lookup table of the weight a text position adds to the score.
+    
+    The window of five codes (c1, ..., c5) starting at a position has the index
+    c1*27^4 + ... + c5; its entry is the summed weight of every listed n-gram
+    that starts at this position, i.e. that is a prefix of the window (twice
+    for n-grams listed twice, negative for the unlikely pairs). All windows
+    with the same prefix form one contiguous range of the table, so every
+    listed n-gram is added to a slice. N-grams containing a separator are
+    never listed, so they weigh nothing. Summing the table over all positions
+    gives the same counts as evaluate_decryption, except that occurrences of a
+    pattern may overlap (e.g. 'ere' is found twice in 'erere', where str.count
+    finds it once).
+    
+    The table is summed in int64 (float64 if any weight is not an integer)
+    and then stored in the smallest integer type that holds every entry:
+    int8 for the default weights, which keeps the 14 MB table cache-friendly.
+    
+    Returns:
+        numpy.ndarray: Table of 27^5 entries.
+    """
+    weights = (digraph_weight, trigram_weight, quadgram_weight, pentagram_weight, -penalty_weight)
+    integral = all(isinstance(weight, (int, np.integer)) for weight in weights)
+    table = np.zeros(RADIX ** WINDOW, dtype=np.int64 if integral else np.float64)
+    for ngrams, weight in zip(NGRAM_TABLES, weights):
+        for ngram in ngrams:
+            prefix = 0
+            for letter in ngram:
+                prefix = prefix * RADIX + ord(letter) - ord("a")
+            span = RADIX ** (WINDOW - len(ngram))
+            table[prefix * span:(prefix + 1) * span] += weight
+    if integral:
+        for dtype in (np.int8, np.int16, np.int32):
+            if np.iinfo(dtype).min <= table.min() and table.max() <= np.iinfo(dtype).max:
+                return table.astype(dtype)
+    return table
+
+
+# Integer codes of a batch of messages
+def pack_messages(ciphertexts):
+    """
+    Pack ciphertexts into one padded 2-D array of letter codes.
+    
+    ASCII letters get the codes 0 to 25 with their case folded, since a key
+    decrypts both cases of a letter alike (an all-uppercase cryptogram is
+    solved like a lowercase one); all other characters and the padding get
+    the separator code, which the scored n-grams never span. Every row ends in
+    at least four separators, so a full window starts at every position of the text.
+    
+    Returns:
+        numpy.ndarray: int32 array of shape (messages, longest message + 4).
+    """
+    width = max(map(len, ciphertexts), default=0) + WINDOW - 1
+    codes = np.full((len(ciphertexts), width), SEPARATOR, dtype=np.int32)
+    for row, ciphertext in enumerate(ciphertexts):
+        encoded = np.frombuffer(ciphertext.encode("ascii", errors="replace"), dtype=np.uint8)
+        # Folding sets the 0x20 bit, which maps A-Z onto a-z and leaves a-z alone
+        folded = encoded | 0x20
+        letters = (folded >= ord("a")) & (folded <= ord("z"))
+        codes[row, :len(encoded)] = np.where(letters, folded.astype(np.int32) - ord("a"), SEPARATOR)
+    return codes
+
+
+# Scores of every row of a batch under its own key
+def batch_scores(codes, keys, table):
+    """
+    Score each message of a batch under its own key, all rows at once.
+    
+    Args:
+        codes (numpy.ndarray): Message codes, shape (rows, width) (see pack_messages).
+        keys (numpy.ndarray): Keys, shape (rows, 27): the plaintext code of every
+                              cipher code (the separator maps to itself).
+        table (numpy.ndarray): Window weights from window_table.
+    
+    Returns:
+        numpy.ndarray: The score of every row.
+    """
+    rows, width = codes.shape
+    plain = np.take(keys, codes + RADIX * np.arange(rows, dtype=np.int32)[:, None])
+    length = width - (WINDOW - 1)
+    windows = plain[:, :length]
+    for shift in range(1, WINDOW):
+        windows = windows * RADIX + plain[:, shift:shift + length]
+    return np.take(table, windows).sum(axis=1, dtype=np.result_type(table.dtype, np.int64))
+
+
+# Vectorised hill climbing on a batch of messages
+def hill_climb_batch(codes, initial_keys, orders, table):
+    """
+    Hill-climb every row of a batch with its own key until no swap improves it.
+    
+    Each step proposes one swap of two cipher letters per row (every row walks
+    through all 325 pairs in its own random order), scores all rows at once and
+    keeps the swaps that improved their row. A row that has gone through all
+    pairs without an improvement is at a local optimum: its result is stored
+    and the row drops out of the batch, and padding no remaining row needs is
+    trimmed, so the cost of a step follows the work that is left.
+    
+    Args:
+        codes (numpy.ndarray): Message codes, shape (rows, length).
+        initial_keys (numpy.ndarray): Starting keys, shape (rows, 27).
+        orders (numpy.ndarray): The order in which every row tries the pairs,
+                                shape (rows, 325) (indices into LETTER_PAIRS).
+        table (numpy.ndarray): Window weights from window_table.
+    
+    Returns:
+        tuple: The final keys, their scores and the number of steps of every row.
+    """
+    rows = len(codes)
+    final_keys = np.array(initial_keys)
+    final_scores = np.zeros(rows, dtype=np.result_type(table.dtype, np.int64))
+    final_steps = np.zeros(rows, dtype=np.int64)
+    
+    active = np.arange(rows)
+    keys = np.array(initial_keys)
+    scores = batch_scores(codes, keys, table)
+    stale = np.zeros(rows, dtype=np.intp)
+    steps = 0
+    while len(active):
+        local = np.arange(len(active))
+        pairs = LETTER_PAIRS[orders[local, steps % len(LETTER_PAIRS)]]
+        steps += 1
+        
+        # Swap the proposed letters in every row, score, and swap back where it did not help
+        first, second = keys[local, pairs[:, 0]], keys[local, pairs[:, 1]]
+        keys[local, pairs[:, 0]], keys[local, pairs[:, 1]] = second, first
+        new_scores = batch_scores(codes, keys, table)
+        improved = new_scores > scores
+        worse = ~improved
+        keys[local[worse], pairs[worse, 0]], keys[local[worse], pairs[worse, 1]] = first[worse], second[worse]
+        scores = np.where(improved, new_scores, scores)
+        stale = np.where(improved, 0, stale + 1)
+        
+        # Rows that tried every pair without improving are done and leave the batch
+        done = stale >= len(LETTER_PAIRS)
+        if done.any():
+            final_keys[active[done]] = keys[done]
+            final_scores[active[done]] = scores[done]
+            final_steps[active[done]] = steps
+            keep = ~done
+            active, keys, scores, orders, stale, codes = active[keep], keys[keep], scores[keep], orders[keep], stale[keep], codes[keep]
+            letters = (codes != SEPARATOR).any(axis=0).nonzero()[0]
+            codes = codes[:, :(letters[-1] + 1 if len(letters) else 0) + WINDOW - 1]
+    return final_keys, final_scores, final_steps
+
+
+# Starting keys and move orders of the restarts of one message
+def restart_state(message_codes, restarts, rng):
+    """
+    Starting keys and pair orders for 'restarts' climbs of one message.
+    
+    The first restart maps the cipher letters by frequency (the most frequent
+    to 'e', and so on), the others start from random permutations. Every climb
+    draws from the message's own generator only, so its result does not depend
+    on the other messages of its batch.
+    
+    Returns:
+        tuple: Keys of shape (restarts, 27) and pair orders of shape (restarts, 325).
+    """
+    keys = np.empty((restarts, RADIX), dtype=np.int32)
+    keys[:, SEPARATOR] = SEPARATOR
+    counts = np.bincount(message_codes, minlength=RADIX)[:26]
+    keys[0, np.argsort(-counts, kind="stable")] = [ord(letter) - ord("a") for letter in ENGLISH_FREQUENCY_ORDER]
+    for restart in range(1, restarts):
+        keys[restart, :26] = rng.permutation(26)
+    orders = rng.permuted(np.tile(np.arange(len(LETTER_PAIRS)), (restarts, 1)), axis=1)
+    return keys, orders
+
+
+# Solve one batch of messages
+def solve_batch(ciphertexts, seed_sequences, restarts=4, weights=(2, 3, 4, 5)):
+    """
+    Solve a batch of short ciphertexts with vectorised hill climbing.
+    
+    Every message is climbed from 'restarts' starting keys at once (as separate
+    rows of the batch); the best row of each message wins. The final score is
+    recomputed with evaluate_decryption on the decryption folded to lowercase
+    (as the climb scores it), so it is comparable with the scores of the other
+    solvers on lowercase text.
+    
+    Args:
+        ciphertexts (list): The ciphertexts of the batch.
+        seed_sequences (list): One numpy.random.SeedSequence per ciphertext.
+        restarts (int): Starting keys per message (at least 1).
+        weights (tuple): Digraph, trigram, quadgram and pentagram weights.
+    
+    Returns:
+        list: (key, score, steps) per ciphertext; the key as 26 letters, the
+              plaintext of cipher letters 'a'..'z'.
+    
+    Raises:
+        ValueError: If 'restarts' is less than 1.
+    """
+    if restarts < 1:
+        raise ValueError(f"every message needs at least one restart, not {restarts}")
+    codes = pack_messages(ciphertexts)
+    states = [restart_state(message_codes, restarts, np.random.default_rng(seed_sequence)) for message_codes, seed_sequence in zip(codes, seed_sequences)]
+    keys = np.concatenate([keys for keys, _ in states])
+    orders = np.concatenate([orders for _, orders in states])
+    keys, scores, steps = hill_climb_batch(np.repeat(codes, restarts, axis=0), keys, orders, window_table(*weights))
+    
+    results = []
+    for message, ciphertext in enumerate(ciphertexts):
+        rows = slice(message * restarts, (message + 1) * restarts)
+        best = message * restarts + int(np.argmax(scores[rows]))
+        key = "".join(chr(code + ord("a")) for code in keys[best, :26])
+        mapping = dict(zip(string.ascii_lowercase, key))
+        results.append((key, evaluate_decryption(substitute_text(ciphertext.lower(), mapping), *weights), int(steps[rows].max())))
+    return results
+
+
+# Solve any number of messages, in batches, on several processes
+def solve_messages(ciphertexts, restarts=4, batch_size=DEFAULT_BATCH_SIZE, processes=None, seed=None, weights=(2, 3, 4, 5)):
+    """
+    Solve many short ciphertexts in padded batches, optionally on a process pool.
+    
+    The messages are sorted by length before they are cut into batches, so the
+    messages of a batch need little padding; with several processes the batches
+    are made small enough to give every process work. Every message gets its
+    own seed spawned from the master seed, so its result depends neither on the
+    batch it lands in nor on the number of processes.
+    
+    Returns:
+        list: (key, score, steps) per ciphertext, in the order of 'ciphertexts'.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(ciphertexts))
+    if processes is not None and processes > 1:
+        batch_size = max(1, min(batch_size, -(-len(ciphertexts) // processes)))
+    order = sorted(range(len(ciphertexts)), key=lambda index: len(ciphertexts[index]))
+    batches = [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+    batch_texts = [[ciphertexts[index] for index in batch] for batch in batches]
+    batch_seeds = [[seeds[index] for index in batch] for batch in batches]
+    solve = functools.partial(solve_batch, restarts=restarts, weights=weights)
+    if processes is not None and processes > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            batch_results = list(executor.map(solve, batch_texts, batch_seeds))
+    else:
+        batch_results = list(map(solve, batch_texts, batch_seeds))
+    
+    results = [None] * len(ciphertexts)
+    for batch, batch_result in zip(batches, batch_results):
+        for index, result in zip(batch, batch_result):
+            results[index] = result
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve many short cryptograms (one per line) with batched, vectorised hill climbing.")
+    parser.add_argument("filename", help="file with one ciphertext per line")
+    parser.add_argument("--output", default=None, help="write 'score<TAB>key<TAB>decryption' per message to this file")
+    parser.add_argument("--restarts", type=int, default=4, help="starting keys per message")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="messages solved together in one batch")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, one batch each at a time")
+    parser.add_argument("--seed", type=int, default=None, help="master seed")
+    args = parser.parse_args()
+    if args.restarts < 1:
+        parser.error("--restarts must be at least 1")
+    
+    with open(args.filename, "r") as file:
+        ciphertexts = [line.rstrip("\n") for line in file if line.strip()]
+    started = time.perf_counter()
+    results = solve_messages(ciphertexts, args.restarts, args.batch_size, args.processes, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Solved {len(ciphertexts)} messages in {elapsed:.2f}s ({len(ciphertexts) / elapsed:.1f} messages/s)")
+    
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            for ciphertext, (key, score, _) in zip(ciphertexts, results):
+                output_file.write(f"{score}\t{key}\t{ciphertext.translate(str.maketrans(string.ascii_lowercase + string.ascii_uppercase, key + key.upper()))}\n")
@@ -0,0 +1,39 @@
+import ast
+import os
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ATTEMPTS_DIRECTORY = os.path.join(REPO_ROOT, "previous_attempts")
+
+
+# Load a script from previous_attempts without running it
+def load_attempt(filename, directory=ATTEMPTS_DIRECTORY):
+    """
+    Import one of the previous attempt scripts without executing its work.
+    
+    Most of the scripts in previous_attempts call their entry point at module 
+    level, so a plain import would start a full cipher-breaking run. This loader 
+    parses the script and only executes imports, function and class definitions 
+    and assignments of constants, then returns the result as a module object.
+    
+    Args:
+        filename (str): Name of the script inside 'directory'.
+        directory (str): Folder holding the scripts.
+    
+    Returns:
+        module: A module exposing the functions defined by the script.
+    """
+    path = os.path.join(directory, filename)
+    with open(path, "r") as file:
+        tree = ast.parse(file.read(), path)
+    
+    def is_definition(node):
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef)):
+            return True
+        return isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant)
+    
+    tree.body = [node for node in tree.body if is_definition(node)]
+    module = types.ModuleType(os.path.splitext(filename)[0])
+    module.__file__ = path
+    exec(compile(tree, path, "exec"), module.__dict__)
+    return module
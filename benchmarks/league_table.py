@@ -0,0 +1,152 @@
+import argparse
+import json
+import random
+import string
+import sys
+
+from run_benchmarks import machine_info, measure_rate
+from solver_registry import SCORERS, SOLVERS
+from synthetic_corpus import load_corpus
+from time_to_solve import run_harness, summarize_runs
+
+
+# Swap two plaintext letters in a text (case preserving)
+def swap_plaintext_letters(text, letter1, letter2):
+    """
+    Swap two letters throughout a text, in both cases.
+    
+    Applied to the true plaintext this gives the decryption produced by a key 
+    that is a single swap away from the correct one.
+    """
+    table = str.maketrans(
+        letter1 + letter2 + letter1.upper() + letter2.upper(),
+        letter2 + letter1 + letter2.upper() + letter1.upper(),
+    )
+    return text.translate(table)
+
+
+# Measure one scorer on a corpus
+def evaluate_scorer(prepare, corpus, neighbours=20, min_time=0.5, seed=0):
+    """
+    Measure the speed of a scorer and how well it recognises the true plaintext.
+    
+    Speed is the scoring rate on every sample. Accuracy is the share of 
+    single-swap neighbours of the true key whose decryption scores strictly 
+    lower than the true plaintext, i.e. how often the correct key is a local 
+    optimum the scorer can actually climb to.
+    
+    Args:
+        prepare (callable): Scorer factory from SCORERS.
+        corpus (list): Samples with 'plaintext' and 'ciphertext'.
+        neighbours (int): Single-swap neighbours tested per sample.
+        min_time (float): Time budget per rate measurement in seconds.
+        seed (int): Seed for choosing the neighbours.
+    
+    Returns:
+        dict: Mean calls per second, letters per second and the true-key preference.
+    """
+    rng = random.Random(seed)
+    calls_per_second = letters_per_second = preferred = tested = 0
+    for sample in corpus:
+        score = prepare(sample["ciphertext"])
+        plaintext = sample["plaintext"]
+        rate = measure_rate(lambda: score(plaintext), min_time)
+        calls_per_second += rate["calls_per_second"]
+        letters_per_second += rate["calls_per_second"] * len(plaintext)
+        
+        true_score = score(plaintext)
+        for _ in range(neighbours):
+            letter1, letter2 = rng.sample(string.ascii_lowercase, 2)
+            preferred += score(swap_plaintext_letters(plaintext, letter1, letter2)) < true_score
+            tested += 1
+    
+    return {
+        "calls_per_second": calls_per_second / len(corpus),
+        "characters_per_second": letters_per_second / len(corpus),
+        "true_key_preference": preferred / tested,
+    }
+
+
+# Build the league table
+def build_league_table(corpus, scorer_names, solver_names, max_iterations=1000, seed=0, min_time=0.5):
+    """
+    Run all scorers and solvers on the same corpus and budgets.
+    
+    Args:
+        corpus (list): Samples as produced by synthetic_corpus.generate_corpus.
+        scorer_names (list): Names of entries in SCORERS.
+        solver_names (list): Names of entries in SOLVERS.
+        max_iterations (int): Iteration budget of every solver run.
+        seed (int): Seed for every solver run and for the scorer neighbours.
+        min_time (float): Time budget per scorer rate measurement in seconds.
+    
+    Returns:
+        dict: Machine information, one entry per scorer and one per solver 
+              (aggregated over all samples), each list sorted best first.
+    """
+    scorers = []
+    for name in scorer_names:
+        print(f"Scoring with {name}...", file=sys.stderr)
+        entry = {"scorer": name}
+        entry.update(evaluate_scorer(SCORERS[name], corpus, min_time=min_time, seed=seed))
+        scorers.append(entry)
+    scorers.sort(key=lambda entry: (-entry["true_key_preference"], -entry["calls_per_second"]))
+    
+    runs = run_harness(corpus, solver_names, max_iterations, seed)
+    solvers = []
+    for name in solver_names:
+        solver_runs = [run for run in runs if run["solver"] == name]
+        seconds = sum(run["seconds"] for run in solver_runs)
+        # Runs that raised did no measurable work, so they count towards neither the iterations nor the time
+        completed_runs = [run for run in solver_runs if "error" not in run]
+        completed_seconds = sum(run["seconds"] for run in completed_runs)
+        solvers.append({
+            "solver": name,
+            "runs": len(solver_runs),
+            "solved": sum(run["symbol_error_rate"] == 0.0 for run in solver_runs),
+            "errors": sum("error" in run for run in solver_runs),
+            "mean_key_accuracy": sum(run["key_accuracy"] for run in solver_runs) / len(solver_runs),
+            "mean_symbol_error_rate": sum(run["symbol_error_rate"] for run in solver_runs) / len(solver_runs),
+            "iterations_per_second": sum(run["iterations"] for run in completed_runs) / completed_seconds if completed_runs else None,
+            "mean_seconds": seconds / len(solver_runs),
+        })
+    solvers.sort(key=lambda entry: (entry["mean_symbol_error_rate"], entry["mean_seconds"]))
+    
+    return {"machine": machine_info(), "max_iterations": max_iterations, "scorers": scorers, "solvers": solvers, "by_length": summarize_runs(runs)}
+
+
+# Print the league table
+def print_league_table(table):
+    """Print the scorer and solver rankings of build_league_table."""
+    print(f"\n{'scorer':<28} {'calls/s':>10} {'Mchar/s':>9} {'true key preferred':>19}")
+    for entry in table["scorers"]:
+        print(f"{entry['scorer']:<28} {entry['calls_per_second']:>10.1f} {entry['characters_per_second'] / 1e6:>9.2f} "
+              f"{entry['true_key_preference']:>19.2f}")
+    
+    print(f"\n{'solver':<32} {'solved':>8} {'key acc':>8} {'SER':>7} {'iter/s':>10} {'seconds':>9} {'errors':>7}")
+    for entry in table["solvers"]:
+        iterations_per_second = "-" if entry["iterations_per_second"] is None else f"{entry['iterations_per_second']:.1f}"
+        print(f"{entry['solver']:<32} {entry['solved']:>4}/{entry['runs']:<3} {entry['mean_key_accuracy']:>8.2f} "
+              f"{entry['mean_symbol_error_rate']:>7.3f} {iterations_per_second:>10} {entry['mean_seconds']:>9.2f} {entry['errors']:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare every registered scorer and solver on speed and accuracy.")
+    parser.add_argument("corpus", help="JSON lines corpus written by synthetic_corpus.py")
+    parser.add_argument("--scorer", action="append", choices=sorted(SCORERS), help="scorer to include (all if omitted)")
+    parser.add_argument("--solver", action="append", choices=sorted(SOLVERS), help="solver to include (all if omitted)")
+    parser.add_argument("--max-iterations", type=int, default=1000, help="iteration budget per solver run")
+    parser.add_argument("--seed", type=int, default=0, help="seed for every solver run")
+    parser.add_argument("--min-time", type=float, default=0.5, help="time budget per scorer rate measurement in seconds")
+    parser.add_argument("--output", default=None, help="JSON file for the league table")
+    args = parser.parse_args()
+    
+    table = build_league_table(
+        load_corpus(args.corpus), args.scorer or list(SCORERS), args.solver or list(SOLVERS),
+        args.max_iterations, args.seed, args.min_time,
+    )
+    print_league_table(table)
+    
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(table, output_file, indent=2)
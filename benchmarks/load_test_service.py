@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from final_attempt_best_results import load_encrypted_book
+
+
+# Send one HTTP request to the service
+async def http_request(host, port, method, path, payload=None):
+    """
+    Send a request with an optional JSON body and read the whole response.
+    
+    Returns:
+        tuple: The status code and the decoded JSON (or text) body.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    if b"application/json" in head:
+        return status, json.loads(content)
+    return status, content.decode("utf-8")
+
+
+# Follow the event stream of a job until it ends
+async def follow_events(host, port, job_id):
+    """
+    Read the server-sent events of a job.
+    
+    Returns:
+        tuple: Seconds until the first progress event (None if there was none), the
+               number of events and the final 'job_end' event.
+    """
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /jobs/{job_id}/events HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    first_progress, events, last = None, 0, None
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if line.startswith(b"data: "):
+            event = json.loads(line[6:])
+            events += 1
+            if event["event"] == "progress" and first_progress is None:
+                first_progress = time.perf_counter() - started
+            if event["event"] == "job_end":
+                last = event
+                break
+    writer.close()
+    return first_progress, events, last
+
+
+# Submit, follow and possibly cancel one job
+async def run_job(host, port, payload, cancel_after, semaphore, results):
+    async with semaphore:
+        submitted = time.perf_counter()
+        status, job = await http_request(host, port, "POST", "/jobs", payload)
+        submit_latency = time.perf_counter() - submitted
+        if status != 201:
+            results.append({"state": f"http_{status}", "submit_latency": submit_latency})
+            return
+        
+        follower = asyncio.create_task(follow_events(host, port, job["id"]))
+        if cancel_after is not None:
+            await asyncio.sleep(cancel_after)
+            await http_request(host, port, "DELETE", f"/jobs/{job['id']}")
+        first_progress, events, last = await follower
+        results.append({
+            "state": last["state"] if last else "no_end_event",
+            "priority": payload["priority"],
+            "submit_latency": submit_latency,
+            "first_progress": first_progress,
+            "completion": time.perf_counter() - submitted,
+            "events": events,
+            "best_score": last["best_score"] if last else None,
+        })
+
+
+# Percentiles of a list of durations
+def percentiles(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return {"p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)), "max": float(max(values))}
+
+
+# Drive the service with concurrent jobs
+async def load_test(host, port, encrypted_text, jobs=20, concurrency=8, length=2000, restarts=2, max_iterations=300,
+                    priorities=(0, 1, 2), cancel_fraction=0.1, deadline=None, seed=0):
+    """
+    Submit slices of a ciphertext as jobs from concurrent clients and measure the service.
+    
+    Every client submits a job, follows its event stream until the job ends and,
+    for a 'cancel_fraction' of the jobs, cancels it shortly after submission.
+    
+    Returns:
+        dict: Job counts per final state, throughput and latency percentiles
+              (submission, first progress event, completion) overall and per priority.
+    """
+    rng = np.random.default_rng(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+    tasks = []
+    for index in range(jobs):
+        start = int(rng.integers(0, max(len(encrypted_text) - length, 1)))
+        payload = {
+            "ciphertext": encrypted_text[start:start + length],
+            "priority": int(priorities[index % len(priorities)]),
+            "restarts": restarts,
+            "max_iterations": max_iterations,
+            "seed": seed + index,
+        }
+        if deadline is not None:
+            payload["deadline"] = deadline
+        cancel_after = float(rng.uniform(0.1, 1.0)) if rng.random() < cancel_fraction else None
+        tasks.append(run_job(host, port, payload, cancel_after, semaphore, results))
+    
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    
+    states = {}
+    for result in results:
+        states[result["state"]] = states.get(result["state"], 0) + 1
+    return {
+        "jobs": jobs,
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "jobs_per_second": jobs / elapsed,
+        "states": states,
+        "submit_latency": percentiles([result["submit_latency"] for result in results]),
+        "first_progress": percentiles([result.get("first_progress") for result in results]),
+        "completion": percentiles([result.get("completion") for result in results]),
+        "completion_by_priority": {
+            str(priority): percentiles([result.get("completion") for result in results if result.get("priority") == priority and result["state"] == "done"])
+            for priority in sorted(set(priorities))
+        },
+    }
+
+
+# Start a service on a free port for the duration of the test
+def spawn_service(processes):
+    """
+    Start solve_service.py on a free localhost port.
+    
+    Returns:
+        tuple: The subprocess and the port it listens on.
+    """
+    service = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "solve_service.py"), "--port", "0", "--processes", str(processes), "--progress-interval", "0.2"],
+        cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    line = service.stdout.readline()
+    return service, int(line.rsplit(":", 1)[1].split()[0])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the local solving service with concurrent jobs.")
+    parser.add_argument("--input", default=os.path.join(REPO_ROOT, "encrypted_book.txt"), help="encrypted text the job ciphertexts are sliced from")
+    parser.add_argument("--host", default="127.0.0.1", help="host of a running service")
+    parser.add_argument("--port", type=int, default=8765, help="port of a running service")
+    parser.add_argument("--spawn", type=int, metavar="PROCESSES", default=None, help="start a service with this many worker processes for the test")
+    parser.add_argument("--jobs", type=int, default=20, help="number of jobs to submit")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients submitting and following jobs at the same time")
+    parser.add_argument("--length", type=int, default=2000, help="characters of ciphertext per job")
+    parser.add_argument("--restarts", type=int, default=2, help="restarts per job")
+    parser.add_argument("--iterations", type=int, default=300, help="annealing iterations per restart")
+    parser.add_argument("--cancel-fraction", type=float, default=0.1, help="share of jobs cancelled shortly after submission")
+    parser.add_argument("--deadline", type=float, default=None, help="deadline of every job in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the job slices and solver seeds")
+    parser.add_argument("--output", default=None, help="JSON file to write the results to")
+    args = parser.parse_args()
+    
+    service = None
+    if args.spawn is not None:
+        service, args.port = spawn_service(args.spawn)
+    try:
+        report = asyncio.run(load_test(
+            args.host, args.port, load_encrypted_book(args.input), args.jobs, args.concurrency, args.length, args.restarts, args.iterations,
+            cancel_fraction=args.cancel_fraction, deadline=args.deadline, seed=args.seed,
+        ))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+    
+    print(json.dumps(report, indent=2))
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
@@ -0,0 +1,306 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from final_attempt_best_results import (
+    evaluate_decryption,
+    grid_search,
+    initialize_random_mapping,
+    load_encrypted_book,
+    simulated_annealing_with_ngrams,
+    substitute_text,
+)
+from attempts import load_attempt
+from ngram_counts import NgramCounts
+from solver_registry import SCORERS
+
+# Text-length slices (in characters) benchmarked in addition to the full text
+DEFAULT_LENGTHS = [2000, 10000, 50000]
+
+
+# Collect information about the machine the benchmarks ran on
+def machine_info():
+    """
+    Describe the machine and code version the benchmarks ran on.
+    
+    Returns:
+        dict: Platform, Python and NumPy versions, CPU count and the git commit 
+              of the repository (None if it cannot be determined).
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "git_commit": commit,
+    }
+
+
+# Measure how often a callable can be run per second
+def measure_rate(func, min_time=1.0, rounds=3):
+    """
+    Measure the call rate of a function.
+    
+    The function is called in batches that grow until a batch takes at least 
+    'min_time / rounds' seconds; the best of 'rounds' such batches is reported 
+    so that background noise only ever makes the numbers look worse.
+    
+    Args:
+        func (callable): The function to call without arguments.
+        min_time (float): Approximate total time budget in seconds.
+        rounds (int): Number of timed batches.
+    
+    Returns:
+        dict: Calls per second and seconds per call of the best batch.
+    """
+    batch_time = min_time / rounds
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= batch_time:
+            break
+        calls *= 2
+    
+    best = elapsed
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, time.perf_counter() - start)
+    
+    return {"calls_per_second": calls / best, "seconds_per_call": best / calls}
+
+
+# Benchmark substitute_text
+def bench_substitute_text(text, min_time):
+    """
+    Measure the throughput of substitute_text on a text.
+    
+    Args:
+        text (str): The encrypted text.
+        min_time (float): Time budget in seconds.
+    
+    Returns:
+        dict: Call rate plus throughput in characters per second.
+    """
+    mapping = initialize_random_mapping(0)
+    result = measure_rate(lambda: substitute_text(text, mapping), min_time)
+    result["characters_per_second"] = result["calls_per_second"] * len(text)
+    return result
+
+
+# Benchmark evaluate_decryption
+def bench_evaluate_decryption(text, min_time):
+    """
+    Measure how many times per second evaluate_decryption can score a text.
+    
+    Args:
+        text (str): The encrypted text (scored after a random substitution).
+        min_time (float): Time budget in seconds.
+    
+    Returns:
+        dict: Call rate of the scorer.
+    """
+    decrypted_text = substitute_text(text, initialize_random_mapping(0))
+    return measure_rate(lambda: evaluate_decryption(decrypted_text), min_time)
+
+
+# Benchmark the n-gram analysis
+def bench_ngram_analysis(text, min_time):
+    """
+    Compare the list-comprehension n-gram analysis of the earlier attempts with NgramCounts.
+    
+    Both sides produce the letter frequencies and the 2- to 5-gram Counters; 
+    the dense count arrays of NgramCounts are not built here.
+    
+    Args:
+        text (str): The encrypted text.
+        min_time (float): Time budget per side in seconds.
+    
+    Returns:
+        dict: Call rates of both versions and the speed-up.
+    """
+    module = load_attempt("break_substitution_grid_search_all_hyperparameters_bigraphs_trigrams_hill_climbing_simulated_annealing_combined.py")
+    
+    def list_comprehension():
+        module.frequency_analysis(text)
+        for n in range(2, 6):
+            module.ngram_analysis(text, n)
+    
+    def vectorized():
+        counts = NgramCounts(text, max_order=0)
+        counts.frequencies()
+        for n in range(2, 6):
+            counts.counter(n)
+    
+    result = {"list_comprehension": measure_rate(list_comprehension, min_time), "vectorized": measure_rate(vectorized, min_time)}
+    result["speedup"] = result["vectorized"]["calls_per_second"] / result["list_comprehension"]["calls_per_second"]
+    return result
+
+
+# Benchmark the vectorized Counter-weighted scorers
+def bench_counter_weighted_scorers(text, min_time):
+    """
+    Compare calculate_score and score_decryption of the earlier attempts with WeightedNgramScorer.
+    
+    Both versions score the same random decryption with tables built from the 
+    text; the scores are checked to be identical before they are timed.
+    
+    Args:
+        text (str): The encrypted text.
+        min_time (float): Time budget per measurement in seconds.
+    
+    Returns:
+        dict: Per scorer, the call rates of both versions and the speed-up.
+    """
+    decrypted_text = substitute_text(text, initialize_random_mapping(0))
+    results = {}
+    for name in ("counter_weighted_quadgrams", "counter_weighted_trigrams"):
+        scalar = SCORERS[name](text)
+        vectorized = SCORERS[f"{name}_vectorized"](text)
+        if scalar(decrypted_text) != vectorized(decrypted_text):
+            raise AssertionError(f"{name}: vectorized score differs from the original")
+        result = {"scalar": measure_rate(lambda: scalar(decrypted_text), min_time), "vectorized": measure_rate(lambda: vectorized(decrypted_text), min_time)}
+        result["speedup"] = result["vectorized"]["calls_per_second"] / result["scalar"]["calls_per_second"]
+        results[name] = result
+    return results
+
+
+# Benchmark the annealing loop
+def bench_annealing(text, iterations):
+    """
+    Measure annealing iterations per second for a fixed number of iterations.
+    
+    The temperature and cooling rate are chosen so the early stop never 
+    triggers and exactly 'iterations' iterations are run.
+    
+    Args:
+        text (str): The encrypted text.
+        iterations (int): Number of annealing iterations.
+    
+    Returns:
+        dict: Iterations per second and total seconds.
+    """
+    mapping = initialize_random_mapping(0)
+    start = time.perf_counter()
+    simulated_annealing_with_ngrams(text, mapping, temperature=1000, cooling_rate=1.0, max_iterations=iterations, rng=0)
+    elapsed = time.perf_counter() - start
+    return {"iterations": iterations, "seconds": elapsed, "iterations_per_second": iterations / elapsed}
+
+
+# Benchmark a complete (reduced) grid search
+def bench_time_to_solve(text, max_iterations, seed):
+    """
+    Measure the wall time of a small end-to-end grid search.
+    
+    The grid uses two temperatures and two cooling rates with the default 
+    weights; its console output and result file go to a temporary directory.
+    
+    Args:
+        text (str): The encrypted text.
+        max_iterations (int): Annealing iterations per grid cell.
+        seed (int): Master seed of the grid search.
+    
+    Returns:
+        dict: Wall time, number of grid cells and the best score found.
+    """
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                best_decrypted_text = grid_search(
+                    text, None, [2], [3], [4], [5], [500, 1000], [0.99, 0.995], max_iterations=max_iterations, seed=seed
+                )
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(working_directory)
+    return {"seconds": elapsed, "cells": 4, "max_iterations": max_iterations, "best_score": evaluate_decryption(best_decrypted_text)}
+
+
+# Run all benchmarks
+def run_benchmarks(filename, lengths, min_time=1.0, iterations=500, solve_iterations=500, seed=0):
+    """
+    Run every benchmark on the full text and on text-length slices of it.
+    
+    Args:
+        filename (str): The encrypted text to benchmark on.
+        lengths (list): Slice lengths in characters (the full text is always added).
+        min_time (float): Time budget per rate measurement in seconds.
+        iterations (int): Annealing iterations for the iterations/sec benchmark.
+        solve_iterations (int): Annealing iterations per cell for time-to-solve.
+        seed (int): Master seed for the time-to-solve grid search.
+    
+    Returns:
+        dict: Machine information and one result entry per text length.
+    """
+    encrypted_text = load_encrypted_book(filename)
+    lengths = sorted({length for length in lengths if length < len(encrypted_text)} | {len(encrypted_text)})
+    
+    results = []
+    for length in lengths:
+        text = encrypted_text[:length]
+        print(f"Benchmarking {length} characters...", file=sys.stderr)
+        results.append({
+            "length": length,
+            "substitute_text": bench_substitute_text(text, min_time),
+            "evaluate_decryption": bench_evaluate_decryption(text, min_time),
+            "ngram_analysis": bench_ngram_analysis(text, min_time),
+            "counter_weighted_scorers": bench_counter_weighted_scorers(text, min_time),
+            "annealing": bench_annealing(text, iterations),
+            "time_to_solve": bench_time_to_solve(text, solve_iterations, seed),
+        })
+    
+    return {"machine": machine_info(), "input": os.path.basename(filename), "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scoring, substitution and annealing hot paths.")
+    parser.add_argument("--input", default=os.path.join(REPO_ROOT, "encrypted_book.txt"), help="encrypted text to benchmark on")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file to write the results to")
+    parser.add_argument("--lengths", type=int, nargs="*", default=DEFAULT_LENGTHS, help="text-length slices in characters")
+    parser.add_argument("--min-time", type=float, default=1.0, help="time budget per rate measurement in seconds")
+    parser.add_argument("--iterations", type=int, default=500, help="annealing iterations for the iterations/sec benchmark")
+    parser.add_argument("--solve-iterations", type=int, default=500, help="annealing iterations per cell for time-to-solve")
+    parser.add_argument("--seed", type=int, default=0, help="master seed for the time-to-solve grid search")
+    args = parser.parse_args()
+    
+    report = run_benchmarks(args.input, args.lengths, args.min_time, args.iterations, args.solve_iterations, args.seed)
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    
+    for entry in report["results"]:
+        print(f"{entry['length']:>8} chars: "
+              f"substitute {entry['substitute_text']['characters_per_second'] / 1e6:8.1f} Mchar/s, "
+              f"evaluate {entry['evaluate_decryption']['calls_per_second']:8.1f} calls/s, "
+              f"analysis x{entry['ngram_analysis']['speedup']:5.1f}, "
+              f"counter scorers x{entry['counter_weighted_scorers']['counter_weighted_quadgrams']['speedup']:5.1f}, "
+              f"anneal {entry['annealing']['iterations_per_second']:8.1f} it/s, "
+              f"solve {entry['time_to_solve']['seconds']:7.2f} s")
+    print(f"Results written to {args.output}")
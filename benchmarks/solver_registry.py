@@ -0,0 +1,310 @@
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import final_attempt_best_results
+from attempts import load_attempt
+from ngram_counts import NgramCounts, WeightedNgramScorer
+
+# Short names of the previous attempt scripts used below
+HILL_CLIMBING = "hill_climbing_algorithm.py"
+HILL_CLIMBING_ANNEALING = "hill_climbing_with_simulated_annealing.py"
+COUNTER_WEIGHTED = "brek_substitution_digraph_trigram_hill_climbing_simulated_annealing_grid_search.py"
+BIGRAM_TRIGRAM_WEIGHTED = "break_substitution_grid_search_all_hyperparameters_bigraphs_trigrams_hill_climbing_simulated_annealing_combined.py"
+TRIGRAM_ANNEALING = "break_substitution_trigram_simulated_annealing.py"
+ADJUSTABLE_WEIGHTS = "break_substitution_trigram_adjust_weight_digraph_trigram.py"
+PENALTY_GRID_SEARCH = "break_substitution_penalty_grid_search_bi-trigram-weight.py"
+
+# Default weights used by the main() functions of the Counter-weighted scripts
+COUNTER_WEIGHTS = {'bigram': 0.4, 'trigram': 0.4, 'quadgram': 0.2}
+BIGRAM_TRIGRAM_WEIGHTS = {'bigram': 1, 'trigram': 1}
+
+_loaded_attempts = {}
+
+
+# Load (and cache) a previous attempt script
+def attempt(filename):
+    """
+    Return the module of a previous attempt, loading it without side effects once.
+    
+    Args:
+        filename (str): Script name inside previous_attempts.
+    
+    Returns:
+        module: The loaded script.
+    """
+    if filename not in _loaded_attempts:
+        _loaded_attempts[filename] = load_attempt(filename)
+    return _loaded_attempts[filename]
+
+
+# Run a function with its console output and result files kept out of the way
+def run_quietly(func, *args, **kwargs):
+    """
+    Call a solver with stdout captured and inside a temporary working directory.
+    
+    Several solvers print progress and write result files into the current 
+    directory; neither should disturb or be counted as part of a benchmark run.
+    
+    Returns:
+        The return value of 'func'.
+    """
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return func(*args, **kwargs)
+        finally:
+            os.chdir(working_directory)
+
+
+# Count the iterations a solver really runs
+@contextlib.contextmanager
+def counting_iterations(module, name, generator=False):
+    """
+    Count the iterations of a search by wrapping the function it calls once per iteration.
+    
+    The scripts look up their scoring function as a module global on every
+    iteration, and score the initial mapping once before the loop, so the
+    iterations are the scoring calls minus one. The annealing of this project
+    draws its moves from iterate_random_moves, so there every yielded move is
+    an iteration ('generator'). Cooling schedules that stop the search early
+    thus count only the iterations that ran, not the budget.
+    
+    Yields:
+        list: One counter, final once the block is left.
+    """
+    original = getattr(module, name)
+    count = [0]
+    if generator:
+        def counted(*args, **kwargs):
+            for item in original(*args, **kwargs):
+                count[0] += 1
+                yield item
+    else:
+        def counted(*args, **kwargs):
+            count[0] += 1
+            return original(*args, **kwargs)
+    setattr(module, name, counted)
+    try:
+        yield count
+    finally:
+        setattr(module, name, original)
+        if not generator:
+            count[0] = max(count[0] - 1, 0)
+
+
+# Build the n-gram Counters the Counter-weighted scorers compare against
+def reference_ngrams(ciphertext, orders):
+    """
+    Count n-grams of the ciphertext like the scripts' own ngram_analysis does.
+    
+    The Counter-weighted scripts build their tables from the encrypted text 
+    itself, so the registry does the same to score them under equal conditions. 
+    The Counters come from the vectorized NgramCounts and are identical to the 
+    scripts' list-comprehension versions.
+    """
+    counts = NgramCounts(ciphertext, max_order=0)
+    return [counts.counter(n) for n in orders]
+
+
+# Build the arguments of a script's refine_mapping
+def refine_mapping_tables(ciphertext, orders):
+    """
+    Letter frequencies and n-gram Counters as frequency_analysis, digraph_analysis 
+    and trigram_analysis of the scripts return them.
+    """
+    counts = NgramCounts(ciphertext, max_order=0)
+    return [counts.frequencies()] + [counts.counter(n) for n in orders]
+
+
+# Scorers: name -> prepare(ciphertext) -> score(decrypted_text)
+def prepare_word_count_scorer(ciphertext):
+    """score_decrypted_text of hill_climbing_algorithm.py (common word counts)."""
+    return attempt(HILL_CLIMBING).score_decrypted_text
+
+
+def prepare_word_frequency_digraph_scorer(ciphertext):
+    """score_decrypted_text of hill_climbing_with_simulated_annealing.py (words, letter frequencies, digraphs)."""
+    return attempt(HILL_CLIMBING_ANNEALING).score_decrypted_text
+
+
+def prepare_counter_weighted_scorer(ciphertext):
+    """calculate_score of brek_substitution_digraph_trigram_..._grid_search.py (bigram to quadgram Counters)."""
+    module = attempt(COUNTER_WEIGHTED)
+    bigrams, trigrams, quadgrams = reference_ngrams(ciphertext, (2, 3, 4))
+    return lambda decrypted_text: module.calculate_score(decrypted_text, bigrams, trigrams, quadgrams, COUNTER_WEIGHTS)
+
+
+def prepare_bigram_trigram_weighted_scorer(ciphertext):
+    """score_decryption of break_substitution_grid_search_all_hyperparameters_....py (bigram and trigram Counters)."""
+    module = attempt(BIGRAM_TRIGRAM_WEIGHTED)
+    bigrams, trigrams = reference_ngrams(ciphertext, (2, 3))
+    return lambda decrypted_text: module.score_decryption(decrypted_text, bigrams, trigrams, BIGRAM_TRIGRAM_WEIGHTS)
+
+
+def prepare_vectorized_counter_weighted_scorer(ciphertext):
+    """WeightedNgramScorer equivalent of calculate_score (identical scores, array gathers)."""
+    return WeightedNgramScorer(reference_ngrams(ciphertext, (2, 3, 4)), (2, 3, 4), [COUNTER_WEIGHTS[order] for order in ('bigram', 'trigram', 'quadgram')])
+
+
+def prepare_vectorized_bigram_trigram_weighted_scorer(ciphertext):
+    """WeightedNgramScorer equivalent of score_decryption (identical scores, array gathers)."""
+    return WeightedNgramScorer(reference_ngrams(ciphertext, (2, 3)), (2, 3), [BIGRAM_TRIGRAM_WEIGHTS[order] for order in ('bigram', 'trigram')])
+
+
+def prepare_counter_ngram_scorer(ciphertext):
+    """evaluate_decryption of break_substitution_trigram_adjust_weight_digraph_trigram.py (Counter version)."""
+    return attempt(ADJUSTABLE_WEIGHTS).evaluate_decryption
+
+
+def prepare_count_ngram_penalty_scorer(ciphertext):
+    """evaluate_decryption of break_substitution_penalty_grid_search_bi-trigram-weight.py (str.count version)."""
+    return attempt(PENALTY_GRID_SEARCH).evaluate_decryption
+
+
+def prepare_higher_ngram_scorer(ciphertext):
+    """evaluate_decryption of final_attempt_best_results.py."""
+    return final_attempt_best_results.evaluate_decryption
+
+
+SCORERS = {
+    "word_count": prepare_word_count_scorer,
+    "words_frequency_digraphs": prepare_word_frequency_digraph_scorer,
+    "counter_weighted_quadgrams": prepare_counter_weighted_scorer,
+    "counter_weighted_trigrams": prepare_bigram_trigram_weighted_scorer,
+    "counter_weighted_quadgrams_vectorized": prepare_vectorized_counter_weighted_scorer,
+    "counter_weighted_trigrams_vectorized": prepare_vectorized_bigram_trigram_weighted_scorer,
+    "counter_ngrams": prepare_counter_ngram_scorer,
+    "count_ngrams_penalty": prepare_count_ngram_penalty_scorer,
+    "higher_ngrams": prepare_higher_ngram_scorer,
+}
+
+
+# Solvers: name -> solve(ciphertext, seed, max_iterations) -> (decrypted text, iterations run)
+#
+# The scripts use the global 'random' module, which is seeded before each run.
+def solve_with_hill_climbing(ciphertext, seed, max_iterations):
+    """hill_climbing of hill_climbing_algorithm.py from its frequency-based mapping."""
+    module = attempt(HILL_CLIMBING)
+    random.seed(seed)
+    initial = module.refine_mapping(*refine_mapping_tables(ciphertext, (2,)), ciphertext)
+    with counting_iterations(module, "score_decrypted_text") as iterations:
+        best = run_quietly(module.hill_climbing, ciphertext, initial, iterations=max_iterations)
+    return module.substitute_text(ciphertext, best), iterations[0]
+
+
+def solve_with_hill_climbing_annealing(ciphertext, seed, max_iterations):
+    """simulated_annealing of hill_climbing_with_simulated_annealing.py from its frequency-based mapping."""
+    module = attempt(HILL_CLIMBING_ANNEALING)
+    random.seed(seed)
+    initial = module.refine_mapping(*refine_mapping_tables(ciphertext, (2,)), ciphertext)
+    with counting_iterations(module, "score_decrypted_text") as iterations:
+        best = run_quietly(module.simulated_annealing, ciphertext, initial, iterations=max_iterations)
+    return module.substitute_text(ciphertext, best), iterations[0]
+
+
+def solve_with_counter_weighted_hill_climbing(ciphertext, seed, max_iterations):
+    """hill_climbing of brek_substitution_digraph_trigram_..._grid_search.py."""
+    module = attempt(COUNTER_WEIGHTED)
+    random.seed(seed)
+    bigrams, trigrams, quadgrams = reference_ngrams(ciphertext, (2, 3, 4))
+    with counting_iterations(module, "calculate_score") as iterations:
+        decrypted_text = module.hill_climbing(ciphertext, bigrams, trigrams, quadgrams, COUNTER_WEIGHTS, max_iterations)[0]
+    return decrypted_text, iterations[0]
+
+
+def solve_with_counter_weighted_annealing(ciphertext, seed, max_iterations):
+    """simulated_annealing of brek_substitution_digraph_trigram_..._grid_search.py."""
+    module = attempt(COUNTER_WEIGHTED)
+    random.seed(seed)
+    bigrams, trigrams, quadgrams = reference_ngrams(ciphertext, (2, 3, 4))
+    with counting_iterations(module, "calculate_score") as iterations:
+        decrypted_text = module.simulated_annealing(ciphertext, bigrams, trigrams, quadgrams, COUNTER_WEIGHTS, 1000, 0.99, max_iterations)[0]
+    return decrypted_text, iterations[0]
+
+
+def solve_with_bigram_trigram_annealing(ciphertext, seed, max_iterations):
+    """simulated_annealing of break_substitution_grid_search_all_hyperparameters_....py."""
+    module = attempt(BIGRAM_TRIGRAM_WEIGHTED)
+    random.seed(seed)
+    bigrams, trigrams = reference_ngrams(ciphertext, (2, 3))
+    initial = {char: char for char in "abcdefghijklmnopqrstuvwxyz"}
+    with counting_iterations(module, "score_decryption") as iterations:
+        decrypted_text = module.simulated_annealing(ciphertext, bigrams, trigrams, initial, BIGRAM_TRIGRAM_WEIGHTS, 1000, 0.99, max_iterations)[0]
+    return decrypted_text, iterations[0]
+
+
+def solve_with_trigram_annealing(ciphertext, seed, max_iterations):
+    """simulated_annealing_with_trigrams of break_substitution_trigram_simulated_annealing.py."""
+    module = attempt(TRIGRAM_ANNEALING)
+    random.seed(seed)
+    initial = module.refine_mapping(*refine_mapping_tables(ciphertext, (2, 3)), ciphertext)
+    with counting_iterations(module, "evaluate_decryption") as iterations:
+        decrypted_text = run_quietly(module.simulated_annealing_with_trigrams, ciphertext, initial, max_iterations=max_iterations)[0]
+    return decrypted_text, iterations[0]
+
+
+def solve_with_adjustable_weight_annealing(ciphertext, seed, max_iterations):
+    """simulated_annealing_with_ngrams of break_substitution_trigram_adjust_weight_digraph_trigram.py."""
+    module = attempt(ADJUSTABLE_WEIGHTS)
+    random.seed(seed)
+    initial = module.refine_mapping(*refine_mapping_tables(ciphertext, (2, 3)), ciphertext)
+    with counting_iterations(module, "evaluate_decryption") as iterations:
+        decrypted_text = run_quietly(module.simulated_annealing_with_ngrams, ciphertext, initial, max_iterations=max_iterations)[0]
+    return decrypted_text, iterations[0]
+
+
+def solve_with_penalty_annealing(ciphertext, seed, max_iterations):
+    """simulated_annealing_with_ngrams of break_substitution_penalty_grid_search_bi-trigram-weight.py."""
+    module = attempt(PENALTY_GRID_SEARCH)
+    random.seed(seed)
+    initial = module.initialize_random_mapping()
+    with counting_iterations(module, "evaluate_decryption") as iterations:
+        decrypted_text = module.simulated_annealing_with_ngrams(ciphertext, initial, max_iterations=max_iterations)[0]
+    return decrypted_text, iterations[0]
+
+
+def solve_with_higher_ngram_annealing(ciphertext, seed, max_iterations):
+    """simulated_annealing_with_ngrams of final_attempt_best_results.py from a random mapping."""
+    rng = np.random.default_rng(seed)
+    initial = final_attempt_best_results.initialize_random_mapping(rng)
+    with counting_iterations(final_attempt_best_results, "iterate_random_moves", generator=True) as iterations:
+        decrypted_text = final_attempt_best_results.simulated_annealing_with_ngrams(ciphertext, initial, max_iterations=max_iterations, rng=rng)[0]
+    return decrypted_text, iterations[0]
+
+
+def solve_with_grid_search(ciphertext, seed, max_iterations):
+    """grid_search of final_attempt_best_results.py on a reduced grid."""
+    # The full 729-cell grid takes hours, so only temperatures and cooling rates are searched;
+    # the cells run in this process, so the iterations of all nine are counted
+    with counting_iterations(final_attempt_best_results, "iterate_random_moves", generator=True) as iterations:
+        decrypted_text = run_quietly(
+            final_attempt_best_results.grid_search,
+            ciphertext, None, [2], [3], [4], [5], [500, 1000, 1500], [0.99, 0.995, 0.999],
+            max_iterations=max_iterations, seed=seed,
+        )
+    return decrypted_text, iterations[0]
+
+
+SOLVERS = {
+    "hill_climbing": solve_with_hill_climbing,
+    "hill_climbing_annealing": solve_with_hill_climbing_annealing,
+    "counter_weighted_hill_climbing": solve_with_counter_weighted_hill_climbing,
+    "counter_weighted_annealing": solve_with_counter_weighted_annealing,
+    "bigram_trigram_annealing": solve_with_bigram_trigram_annealing,
+    "trigram_annealing": solve_with_trigram_annealing,
+    "adjustable_weight_annealing": solve_with_adjustable_weight_annealing,
+    "penalty_annealing": solve_with_penalty_annealing,
+    "higher_ngram_annealing": solve_with_higher_ngram_annealing,
+    "grid_search": solve_with_grid_search,
+}
@@ -0,0 +1,118 @@
+import argparse
+import json
+import string
+
+import numpy as np
+
+
+# Generate a random substitution key
+def generate_key(rng):
+    """
+    Generate a random substitution key.
+    
+    Args:
+        rng (numpy.random.Generator): The generator used for the permutation.
+    
+    Returns:
+        dict: A mapping from each lowercase plaintext letter to its cipher letter.
+    """
+    letters = string.ascii_lowercase
+    return {plain: letters[index] for plain, index in zip(letters, rng.permutation(26))}
+
+
+# Encrypt text with a substitution key
+def encrypt_text(plaintext, key):
+    """
+    Encrypt a text with a substitution key, preserving case and non-letters.
+    
+    Args:
+        plaintext (str): The text to encrypt.
+        key (dict): Mapping from lowercase plaintext letters to cipher letters.
+    
+    Returns:
+        str: The ciphertext.
+    """
+    table = dict(key)
+    table.update({plain.upper(): cipher.upper() for plain, cipher in key.items()})
+    return plaintext.translate(str.maketrans(table))
+
+
+# Generate a corpus of ciphertexts with known keys
+def generate_corpus(plaintext, lengths, samples_per_length=1, seed=None):
+    """
+    Cut samples of the requested lengths out of a plaintext and encrypt each one.
+    
+    Every sample starts at a random offset of the plaintext and is encrypted 
+    with its own random key, so the corpus covers many different keys.
+    
+    Args:
+        plaintext (str): Source plaintext (must be longer than every length).
+        lengths (list): Sample lengths in characters.
+        samples_per_length (int): Number of samples per length.
+        seed (int): Seed of the corpus (fresh entropy if None).
+    
+    Returns:
+        list: One dict per sample with 'length', 'offset', 'key', 'plaintext' and 'ciphertext'.
+    """
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for length in lengths:
+        if length > len(plaintext):
+            raise ValueError(f"Sample length {length} exceeds the plaintext length {len(plaintext)}")
+        for _ in range(samples_per_length):
+            offset = int(rng.integers(0, len(plaintext) - length + 1))
+            sample = plaintext[offset:offset + length]
+            key = generate_key(rng)
+            corpus.append({
+                "length": length,
+                "offset": offset,
+                "key": key,
+                "plaintext": sample,
+                "ciphertext": encrypt_text(sample, key),
+            })
+    return corpus
+
+
+# Save a corpus as JSON lines
+def save_corpus(filename, corpus):
+    """
+    Write a corpus to a JSON lines file, one sample per line.
+    
+    Args:
+        filename (str): The file to write.
+        corpus (list): The samples returned by generate_corpus.
+    """
+    with open(filename, "w") as file:
+        for sample in corpus:
+            file.write(json.dumps(sample) + "\n")
+
+
+# Load a corpus from JSON lines
+def load_corpus(filename):
+    """
+    Read a corpus written by save_corpus.
+    
+    Args:
+        filename (str): The JSON lines file.
+    
+    Returns:
+        list: The samples of the corpus.
+    """
+    with open(filename, "r") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate ciphertexts with known keys from a plaintext.")
+    parser.add_argument("plaintext", help="plaintext file to cut the samples from")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[500, 2000, 10000], help="sample lengths in characters")
+    parser.add_argument("--samples", type=int, default=3, help="number of samples per length")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus")
+    parser.add_argument("--output", default="synthetic_corpus.jsonl", help="JSON lines file to write")
+    args = parser.parse_args()
+    
+    with open(args.plaintext, "r") as plaintext_file:
+        plaintext = plaintext_file.read()
+    corpus = generate_corpus(plaintext, args.lengths, args.samples, args.seed)
+    save_corpus(args.output, corpus)
+    print(f"Wrote {len(corpus)} samples to {args.output}")
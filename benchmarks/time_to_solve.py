@@ -0,0 +1,140 @@
+import argparse
+import collections
+import json
+import string
+import sys
+import time
+
+from solver_registry import SOLVERS
+from synthetic_corpus import load_corpus
+
+
+# Compare a decryption with the ground truth of a sample
+def evaluate_solution(sample, decrypted_text):
+    """
+    Measure how close a decryption is to the true plaintext of a sample.
+    
+    The recovered key is read off the decryption itself: every cipher letter 
+    is assigned the plaintext letter it was most often turned into. This works 
+    for any solver, whether or not it exposes its key.
+    
+    Args:
+        sample (dict): A corpus sample with 'key', 'plaintext' and 'ciphertext'.
+        decrypted_text (str): The solver's decryption of the sample ciphertext.
+    
+    Returns:
+        dict: 'key_accuracy' (share of cipher letters occurring in the text that 
+              are mapped correctly) and 'symbol_error_rate' (share of letter 
+              positions decrypted wrongly, ignoring case).
+    """
+    true_inverse_key = {cipher: plain for plain, cipher in sample["key"].items()}
+    recovered = collections.defaultdict(collections.Counter)
+    errors = letters = 0
+    for cipher_char, decrypted_char, plain_char in zip(sample["ciphertext"], decrypted_text, sample["plaintext"]):
+        if cipher_char not in string.ascii_letters:
+            continue
+        letters += 1
+        errors += decrypted_char.lower() != plain_char.lower()
+        recovered[cipher_char.lower()][decrypted_char.lower()] += 1
+    
+    correct = sum(1 for cipher, counts in recovered.items() if counts.most_common(1)[0][0] == true_inverse_key[cipher])
+    return {
+        "key_accuracy": correct / len(recovered) if recovered else 1.0,
+        "symbol_error_rate": errors / letters if letters else 0.0,
+    }
+
+
+# Run solvers across a corpus
+def run_harness(corpus, solver_names, max_iterations=1000, seed=0):
+    """
+    Run every solver on every sample and collect accuracy, wall time and the iterations run.
+    
+    Args:
+        corpus (list): Samples as produced by synthetic_corpus.generate_corpus.
+        solver_names (list): Names of entries in SOLVERS.
+        max_iterations (int): Iteration budget passed to every solver.
+        seed (int): Seed passed to every solver run.
+    
+    Several of the older scripts crash on some inputs; such a run is recorded 
+    with its 'error' and counted as a complete failure (nothing recovered).
+    
+    Returns:
+        list: One dict per (solver, sample) run.
+    """
+    runs = []
+    for solver_name in solver_names:
+        solve = SOLVERS[solver_name]
+        for index, sample in enumerate(corpus):
+            start = time.perf_counter()
+            try:
+                decrypted_text, iterations = solve(sample["ciphertext"], seed, max_iterations)
+                error = None
+            except Exception as exc:
+                decrypted_text, iterations, error = "", 0, f"{type(exc).__name__}: {exc}"
+            elapsed = time.perf_counter() - start
+            run = {"solver": solver_name, "sample": index, "length": sample["length"], "seconds": elapsed, "iterations": iterations}
+            if error is None:
+                run.update(evaluate_solution(sample, decrypted_text))
+            else:
+                run.update({"key_accuracy": 0.0, "symbol_error_rate": 1.0, "error": error})
+            runs.append(run)
+            print(f"{solver_name} sample {index} ({sample['length']} chars): "
+                  f"key accuracy {run['key_accuracy']:.2f}, SER {run['symbol_error_rate']:.3f}, {elapsed:.2f} s", file=sys.stderr)
+    return runs
+
+
+# Aggregate the runs per solver and text length
+def summarize_runs(runs):
+    """
+    Aggregate harness runs per solver and text length.
+    
+    A run counts as solved when every letter was decrypted correctly; 
+    'mean_seconds_to_solve' averages the wall time over solved runs only.
+    
+    Args:
+        runs (list): The runs returned by run_harness.
+    
+    Returns:
+        list: One summary dict per (solver, length), sorted by solver and length.
+    """
+    groups = collections.defaultdict(list)
+    for run in runs:
+        groups[(run["solver"], run["length"])].append(run)
+    
+    summary = []
+    for (solver_name, length), group in sorted(groups.items()):
+        solved = [run for run in group if run["symbol_error_rate"] == 0.0]
+        summary.append({
+            "solver": solver_name,
+            "length": length,
+            "samples": len(group),
+            "solved": len(solved),
+            "errors": sum("error" in run for run in group),
+            "mean_key_accuracy": sum(run["key_accuracy"] for run in group) / len(group),
+            "mean_symbol_error_rate": sum(run["symbol_error_rate"] for run in group) / len(group),
+            "mean_seconds": sum(run["seconds"] for run in group) / len(group),
+            "mean_seconds_to_solve": sum(run["seconds"] for run in solved) / len(solved) if solved else None,
+        })
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure key accuracy and time-to-solve of solvers on a synthetic corpus.")
+    parser.add_argument("corpus", help="JSON lines corpus written by synthetic_corpus.py")
+    parser.add_argument("--solver", action="append", choices=sorted(SOLVERS), help="solver to run (all if omitted)")
+    parser.add_argument("--max-iterations", type=int, default=1000, help="iteration budget per solver run")
+    parser.add_argument("--seed", type=int, default=0, help="seed passed to every solver run")
+    parser.add_argument("--output", default=None, help="JSON file for the runs and the summary")
+    args = parser.parse_args()
+    
+    runs = run_harness(load_corpus(args.corpus), args.solver or sorted(SOLVERS), args.max_iterations, args.seed)
+    summary = summarize_runs(runs)
+    
+    print(f"{'solver':<40} {'length':>8} {'solved':>8} {'key acc':>8} {'SER':>8} {'seconds':>9}")
+    for entry in summary:
+        print(f"{entry['solver']:<40} {entry['length']:>8} {entry['solved']:>4}/{entry['samples']:<3} "
+              f"{entry['mean_key_accuracy']:>8.2f} {entry['mean_symbol_error_rate']:>8.3f} {entry['mean_seconds']:>9.2f}")
+    
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"runs": runs, "summary": summary}, output_file, indent=2)
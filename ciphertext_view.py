@@ -0,0 +1,128 @@
+import mmap
+
+import numpy as np
+
+
+# Letter-only view of a ciphertext
+class CiphertextView:
+    """
+    Compact, letter-only view of a ciphertext with a map back to the original layout.
+    
+    The view is built once from the raw bytes (memory-mapped when loaded from a 
+    file). It keeps the ASCII letters as lowercase codes 0-25 in a uint8 array, 
+    plus a sparse map back to the original: where each run of consecutive letters 
+    (a word, as far as isalpha is concerned) starts in the compact array and in 
+    the original bytes, and which letters were uppercase. Newlines, punctuation, 
+    digits and headers never reach the scorers, and 'restore' rebuilds the exact 
+    original layout from a decrypted compact text.
+    
+    Attributes:
+        original (numpy.ndarray): The raw bytes of the ciphertext (uint8, read-only).
+        letters (numpy.ndarray): Lowercase letter codes 0-25 (uint8).
+        run_starts (numpy.ndarray): Index in 'letters' where each letter run starts.
+        run_offsets (numpy.ndarray): Byte offset in 'original' where each run starts.
+        uppercase (numpy.ndarray): Indices in 'letters' of the uppercase letters.
+    """
+    
+    def __init__(self, data):
+        self._mmap = None
+        self.original = np.frombuffer(data, dtype=np.uint8)
+        
+        # ASCII letters, folded to lowercase by setting the 0x20 bit
+        folded = self.original | 0x20
+        is_letter = (folded >= ord("a")) & (folded <= ord("z"))
+        letter_offsets = np.flatnonzero(is_letter)
+        self.letters = folded[letter_offsets] - ord("a")
+        self.uppercase = np.flatnonzero(self.original[letter_offsets] < ord("a"))
+        
+        # A run starts at every letter whose predecessor in the original is not a letter
+        new_run = np.ones(len(letter_offsets), dtype=bool)
+        new_run[1:] = np.diff(letter_offsets) > 1
+        self.run_starts = np.flatnonzero(new_run)
+        self.run_offsets = letter_offsets[self.run_starts]
+        self._compact_text = {}
+    
+    @classmethod
+    def from_file(cls, filename):
+        """
+        Build the view of a ciphertext file without reading it into a str.
+        
+        The file is memory-mapped; the mapping stays open until 'close' is called 
+        (or the view is used as a context manager).
+        """
+        with open(filename, "rb") as file:
+            if file.seek(0, 2) == 0:
+                return cls(b"")
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = cls(mapped)
+        view._mmap = mapped
+        return view
+    
+    @classmethod
+    def from_text(cls, text):
+        """Build the view of a ciphertext given as a str."""
+        return cls(text.encode("utf-8"))
+    
+    def close(self):
+        """Release the memory mapping of the original file (if any)."""
+        if self._mmap is not None:
+            self.original = np.frombuffer(bytes(self.original), dtype=np.uint8)
+            self._mmap.close()
+            self._mmap = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __len__(self):
+        return len(self.letters)
+    
+    def compact_text(self, word_gaps=True):
+        """
+        Return the letters as a lowercase str for the scorers.
+        
+        Args:
+            word_gaps (bool): Separate letter runs by a single space, so that no 
+                              n-gram spans two words (as in the original text).
+        
+        Returns:
+            str: The compact ciphertext (built once per setting, then cached).
+        """
+        if word_gaps not in self._compact_text:
+            codes = self.letters + ord("a")
+            if word_gaps and len(self.run_starts) > 1:
+                codes = np.insert(codes, self.run_starts[1:], ord(" "))
+            self._compact_text[word_gaps] = codes.tobytes().decode("ascii")
+        return self._compact_text[word_gaps]
+    
+    def positions(self):
+        """Return the byte offset in the original of every letter of the view."""
+        run_lengths = np.diff(np.append(self.run_starts, len(self.letters)))
+        return np.repeat(self.run_offsets - self.run_starts, run_lengths) + np.arange(len(self.letters))
+    
+    def restore(self, decrypted_compact_text):
+        """
+        Rebuild the original layout around a decrypted compact text.
+        
+        Every non-letter byte of the original is kept as is and every letter 
+        is replaced by its decryption, in the case of the original letter.
+        
+        Args:
+            decrypted_compact_text (str): A decryption of 'compact_text()' (with or 
+                                          without word gaps), in lowercase letters.
+        
+        Returns:
+            str: The decrypted text in the exact layout of the original.
+        """
+        codes = np.frombuffer(decrypted_compact_text.lower().encode("ascii"), dtype=np.uint8)
+        codes = codes[codes != ord(" ")]
+        if len(codes) != len(self.letters):
+            raise ValueError(f"Expected {len(self.letters)} letters, got {len(codes)}")
+        
+        restored = self.original.copy()
+        positions = self.positions()
+        restored[positions] = codes
+        restored[positions[self.uppercase]] -= 0x20
+        return restored.tobytes().decode("utf-8")
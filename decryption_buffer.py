@@ -0,0 +1,110 @@
+import re
+import string
+
+import numpy as np
+
+# Runs of ASCII letters in a byte buffer
+WORD_PATTERN = re.compile(rb"[A-Za-z]+")
+
+
+# Mutable decryption of a ciphertext
+class DecryptionBuffer:
+    """
+    In-place decryption of a ciphertext under a mapping that changes by swaps.
+    
+    The decryption is held as a mutable bytearray (the UTF-8 bytes of the text)
+    and, for every cipher letter, the array of byte offsets where it occurs is
+    computed once. Swapping the plaintext of two cipher letters then rewrites
+    only the positions of those two letters instead of building a new string
+    of the whole text, and undoing a swap is the same swap again.
+    
+    Scorers can read the buffer without copying it: 'data' supports count, find
+    and bytes regular expressions (see evaluate_decryption and 'words'); 'text'
+    decodes a str only when one is really needed.
+    
+    Attributes:
+        data (bytearray): The current decryption, UTF-8 encoded.
+        mapping (dict): The current mapping of cipher letters to plaintext letters.
+        positions (dict): Cipher letter -> numpy array of its byte offsets.
+    """
+    
+    def __init__(self, encrypted_text, mapping):
+        encrypted = encrypted_text.encode("utf-8")
+        self.mapping = dict(mapping)
+        self.data = bytearray(encrypted)
+        self._view = np.frombuffer(self.data, dtype=np.uint8)
+        
+        # Group the byte offsets by cipher letter with one stable sort
+        codes = np.frombuffer(encrypted, dtype=np.uint8)
+        offsets = np.argsort(codes, kind="stable")
+        sorted_codes = codes[offsets]
+        self.positions = {}
+        for letter in string.ascii_letters:
+            start, end = np.searchsorted(sorted_codes, [ord(letter), ord(letter) + 1])
+            self.positions[letter] = offsets[start:end]
+        
+        for letter, plain in self.mapping.items():
+            if letter in self.positions:
+                self._view[self.positions[letter]] = ord(plain)
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def swap(self, letter1, letter2):
+        """
+        Swap the plaintext letters of two cipher letters, rewriting only their positions.
+        
+        Like swapping two entries of a substitution dictionary, only the two given
+        keys change (so swapping 'a' and 'b' leaves 'A' and 'B' alone).
+        """
+        mapping = self.mapping
+        mapping[letter1], mapping[letter2] = mapping[letter2], mapping[letter1]
+        self._view[self.positions[letter1]] = ord(mapping[letter1])
+        self._view[self.positions[letter2]] = ord(mapping[letter2])
+    
+    def assign(self, letter, plain):
+        """Map one cipher letter to a new plaintext letter, rewriting only its positions."""
+        self.mapping[letter] = plain
+        self._view[self.positions[letter]] = ord(plain)
+    
+    def text(self):
+        """The current decryption as a str (a new string every call)."""
+        return self.data.decode("utf-8")
+    
+    def words(self):
+        """Iterate over the words (runs of ASCII letters) of the decryption as bytes, without decoding the text."""
+        return (match.group() for match in WORD_PATTERN.finditer(self.data))
+
+
+# Decryption materialised on demand
+class LazyDecryption:
+    """
+    Read-only view of the decryption of a ciphertext under a fixed mapping.
+    
+    Nothing is decrypted up front: indexing or slicing the view decrypts just 
+    the requested part of the ciphertext, and str() the whole text. Optimisers 
+    that track only mappings hand out such a view instead of a full copy of 
+    the plaintext for every result they keep.
+    
+    Attributes:
+        encrypted_text (str): The ciphertext.
+        mapping (dict): The mapping of cipher letters to plaintext letters.
+    """
+    
+    def __init__(self, encrypted_text, mapping):
+        self.encrypted_text = encrypted_text
+        self.mapping = dict(mapping)
+        self._table = str.maketrans(self.mapping)
+    
+    def __len__(self):
+        return len(self.encrypted_text)
+    
+    def __getitem__(self, index):
+        return self.encrypted_text[index].translate(self._table)
+    
+    def __str__(self):
+        return self.encrypted_text.translate(self._table)
+    
+    def key(self):
+        """The plaintext letters of cipher letters 'a'..'z' as a 26-letter string."""
+        return "".join(self.mapping.get(letter, "?") for letter in string.ascii_lowercase)
@@ -1,6 +1,42 @@
-import random
+import argparse
+import concurrent.futures
+import contextlib
+import functools
+import itertools
+import multiprocessing
+import os
 import string
-import math
+import time
+import numpy as np
+
+from ciphertext_view import CiphertextView
+from decryption_buffer import DecryptionBuffer, LazyDecryption
+from score_cache import ScoreCache, release_score_cache
+from search_instrumentation import SearchInstrumentation
+from search_trace import SearchTrace
+from solve_profiler import SolveProfiler, merge_profiles, profiled_cells
+from stream_decrypt import stream_decrypt
+from top_keys import TopKeys, mapping_key, write_checkpoint
+
+# Number of swap moves and acceptance thresholds drawn from the generator at once
+RANDOM_BLOCK_SIZE = 4096
+
+# Temperature at which the annealing stops early
+MIN_TEMPERATURE = 0.1
+
+# Factor by which a progressive scoring window has to grow before it is switched
+WINDOW_GROWTH = 1.25
+
+# Common n-grams of English and unlikely letter pairs scored by evaluate_decryption
+COMMON_DIGRAPHS = ['th', 'he', 'in', 'er', 'an', 're', 'on', 'at', 'en', 'nd', 'ti', 'es', 'or', 'te', 'of']
+COMMON_TRIGRAMS = ['the', 'and', 'ing', 'her', 'hat', 'his', 'tha', 'ere', 'for', 'ent', 'ion', 'ter']
+COMMON_QUADGRAMS = ['tion', 'ment', 'that', 'with', 'this', 'ther', 'here', 'ions', 'ated', 'able']
+COMMON_PENTAGRAMS = ['ation', 'ation', 'there', 'other', 'their', 'which', 'would', 'could', 'about', 'after']
+UNLIKELY_SEQUENCES = ['zx', 'qq', 'jf', 'zz', 'vx']
+NGRAM_TABLES = (COMMON_DIGRAPHS, COMMON_TRIGRAMS, COMMON_QUADGRAMS, COMMON_PENTAGRAMS, UNLIKELY_SEQUENCES)
+
+# The same tables as bytes, for scoring bytes-like decryptions such as DecryptionBuffer.data
+ENCODED_NGRAM_TABLES = tuple([ngram.encode() for ngram in ngrams] for ngrams in NGRAM_TABLES)
 
 # Load the encrypted book
 def load_encrypted_book(filename):
@@ -51,7 +87,9 @@ def evaluate_decryption(decrypted_text, digraph_weight=2, trigram_weight=3, quad
     penalizes unlikely sequences.
     
     Args:
-        decrypted_text (str): The decrypted text being evaluated.
+        decrypted_text (str or bytearray): The decrypted text being evaluated (a bytes-like 
+                                           text, e.g. DecryptionBuffer.data, is counted 
+                                           with byte patterns, without decoding it).
         digraph_weight (int): Weight to assign for bigram matches (2-letter sequences).
         trigram_weight (int): Weight for trigram matches (3-letter sequences).
         quadgram_weight (int): Weight for quadgram matches (4-letter sequences).
@@ -61,12 +99,11 @@ def evaluate_decryption(decrypted_text, digraph_weight=2, trigram_weight=3, quad
     Returns:
         int: A score reflecting the quality of the encrypted text.
     """
-
-    # Define common n-grams
-    common_digraphs = ['th', 'he', 'in', 'er', 'an', 're', 'on', 'at', 'en', 'nd', 'ti', 'es', 'or', 'te', 'of']
-    common_trigrams = ['the', 'and', 'ing', 'her', 'hat', 'his', 'tha', 'ere', 'for', 'ent', 'ion', 'ter']
-    common_quadgrams = ['tion', 'ment', 'that', 'with', 'this', 'ther', 'here', 'ions', 'ated', 'able']
-    common_pentagrams = ['ation', 'ation', 'there', 'other', 'their', 'which', 'would', 'could', 'about', 'after']
+    
+    # The n-gram tables are built once at import, as str and as bytes
+    common_digraphs, common_trigrams, common_quadgrams, common_pentagrams, unlikely_sequences = (
+        NGRAM_TABLES if isinstance(decrypted_text, str) else ENCODED_NGRAM_TABLES
+    )
     
     # Compute scores based on n-grams
     score = 0
@@ -87,23 +124,101 @@ def evaluate_decryption(decrypted_text, digraph_weight=2, trigram_weight=3, quad
     score += pentagram_score
     
     # Penalize unlikely sequences
-    unlikely_sequences = ['zx', 'qq', 'jf', 'zz', 'vx']  
     for seq in unlikely_sequences:
         score -= decrypted_text.count(seq) * penalty_weight
     
     return score
 
 
-# Simulated Annealing with higher n-grams
-def simulated_annealing_with_ngrams(encrypted_text, initial_mapping, digraph_weight=2, trigram_weight=3, quadgram_weight=4, pentagram_weight=5, temperature=1000, cooling_rate=0.995, max_iterations=1000):
+# Draw swap moves and acceptance thresholds in blocks
+def iterate_random_moves(rng, max_iterations, block_size=RANDOM_BLOCK_SIZE):
     """
-    Apply simulated annealing to decrypt text based on n-gram scores.
+    Yield random swap moves and log-domain acceptance thresholds.
+    
+    Instead of calling the pure-Python RNG twice per iteration, this generator 
+    draws whole blocks of letter pairs and uniform thresholds from a NumPy 
+    generator and hands them out one by one. The thresholds are returned as 
+    log(u) so the caller can compare them against delta / temperature directly.
+    
+    Args:
+        rng (numpy.random.Generator): The generator to draw from.
+        max_iterations (int): Total number of moves to yield.
+        block_size (int): Number of moves drawn per block.
+    
+    Yields:
+        tuple: (letter1, letter2, log_threshold) with two distinct lowercase letters.
+    """
+    letters = np.array(list(string.ascii_lowercase))
+    remaining = max_iterations
+    while remaining > 0:
+        size = min(block_size, remaining)
+        first = rng.integers(0, 26, size=size)
+        # Offsetting by 1..25 guarantees two distinct letters, uniformly chosen
+        second = (first + rng.integers(1, 26, size=size)) % 26
+        # log(1 - u) with u in [0, 1) is never -inf
+        log_thresholds = np.log1p(-rng.random(size))
+        yield from zip(letters[first].tolist(), letters[second].tolist(), log_thresholds.tolist())
+        remaining -= size
+
+
+# Length of the progressive scoring window
+def progressive_window_length(text_length, min_window, iteration, max_iterations, initial_temperature, temperature):
+    """
+    Length of the scoring window at a point of the annealing schedule.
+    
+    The window grows geometrically from 'min_window' characters to the full text. 
+    Progress is measured both by iterations and by how far the temperature has 
+    fallen towards MIN_TEMPERATURE (on a log scale), whichever is further, so the 
+    window reaches the full text by the end of the run however it ends.
+    
+    Args:
+        text_length (int): Length of the full text.
+        min_window (int): Length of the window at the start.
+        iteration (int): Current iteration.
+        max_iterations (int): Maximum number of iterations.
+        initial_temperature (float): Temperature at the start.
+        temperature (float): Current temperature.
+    
+    Returns:
+        int: Number of leading characters of the text to score.
+    
+    Raises:
+        ValueError: If 'min_window' or 'max_iterations' is not positive.
+    """
+    if min_window <= 0:
+        raise ValueError(f"min_window must be a positive number of characters, got {min_window}")
+    if max_iterations <= 0:
+        raise ValueError(f"a progressive window needs a positive max_iterations, got {max_iterations}")
+    if min_window >= text_length:
+        return text_length
+    progress = iteration / max_iterations
+    if initial_temperature > MIN_TEMPERATURE:
+        progress = max(progress, np.log(initial_temperature / temperature) / np.log(initial_temperature / MIN_TEMPERATURE))
+    progress = min(max(progress, 0.0), 1.0)
+    return min(text_length, int(min_window * (text_length / min_window) ** progress))
+
+
+# Simulated Annealing with higher n-grams, tracking keys only
+def simulated_annealing_key(encrypted_text, initial_mapping, digraph_weight=2, trigram_weight=3, quadgram_weight=4, pentagram_weight=5, temperature=1000, cooling_rate=0.995, max_iterations=1000, rng=None, instrumentation=None, trace=None, min_window=None, score_cache=None, in_place=True, top_keys=None):
+    """
+    Apply simulated annealing to find the substitution key with the best n-gram score.
     
     This function attempts to find the best substitution cipher decryption by
     using simulated annealing, a probabilistic technique for optimization. 
     It iteravely improves a random letter mapping by evaluating the decryption quality
     using n-grams (bigrams, trigrams, etc.) and adjusting the mapping over time.
     
+    Only mappings and scores are kept: the text of a candidate exists just long 
+    enough to be scored, and no copy of the best decryption is held. Use 
+    LazyDecryption (or substitute_text) to materialise the text of the result.
+    
+    With 'min_window', scoring is coarse-to-fine: while the temperature is high only 
+    the first few thousand characters are scored, and the window grows towards the 
+    full text as the system cools (see progressive_window_length). Window scores are 
+    scaled to the length of the full text, and the current and best mappings are 
+    rescored whenever the window grows, so acceptance stays consistent across switches. 
+    The returned score is always that of the full text.
+    
     Args:
         encrypted_text (str): The encrypted text to decrypt.
         initial_mapping (dict): The initial random mapping of letters.
@@ -114,71 +229,364 @@ def simulated_annealing_with_ngrams(encrypted_text, initial_mapping, digraph_wei
         temperature (float): Initial temperature for the annealing process.
         cooling_rate (float): The rate at which the temperature decreases during annealing.
         max_iterations (int): Maximum number of iterations to perform.
+        rng (numpy.random.Generator or int): Generator or seed for the swap moves and 
+                                             acceptance thresholds (fresh entropy if None).
+        instrumentation (SearchInstrumentation): Optional counters for phase timings, 
+                                                 acceptance and best-score progress.
+        trace (ChainTrace): Optional structured event stream for sampled progress.
+        min_window (int): If given, length of the progressive scoring window at the start.
+        score_cache (ScoreCache): Optional memo of scores by key; a move to a key that is 
+                                  already cached skips substitution and scoring.
+        in_place (bool): Keep the decryption in a DecryptionBuffer and apply (or undo) 
+                         each swap in place instead of substituting the whole text 
+                         (same results, less work per move).
+        top_keys (TopKeys): Optional set of the best distinct keys; every state the chain 
+                            moves to is offered (once scores are on the full text).
         
     Returns:
-        tuple: A tuple containing the best decrypted text and the corresponding score.
+        tuple: The best mapping and the corresponding score.
     """
+    rng = np.random.default_rng(rng)
+    initial_temperature = temperature
+    full_text = encrypted_text
+    window_length = None
+    if min_window is not None and min_window < len(full_text):
+        window_length = progressive_window_length(len(full_text), min_window, 0, max_iterations, initial_temperature, temperature)
+        encrypted_text = full_text[:window_length]
+    progressive = window_length is not None
+    # Window scores are scaled to the length of the full text
+    scale = 1 if window_length is None else len(full_text) / window_length
+    
+    # The buffer, if any, always holds the decryption of the current mapping
+    buffer = DecryptionBuffer(encrypted_text, initial_mapping) if in_place else None
     current_mapping = initial_mapping.copy()
-    best_mapping = current_mapping.copy()
-    best_decrypted_text = substitute_text(encrypted_text, best_mapping)
-    best_score = evaluate_decryption(best_decrypted_text, digraph_weight, trigram_weight, quadgram_weight, pentagram_weight)
-    
-    current_decrypted_text = best_decrypted_text
+    best_mapping = current_mapping
+    best_score = scale * evaluate_decryption(buffer.data if buffer is not None else substitute_text(encrypted_text, current_mapping), digraph_weight, trigram_weight, quadgram_weight, pentagram_weight)
     current_score = best_score
+    if top_keys is not None and window_length is None:
+        top_keys.offer(current_score, mapping_key(current_mapping))
+    
+    if instrumentation is not None:
+        instrumentation.start()
+        instrumentation.record_best(0, best_score)
+    if trace is not None:
+        trace.start(temperature=temperature, cooling_rate=cooling_rate, max_iterations=max_iterations, initial_score=best_score)
+    
+    iteration = 0
     
-    for iteration in range(max_iterations):
+    for iteration, (letter1, letter2, log_threshold) in enumerate(iterate_random_moves(rng, max_iterations), 1):
         # Generate a neighboring solution by swapping two random letters
         new_mapping = current_mapping.copy()
-        letter1, letter2 = random.sample(string.ascii_lowercase, 2)
         new_mapping[letter1], new_mapping[letter2] = new_mapping[letter2], new_mapping[letter1]
+        if instrumentation is not None:
+            instrumentation.lap("move_generation")
         
-        # Apply the new mapping and evaluate
-        new_decrypted_text = substitute_text(encrypted_text, new_mapping)
-        new_score = evaluate_decryption(new_decrypted_text, digraph_weight, trigram_weight, quadgram_weight, pentagram_weight)
+        # Apply the new mapping and evaluate (unless the key was scored before)
+        new_score = None
+        swapped = False
+        if score_cache is not None:
+            cache_key = score_cache.key(new_mapping, (digraph_weight, trigram_weight, quadgram_weight, pentagram_weight, len(encrypted_text)))
+            new_score = score_cache.get(cache_key)
+            if instrumentation is not None:
+                instrumentation.lap("cache_lookup")
+        if new_score is None:
+            if buffer is not None:
+                buffer.swap(letter1, letter2)
+                swapped = True
+                new_decrypted_text = buffer.data
+            else:
+                new_decrypted_text = substitute_text(encrypted_text, new_mapping)
+            if instrumentation is not None:
+                instrumentation.lap("substitution")
+            new_score = evaluate_decryption(new_decrypted_text, digraph_weight, trigram_weight, quadgram_weight, pentagram_weight)
+            new_decrypted_text = None
+            if score_cache is not None:
+                score_cache.put(cache_key, new_score)
+            if instrumentation is not None:
+                instrumentation.lap("scoring")
+        new_score *= scale
         
-        # Calculate probability of accepting the new solution
+        # Accept in the log domain: log(u) < delta / T  <=>  u < exp(delta / T)
         delta_score = new_score - current_score
-        if delta_score > 0 or random.uniform(0, 1) < math.exp(delta_score / temperature):
+        accepted = delta_score > 0 or log_threshold < delta_score / temperature
+        if accepted:
             current_mapping = new_mapping
-            current_decrypted_text = new_decrypted_text
             current_score = new_score
+            if top_keys is not None and window_length is None:
+                top_keys.offer(current_score, mapping_key(current_mapping))
+        # Keep the buffer on the current mapping: apply an accepted cached move, undo a rejected one
+        if buffer is not None and accepted != swapped:
+            buffer.swap(letter1, letter2)
         
         # Update the best solution found so far
         if current_score > best_score:
             best_mapping = current_mapping
-            best_decrypted_text = current_decrypted_text
             best_score = current_score
+            if instrumentation is not None:
+                instrumentation.record_best(iteration, best_score)
+        
+        if instrumentation is not None:
+            instrumentation.record_move(accepted, temperature)
+            instrumentation.lap("acceptance")
+        if trace is not None and iteration % trace.progress_every == 0:
+            trace.progress(iteration, temperature, current_score, best_score)
         
         # Cool down the temperature
         temperature *= cooling_rate
         
         # Stop early if temperature gets too low
-        if temperature < 0.1:
+        if temperature < MIN_TEMPERATURE:
             break
         
-    return best_decrypted_text, best_score
+        # Grow the scoring window and rescore the current and best mappings on it
+        if window_length is not None:
+            next_length = progressive_window_length(len(full_text), min_window, iteration, max_iterations, initial_temperature, temperature)
+            if next_length >= WINDOW_GROWTH * window_length or next_length == len(full_text):
+                window_length = next_length
+                encrypted_text = full_text[:window_length]
+                scale = len(full_text) / window_length
+                if buffer is not None:
+                    buffer = DecryptionBuffer(encrypted_text, current_mapping)
+                current_score = scale * evaluate_decryption(buffer.data if buffer is not None else substitute_text(encrypted_text, current_mapping), digraph_weight, trigram_weight, quadgram_weight, pentagram_weight)
+                best_score = scale * evaluate_decryption(substitute_text(encrypted_text, best_mapping), digraph_weight, trigram_weight, quadgram_weight, pentagram_weight)
+                if current_score > best_score:
+                    best_mapping, best_score = current_mapping, current_score
+                if window_length == len(full_text):
+                    window_length = None
+    
+    # The final decision is taken on the full text
+    if window_length is not None:
+        candidates = [(evaluate_decryption(substitute_text(full_text, mapping), digraph_weight, trigram_weight, quadgram_weight, pentagram_weight), index, mapping)
+                      for index, mapping in enumerate((best_mapping, current_mapping))]
+        best_score, _, best_mapping = max(candidates, key=lambda candidate: (candidate[0], -candidate[1]))
+        if top_keys is not None:
+            for score, _, mapping in candidates:
+                top_keys.offer(score, mapping_key(mapping))
+    elif progressive:
+        # Scaled scores are floats even once the window is the full text; return the integer score of the full text
+        best_score = evaluate_decryption(substitute_text(full_text, best_mapping), digraph_weight, trigram_weight, quadgram_weight, pentagram_weight)
+    
+    if instrumentation is not None:
+        instrumentation.stop()
+    if trace is not None:
+        trace.finish(iteration, best_score)
+        
+    return best_mapping, best_score
+
+
+# Simulated Annealing with higher n-grams
+def simulated_annealing_with_ngrams(encrypted_text, initial_mapping, digraph_weight=2, trigram_weight=3, quadgram_weight=4, pentagram_weight=5, temperature=1000, cooling_rate=0.995, max_iterations=1000, **options):
+    """
+    Apply simulated annealing to decrypt text based on n-gram scores.
+    
+    Compatibility wrapper around simulated_annealing_key for callers that expect 
+    the decrypted text: the text of the best mapping is materialised once, at the end.
+    
+    Args:
+        encrypted_text (str): The encrypted text to decrypt.
+        initial_mapping (dict): The initial random mapping of letters.
+        digraph_weight (int): Weight for bigram matches.
+        trigram_weight (int): Weight for trigram matches.
+        quadgram_weight (int): Weight for quadgram matches.
+        pentagram_weight (int): Weight for pentagram matches.
+        temperature (float): Initial temperature for the annealing process.
+        cooling_rate (float): The rate at which the temperature decreases during annealing.
+        max_iterations (int): Maximum number of iterations to perform.
+        **options: rng, instrumentation, trace, min_window, score_cache and in_place 
+                   (see simulated_annealing_key).
+        
+    Returns:
+        tuple: A tuple containing the best decrypted text and the corresponding score.
+    """
+    best_mapping, best_score = simulated_annealing_key(
+        encrypted_text, initial_mapping, digraph_weight, trigram_weight, quadgram_weight, pentagram_weight, temperature, cooling_rate, max_iterations, **options
+    )
+    return substitute_text(encrypted_text, best_mapping), best_score
+
+
+# Hill-climbing polish of a mapping
+def hill_climbing_polish(encrypted_text, initial_mapping, digraph_weight=2, trigram_weight=3, quadgram_weight=4, pentagram_weight=5, max_rounds=10, instrumentation=None):
+    """
+    Polish a mapping by first-improvement hill climbing over all letter swaps.
+    
+    Each round tries every swap of two lowercase letters in turn and keeps a 
+    swap as soon as it improves the score. The search stops after a round without 
+    any improvement (a local optimum) or after 'max_rounds' rounds. This is meant 
+    for a mapping that is already close, e.g. the result of an annealing run on 
+    a smaller sample of the text.
+    
+    Args:
+        encrypted_text (str): The encrypted text to decrypt.
+        initial_mapping (dict): The mapping to start from.
+        digraph_weight (int): Weight for bigram matches.
+        trigram_weight (int): Weight for trigram matches.
+        quadgram_weight (int): Weight for quadgram matches.
+        pentagram_weight (int): Weight for pentagram matches.
+        max_rounds (int): Maximum number of rounds over all 325 swaps.
+        instrumentation (SearchInstrumentation): Optional counters for phase timings, 
+                                                 acceptance and best-score progress.
+    
+    Returns:
+        tuple: The polished mapping and its score.
+    """
+    buffer = DecryptionBuffer(encrypted_text, initial_mapping)
+    best_score = evaluate_decryption(buffer.data, digraph_weight, trigram_weight, quadgram_weight, pentagram_weight)
+    swaps = list(itertools.combinations(string.ascii_lowercase, 2))
+    
+    if instrumentation is not None:
+        instrumentation.start()
+        instrumentation.record_best(0, best_score)
+    
+    iteration = 0
+    for _ in range(max_rounds):
+        improved = False
+        for letter1, letter2 in swaps:
+            iteration += 1
+            if instrumentation is not None:
+                instrumentation.lap("move_generation")
+            
+            # Swap in place, and swap back if the score does not improve
+            buffer.swap(letter1, letter2)
+            if instrumentation is not None:
+                instrumentation.lap("substitution")
+            new_score = evaluate_decryption(buffer.data, digraph_weight, trigram_weight, quadgram_weight, pentagram_weight)
+            if instrumentation is not None:
+                instrumentation.lap("scoring")
+            
+            accepted = new_score > best_score
+            if accepted:
+                best_score = new_score
+                improved = True
+                if instrumentation is not None:
+                    instrumentation.record_best(iteration, best_score)
+            else:
+                buffer.swap(letter1, letter2)
+            if instrumentation is not None:
+                instrumentation.record_move(accepted)
+                instrumentation.lap("acceptance")
+        
+        if not improved:
+            break
+    
+    if instrumentation is not None:
+        instrumentation.stop()
+    
+    return buffer.mapping, best_score
+
+
+# Build a mapping from a key string
+def mapping_from_key(key):
+    """
+    Turn a 26-letter key into a substitution mapping.
+    
+    Args:
+        key (str): The plaintext letters of cipher letters 'a'..'z'; letters 
+                   given as '?' are filled with the plaintext letters left over.
+    
+    Returns:
+        dict: A mapping for both lowercase and uppercase letters.
+    """
+    unused = iter(sorted(set(string.ascii_lowercase) - set(key)))
+    plain_letters = [plain if plain in string.ascii_lowercase else next(unused) for plain in key]
+    mapping = dict(zip(string.ascii_lowercase, plain_letters))
+    mapping.update({cipher.upper(): plain.upper() for cipher, plain in zip(string.ascii_lowercase, plain_letters)})
+    return mapping
 
 
 # Initialize random substitution mapping
-def initialize_random_mapping():
+def initialize_random_mapping(rng=None):
     """
     Generate a random substitution mapping for the alphabet.
     
     This function generates a random mapping between each letter of the alphabet
     (both uppercase and lowercase) and randomly shuffled letters.
     
+    Args:
+        rng (numpy.random.Generator or int): Generator or seed used for the shuffle 
+                                             (fresh entropy if None).
+    
     Returns;
         dict: A dictionary mapping each letter to a random substitution.
     """
     letters = list(string.ascii_lowercase)
-    shuffled_letters = random.sample(letters, len(letters))
+    shuffled_letters = [letters[i] for i in np.random.default_rng(rng).permutation(26)]
     mapping = {letters[i]: shuffled_letters[i] for i in range(26)}
     mapping.update({letter.upper(): shuffled_letters[i].upper() for i, letter in enumerate(letters)})
     return mapping
 
 
+# Run every restart of a single grid cell
+def run_grid_cell(encrypted_text, combination, seed_sequence, instrumentation_prefix=None, cell_id=0, profile_prefix=None, max_iterations=1000, restarts=1, trace=None, profile_interval=0.005, min_window=None, score_cache=None, top_k=None, min_key_distance=3):
+    """
+    Run simulated annealing for one combination of hyperparameters.
+    
+    Each restart gets its own generator spawned from the cell's seed sequence, 
+    so a cell produces the same result whether it runs in the main process 
+    or in a worker process, and in whatever order the cells are scheduled.
+    
+    Args:
+        encrypted_text (str): The encrypted text to decrypt.
+        combination (tuple): (digraph_weight, trigram_weight, quadgram_weight, 
+                             pentagram_weight, temperature, cooling_rate).
+        seed_sequence (numpy.random.SeedSequence): The seed sequence of this cell.
+        instrumentation_prefix (str): If given, every restart is instrumented and its 
+                                      summary written to '<prefix>_restart_<n>.json'.
+        cell_id (int): Index of the cell in the grid, used to label trace events.
+        profile_prefix (str): If given, the annealing runs of this cell are profiled and 
+                              written to '<prefix>.pstats' and '<prefix>.collapsed.txt'.
+        max_iterations (int): Maximum number of annealing iterations per restart.
+        restarts (int): Number of independent annealing runs for this cell.
+        trace (SearchTrace or QueueEmitter): Optional event stream; every restart 
+                                             is traced as its own chain.
+        profile_interval (float): Seconds between stack samples when profiling.
+        min_window (int): If given, every restart scores on a progressive text window 
+                          starting at this many characters.
+        score_cache (ScoreCache): Optional memo of scores shared by the restarts (and by 
+                                  the other cells run in the same process).
+        top_k (int): If given, the cell also keeps its 'top_k' best distinct keys.
+        min_key_distance (int): Minimum Hamming distance between the kept keys.
+    
+    Returns:
+        tuple: The best mapping of the cell, its score, the cell's TopKeys (None 
+               without 'top_k') and the hits, misses and evictions of the score 
+               cache during the cell (None without 'score_cache').
+    """
+    best_mapping, best_score = None, -float('inf')
+    cache_counts = (score_cache.hits, score_cache.misses, score_cache.evictions) if score_cache is not None else None
+    cell_top_keys = TopKeys(top_k, min_key_distance) if top_k is not None else None
+    profiler = SolveProfiler(profile_prefix, profile_interval) if profile_prefix is not None else None
+    for restart, restart_seed in enumerate(seed_sequence.spawn(restarts)):
+        rng = np.random.default_rng(restart_seed)
+        initial_mapping = initialize_random_mapping(rng)
+        
+        instrumentation = None
+        if instrumentation_prefix is not None:
+            instrumentation = SearchInstrumentation({
+                "combination": list(combination),
+                "restart": restart,
+                "seed_entropy": str(seed_sequence.entropy),
+                "spawn_key": list(restart_seed.spawn_key),
+            })
+        
+        chain_trace = trace.chain(cell_id, restart) if trace is not None else None
+        with profiler.profile() if profiler is not None else contextlib.nullcontext():
+            mapping, score = simulated_annealing_key(
+                encrypted_text, initial_mapping, *combination, max_iterations, rng=rng, instrumentation=instrumentation, trace=chain_trace, min_window=min_window, score_cache=score_cache, top_keys=cell_top_keys
+            )
+        if instrumentation is not None:
+            instrumentation.write_json(f"{instrumentation_prefix}_restart_{restart}.json")
+        if score > best_score:
+            best_mapping, best_score = mapping, score
+    if profiler is not None:
+        profiler.write()
+    cache_stats = None
+    if score_cache is not None:
+        cache_stats = {"hits": score_cache.hits - cache_counts[0], "misses": score_cache.misses - cache_counts[1], "evictions": score_cache.evictions - cache_counts[2]}
+    return best_mapping, best_score, cell_top_keys, cache_stats
+
+
 # Grid search over hyperparameters
-def grid_search(encrypted_text, filename, digraph_weights, trigram_weights, quadgram_weights, pentagram_weights, temperatures, cooling_rates, max_iterations=1000):
+def grid_search(encrypted_text, filename, digraph_weights, trigram_weights, quadgram_weights, pentagram_weights, temperatures, cooling_rates, max_iterations=1000, seed=None, restarts=1, processes=None, instrumentation_directory=None, trace=None, profile_prefix=None, profile_fraction=1.0, profile_interval=0.005, view=None, min_window=None, score_cache_size=None, top_k=5, min_key_distance=3, checkpoint=None, decrypt_to=None):
     """
     Perform a grid search over hyperparameters to optimize decryption.
     
@@ -186,9 +594,13 @@ def grid_search(encrypted_text, filename, digraph_weights, trigram_weights, quad
     temperature, and cooling rates) to find the best decryption for the given encrypted text.
     It runs simulated annealing for each combination and logs the best results to the specified file.
     
+    One master seed drives the whole search: every grid cell gets its own independent 
+    stream spawned from it (and every restart one spawned from the cell's), so the 
+    per-cell results are identical for serial and parallel runs with the same seed.
+    
     Args:
         encrypted_text (str): The encrypted text that needs to be decrypted.
-        filename (str): The name of the file to save the best decryption results.
+        filename (str): The file the encrypted text was read from (the input of 'decrypt_to').
         digram_weights (list): A list of different weights to try for bigram (digraph) scoring.
         trigram_weights (list): A list of different weights to try for trigram scoring.
         quadgram_weights (list): A list of different weights to try for quadgram scoring.
@@ -196,37 +608,124 @@ def grid_search(encrypted_text, filename, digraph_weights, trigram_weights, quad
         temperatures (list): A list of initial temperatures to try for simulated annealing.
         cooling_rates (list): A list of cooling rates to test in the annealing process.
         max_iterations (int): The maximum number of interations to perform for each grid search step.
+        seed (int): Master seed of the run (fresh entropy if None, printed for reproduction).
+        restarts (int): Number of independent annealing runs per grid cell.
+        processes (int): Number of worker processes (runs in this process if None or 1).
+        instrumentation_directory (str): If given, every annealing run is instrumented and 
+                                         a JSON summary per cell and restart written here.
+        trace (SearchTrace): Optional structured event stream; replaces the per-cell 
+                             console output with run, cell and chain events.
+        profile_prefix (str): If given, the solving phase of the profiled cells is written 
+                              to '<prefix>.pstats' and '<prefix>.collapsed.txt'.
+        profile_fraction (float): Share of grid cells to profile, above 0 and at most 1, spread evenly over the grid.
+        profile_interval (float): Seconds between stack samples when profiling.
+        view (CiphertextView): If 'encrypted_text' is the compact text of this view, the 
+                               best decryption is rebuilt in the original layout for output.
+        min_window (int): If given, annealing scores on a progressive text window starting 
+                          at this many characters (coarse-to-fine scoring).
+        score_cache_size (int): If given, scores are memoised in an LRU cache of this many 
+                                keys, shared by all cells (per worker process when 
+                                running in parallel).
+        top_k (int): Number of best distinct keys kept over the whole search (at least 1), 
+                     listed in the results file and the checkpoint.
+        min_key_distance (int): Minimum Hamming distance between the kept keys, so 
+                                near-duplicates of the best key do not crowd the list.
+        checkpoint (str): If given, a JSON checkpoint with the progress and the top keys 
+                          is rewritten here after every cell.
+        decrypt_to (str): If given, the file 'filename' is decrypted with the best key 
+                          and streamed to this file.
     
     Returns:
         None: The best results (decrypted text and score) are written to the specified file.
     """
     best_combination = None
     best_score = -float('inf')
-    best_decrypted_text = None
+    best_mapping = None
+    top_keys = TopKeys(top_k, min_key_distance)
+    cache_totals = {"hits": 0, "misses": 0, "evictions": 0}
+    started = time.perf_counter()
+    
+    # Spawn one independent seed sequence per grid cell from the master seed
+    master_seed = np.random.SeedSequence(seed)
+    print(f"Master Seed: {master_seed.entropy}")
+    combinations = list(itertools.product(digraph_weights, trigram_weights, quadgram_weights, pentagram_weights, temperatures, cooling_rates))
+    cell_seeds = master_seed.spawn(len(combinations))
+    instrumentation_prefixes = [None] * len(combinations)
+    if instrumentation_directory is not None:
+        os.makedirs(instrumentation_directory, exist_ok=True)
+        instrumentation_prefixes = [os.path.join(instrumentation_directory, f"cell_{index:04d}") for index in range(len(combinations))]
+    profile_prefixes = [None] * len(combinations)
+    if profile_prefix is not None:
+        for index in profiled_cells(len(combinations), profile_fraction):
+            profile_prefixes[index] = f"{profile_prefix}.cell{index:04d}"
+    score_cache = None
+    if score_cache_size is not None:
+        score_cache = ScoreCache(score_cache_size, name=f"grid-{master_seed.entropy}-{os.getpid()}")
+    if trace is not None:
+        trace.emit("run_start", cells=len(combinations), seed_entropy=str(master_seed.entropy), max_iterations=max_iterations, restarts=restarts, processes=processes)
     
     # Try every combination of hyperparameters
-    for digraph_weight in digraph_weights:
-        for trigram_weight in trigram_weights:
-            for quadgram_weight in quadgram_weights:
-                for pentagram_weight in pentagram_weights:
-                    for temperature in temperatures:
-                        for cooling_rate in cooling_rates:
-                            print(f"Testing: Digraph Weight={digraph_weight}, Trigram Weight={trigram_weight}, Quadgram Weight={quadgram_weight}, Pentagram Weight={pentagram_weight}, Temp={temperature}, Cooling Rate={cooling_rate}")
-                            
-                            # Initialize a random substitution mapping
-                            initial_mapping = initialize_random_mapping()
-                            
-                            # Decrypt using simulated annealing
-                            decrypted_text, score = simulated_annealing_with_ngrams(
-                                encrypted_text, initial_mapping, digraph_weight, trigram_weight, quadgram_weight, pentagram_weight, temperature, cooling_rate, max_iterations
-                            )
-                            
-                            # Update best score if this is better
-                            if score > best_score:
-                                best_score = score
-                                best_combination = (digraph_weight, trigram_weight, quadgram_weight, pentagram_weight, temperature, cooling_rate)
-                                best_decrypted_text = decrypted_text
-                                print(f"New Best Score: {best_score} with {best_combination}")
+    with contextlib.ExitStack() as stack:
+        if processes is not None and processes > 1:
+            # Worker processes send their trace events back through a queue
+            cell_trace = None
+            if trace is not None:
+                queue = stack.enter_context(multiprocessing.Manager()).Queue()
+                forwarder = trace.forward_from(queue)
+                stack.callback(forwarder.join)
+                stack.callback(queue.put, None)
+                cell_trace = trace.queue_emitter(queue)
+            run_cell = functools.partial(run_grid_cell, encrypted_text, max_iterations=max_iterations, restarts=restarts, trace=cell_trace, profile_interval=profile_interval, min_window=min_window, score_cache=score_cache, top_k=top_k, min_key_distance=min_key_distance)
+            executor = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=processes))
+            results = executor.map(run_cell, combinations, cell_seeds, instrumentation_prefixes, range(len(combinations)), profile_prefixes)
+        else:
+            run_cell = functools.partial(run_grid_cell, encrypted_text, max_iterations=max_iterations, restarts=restarts, trace=trace, profile_interval=profile_interval, min_window=min_window, score_cache=score_cache, top_k=top_k, min_key_distance=min_key_distance)
+            results = map(run_cell, combinations, cell_seeds, instrumentation_prefixes, range(len(combinations)), profile_prefixes)
+        
+        for cell_id, (combination, (mapping, score, cell_top_keys, cache_stats)) in enumerate(zip(combinations, results)):
+            digraph_weight, trigram_weight, quadgram_weight, pentagram_weight, temperature, cooling_rate = combination
+            if trace is None:
+                print(f"Testing: Digraph Weight={digraph_weight}, Trigram Weight={trigram_weight}, Quadgram Weight={quadgram_weight}, Pentagram Weight={pentagram_weight}, Temp={temperature}, Cooling Rate={cooling_rate}")
+            else:
+                trace.emit("cell_end", cell_id=cell_id, combination=list(combination), best_score=score)
+            
+            # Update best score if this is better
+            if score > best_score:
+                best_score = score
+                best_combination = combination
+                best_mapping = mapping
+                if trace is None:
+                    print(f"New Best Score: {best_score} with {best_combination}")
+            
+            top_keys.merge(cell_top_keys)
+            if cache_stats is not None:
+                for name, count in cache_stats.items():
+                    cache_totals[name] += count
+            if checkpoint is not None:
+                write_checkpoint(checkpoint, top_keys, seed_entropy=str(master_seed.entropy), cells=len(combinations), completed_cells=cell_id + 1,
+                                 best_score=best_score, best_combination=list(best_combination))
+    
+    if profile_prefix is not None:
+        profile_paths = merge_profiles([prefix for prefix in profile_prefixes if prefix is not None], profile_prefix)
+        if profile_paths is not None:
+            print(f"Profile of {sum(prefix is not None for prefix in profile_prefixes)} cells written to {profile_paths[0]} and {profile_paths[1]}")
+    if score_cache is not None:
+        # Summed over the cells, so runs on worker processes (one cache each) are reported as well
+        release_score_cache(score_cache.name)
+        lookups = cache_totals["hits"] + cache_totals["misses"]
+        hit_rate = cache_totals["hits"] / lookups if lookups else 0.0
+        print(f"Score Cache: {cache_totals['hits']} hits, {cache_totals['misses']} misses ({hit_rate:.1%}), {cache_totals['evictions']} evictions")
+    if trace is not None:
+        trace.emit("run_end", best_score=best_score, best_combination=list(best_combination), top_keys=top_keys.to_list(), elapsed=time.perf_counter() - started)
+        trace.flush()
+    
+    # Only the cells' mappings were kept; the text is decrypted as far as it is needed
+    best_decrypted_text = LazyDecryption(encrypted_text, best_mapping)
+    best_key = best_decrypted_text.key()
+    
+    # Rebuild the original layout when the search ran on the letter-only view
+    if view is not None:
+        best_decrypted_text = view.restore(str(best_decrypted_text))
     
     # Output the final decrypted text
     print("\nBest Decrypted Text (First 500 Characters):\n")
@@ -238,12 +737,21 @@ def grid_search(encrypted_text, filename, digraph_weights, trigram_weights, quad
     with open('decryption_results_simulated_annealing_higher_ngrams_integrated.txt', 'w') as result_file:
         result_file.write(f"Best Decrypted Text:\n\n{best_decrypted_text[:100000]}")  # Save the first 100000 characters of decrypted text
         result_file.write(f"\n\nBest Hyperparameters:\nDigraph Weight={best_combination[0]}, Trigram Weight={best_combination[1]}, Quadgram Weight={best_combination[2]}, Pentagram Weight={best_combination[3]}, Temp={best_combination[4]}, Cooling Rate={best_combination[5]}")
+        result_file.write(f"\nBest Key (plaintext of a..z): {best_key}\n")
+        result_file.write(f"\nTop {len(top_keys)} Keys (at least {min_key_distance} letters apart):\n")
+        for rank, (score, key) in enumerate(top_keys.items(), 1):
+            result_file.write(f"{rank}. Score={score}, Key={key}\n")
     
-    return best_decrypted_text
+    # Stream the full decryption of the file with the best mapping itself, not a key read back from the text
+    if decrypt_to is not None:
+        stream_decrypt(filename, decrypt_to, mapping_key(best_mapping))
+        print(f"\nFull decryption written to {decrypt_to}")
+    
+    return str(best_decrypted_text)
 
 
 # Main function to run grid search and break the cipher
-def break_cipher_with_grid_search(filename):
+def break_cipher_with_grid_search(filename, seed=None, processes=None, instrumentation_directory=None, trace=None, profile_prefix=None, profile_fraction=1.0, profile_interval=0.005, letters_only=False, decrypt_to=None, min_window=None, score_cache_size=None, top_k=5, min_key_distance=3, checkpoint=None):
     """
     Break the cipher by running a grid search over decryption parameters.
     
@@ -253,12 +761,34 @@ def break_cipher_with_grid_search(filename):
     
     Args:
         filename (str); The name of the file containing the encrypted text to be decrypted.
+        seed (int): Master seed for the whole run (fresh entropy if None).
+        processes (int): Number of worker processes for the grid cells.
+        instrumentation_directory (str): Directory for per-run instrumentation summaries.
+        trace (SearchTrace): Optional structured event stream of the search.
+        profile_prefix (str): Path prefix for profiling the solving phase (not profiled if None).
+        profile_fraction (float): Share of grid cells to profile, above 0 and at most 1.
+        profile_interval (float): Seconds between stack samples when profiling.
+        letters_only (bool): Memory-map the file and search on its compact letter-only 
+                             view; the output is rebuilt in the original layout.
+        decrypt_to (str): If given, the whole file is decrypted with the best key and 
+                          streamed to this file (the results file only holds a prefix).
+        min_window (int): If given, annealing scores on a progressive text window starting 
+                          at this many characters.
+        score_cache_size (int): If given, size of the LRU score cache shared by the cells.
+        top_k (int): Number of best distinct keys to keep and report.
+        min_key_distance (int): Minimum Hamming distance between the kept keys.
+        checkpoint (str): JSON file rewritten with the progress and top keys after every cell.
         
     Returns:
         str: The best decrypted text found during the grid search.
     """
     # Load the encrypted text
-    encrypted_text = load_encrypted_book(filename)
+    view = None
+    if letters_only:
+        view = CiphertextView.from_file(filename)
+        encrypted_text = view.compact_text()
+    else:
+        encrypted_text = load_encrypted_book(filename)
     
     # Define parameter ranges for grid search
     digraph_weights = [1, 2, 3]
@@ -269,9 +799,45 @@ def break_cipher_with_grid_search(filename):
     cooling_rates = [0.99, 0.995, 0.999]
     
     # Run grid search
-    best_decrypted_text = grid_search(encrypted_text, filename, digraph_weights, trigram_weights, quadgram_weights, pentagram_weights, temperatures, cooling_rates)
+    best_decrypted_text = grid_search(encrypted_text, filename, digraph_weights, trigram_weights, quadgram_weights, pentagram_weights, temperatures, cooling_rates, seed=seed, processes=processes, instrumentation_directory=instrumentation_directory, trace=trace, profile_prefix=profile_prefix, profile_fraction=profile_fraction, profile_interval=profile_interval, view=view, min_window=min_window, score_cache_size=score_cache_size, top_k=top_k, min_key_distance=min_key_distance, checkpoint=checkpoint, decrypt_to=decrypt_to)
+    
+    if view is not None:
+        view.close()
     
     return best_decrypted_text
 
+
 # Run the cipher breaker with grid search
-break_cipher_with_grid_search("encrypted_book.txt")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Break the substitution cipher with a grid search over annealing hyperparameters.")
+    parser.add_argument("filename", nargs="?", default="encrypted_book.txt", help="file containing the encrypted text")
+    parser.add_argument("--seed", type=int, default=None, help="master seed of the run (printed when omitted)")
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes for the grid cells")
+    parser.add_argument("--instrument", metavar="DIRECTORY", default=None, help="write a JSON instrumentation summary per annealing run")
+    parser.add_argument("--trace", metavar="FILE", default=None, help="write a JSONL event trace of the search ('-' for stdout)")
+    parser.add_argument("--trace-min-interval", type=float, default=0.5, help="minimum seconds between progress events of a chain")
+    parser.add_argument("--profile", metavar="PREFIX", default=None, help="profile the solving phase into PREFIX.pstats and PREFIX.collapsed.txt")
+    parser.add_argument("--profile-fraction", type=float, default=1.0, help="share of grid cells to profile")
+    parser.add_argument("--letters-only", action="store_true", help="search on a memory-mapped, letter-only view of the text")
+    parser.add_argument("--decrypt-to", metavar="FILE", default=None, help="stream the full decryption with the best key to FILE")
+    parser.add_argument("--min-window", type=int, default=None, help="score on a text window growing from this many characters to the full text as the annealing cools")
+    parser.add_argument("--score-cache", metavar="ENTRIES", type=int, default=None, help="memoise scores of up to ENTRIES keys, shared by the grid cells")
+    parser.add_argument("--top-k", type=int, default=5, help="number of best distinct keys to keep and report")
+    parser.add_argument("--min-key-distance", type=int, default=3, help="minimum number of letters in which two kept keys differ")
+    parser.add_argument("--checkpoint", metavar="FILE", default=None, help="rewrite a JSON checkpoint with the progress and top keys after every cell")
+    args = parser.parse_args()
+    if args.min_window is not None and args.min_window <= 0:
+        parser.error("--min-window must be a positive number of characters")
+    if args.top_k < 1:
+        parser.error("--top-k must keep at least one key")
+    if not 0 < args.profile_fraction <= 1:
+        parser.error("--profile-fraction must be above 0 and at most 1")
+    
+    with contextlib.ExitStack() as stack:
+        trace = None
+        if args.trace is not None:
+            trace = stack.enter_context(SearchTrace(args.trace, min_interval=args.trace_min_interval))
+        break_cipher_with_grid_search(args.filename, seed=args.seed, processes=args.processes, instrumentation_directory=args.instrument, trace=trace,
+                                      profile_prefix=args.profile, profile_fraction=args.profile_fraction, letters_only=args.letters_only, decrypt_to=args.decrypt_to, min_window=args.min_window, score_cache_size=args.score_cache,
+                                      top_k=args.top_k, min_key_distance=args.min_key_distance, checkpoint=args.checkpoint)
+
@@ -0,0 +1,241 @@
+import argparse
+import codecs
+import os
+import string
+import time
+
+import numpy as np
+
+from final_attempt_best_results import NGRAM_TABLES
+from letter_tables import ENGLISH_FREQUENCY_ORDER, LETTER_PAIRS
+from ngram_counts import pack_ngrams
+
+# Longest n-gram scored by evaluate_decryption
+MAX_ORDER = 5
+
+# Rounds of the polish after an update (it stops earlier at a local optimum)
+DEFAULT_MAX_ROUNDS = 1000
+
+
+# Integer-code the lowercase ASCII letters of a text
+def lowercase_codes(text):
+    """
+    Encode the lowercase ASCII letters of a text as 0-25 and everything else as -1.
+    
+    evaluate_decryption only counts lowercase n-grams, and a key keeps the case
+    of every letter, so uppercase cipher letters break n-grams like any other
+    character.
+    """
+    points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    lowercase = (points >= ord("a")) & (points <= ord("z"))
+    return np.where(lowercase, points.astype(np.int64) - ord("a"), -1)
+
+
+# Plaintext codes and weights of the n-gram lists of evaluate_decryption
+def score_tables(digraph_weight=2, trigram_weight=3, quadgram_weight=4, pentagram_weight=5, penalty_weight=1):
+    """
+    Turn the n-gram lists of evaluate_decryption into code arrays.
+    
+    Returns:
+        list: (codes, weight) per list, 'codes' of shape (n-grams, n); n-grams
+              listed twice keep both rows, and the unlikely pairs weigh -penalty.
+    """
+    weights = (digraph_weight, trigram_weight, quadgram_weight, pentagram_weight, -penalty_weight)
+    return [
+        (np.array([[ord(letter) - ord("a") for letter in ngram] for ngram in ngrams], dtype=np.intp), weight)
+        for ngrams, weight in zip(NGRAM_TABLES, weights)
+    ]
+
+
+# Solver state of a ciphertext that keeps growing
+class IncrementalSolver:
+    """
+    Key and n-gram counts of a growing ciphertext, updated at the cost of the appended text.
+    
+    evaluate_decryption counts fixed lists of lowercase n-grams in the
+    decryption. A key sends every cipher n-gram to exactly one plaintext
+    n-gram, so the count of a plaintext n-gram is the count of the cipher
+    n-gram the key maps onto it: the score of any key follows from the n-gram
+    counts of the ciphertext alone. The solver keeps dense counts of the
+    lowercase cipher 1- to 5-grams and the last four characters of the text.
+    Appending text counts only the n-grams that end in it (including those
+    that start in the kept tail), and scoring a key gathers about fifty
+    counts, so neither depends on the length of the text seen so far.
+    
+    The counts include overlapping occurrences, while evaluate_decryption
+    uses str.count, which does not: in 'erere' the counts find 'ere' twice,
+    str.count once, and in 'zzz' they find 'zz' twice. The score is therefore
+    evaluate_decryption with overlaps counted (as in batch_solver.window_table);
+    the two differ by the overlapping occurrences of the listed n-grams.
+    
+    Attributes:
+        key (str): The current key (plaintext of cipher letters 'a'..'z'), None before the first update.
+        characters (int): Characters counted so far.
+        offset (int): Bytes of the source file counted so far (see update_from_file).
+        counts (dict): Order n -> dense numpy.ndarray of 26**n int32 counts.
+    """
+    
+    def __init__(self, key=None, digraph_weight=2, trigram_weight=3, quadgram_weight=4, pentagram_weight=5, penalty_weight=1):
+        self.key = key
+        self.weights = (digraph_weight, trigram_weight, quadgram_weight, pentagram_weight, penalty_weight)
+        self.characters = 0
+        self.offset = 0
+        self.tail = ""
+        self.counts = {n: np.zeros(26 ** n, dtype=np.int32) for n in range(1, MAX_ORDER + 1)}
+        self._tables = score_tables(*self.weights)
+    
+    def append(self, text):
+        """Count the n-grams of the text that end in the appended characters."""
+        codes = lowercase_codes(self.tail + text)
+        for n in range(1, MAX_ORDER + 1):
+            packed, starts = pack_ngrams(codes, n, 26)
+            np.add.at(self.counts[n], packed[starts + n > len(self.tail)], 1)
+        self.tail = (self.tail + text)[-(MAX_ORDER - 1):]
+        self.characters += len(text)
+    
+    def score(self, key=None):
+        """Score of a key (the current one by default) on all the text counted so far, counting overlaps."""
+        key_codes = np.array([ord(letter) - ord("a") for letter in key or self.key])
+        return int(self._scores(np.argsort(key_codes)[None, :])[0])
+    
+    def frequency_key(self):
+        """Key that maps the cipher letters, most frequent first, to the letters of English by frequency."""
+        key = [""] * 26
+        for cipher, plain in zip(np.argsort(-self.counts[1], kind="stable").tolist(), ENGLISH_FREQUENCY_ORDER):
+            key[cipher] = plain
+        return "".join(key)
+    
+    def polish(self, max_rounds=DEFAULT_MAX_ROUNDS):
+        """
+        Steepest-ascent hill climbing of the current key on the counts.
+        
+        Every round scores all 325 swaps of two cipher letters at once and
+        applies the best one, until no swap improves the score or after
+        'max_rounds' rounds.
+        
+        Returns:
+            tuple: The polished key and its score.
+        """
+        key = np.array([ord(letter) - ord("a") for letter in self.key])
+        best_score = self.score()
+        first, second = LETTER_PAIRS[:, 0], LETTER_PAIRS[:, 1]
+        rows = np.arange(len(LETTER_PAIRS))
+        for _ in range(max_rounds):
+            # The cipher letter of every plaintext letter, with one swap per row
+            inverse_keys = np.tile(np.argsort(key), (len(LETTER_PAIRS), 1))
+            inverse_keys[rows, key[first]] = second
+            inverse_keys[rows, key[second]] = first
+            scores = self._scores(inverse_keys)
+            best = int(np.argmax(scores))
+            if scores[best] <= best_score:
+                break
+            best_score = int(scores[best])
+            key[[first[best], second[best]]] = key[[second[best], first[best]]]
+        self.key = "".join(string.ascii_lowercase[code] for code in key.tolist())
+        return self.key, best_score
+    
+    def update(self, text, max_rounds=DEFAULT_MAX_ROUNDS):
+        """
+        Count appended text and polish the key from where it was.
+        
+        The first update starts from the key given to the constructor, or from
+        the frequency key if there is none.
+        
+        Returns:
+            dict: Characters 'appended' and counted in total, the 'previous_key',
+                  the new 'key' and its 'score', the cipher letters whose
+                  plaintext 'changed' (None on the first update) and the 'seconds' taken.
+        """
+        started = time.perf_counter()
+        self.append(text)
+        previous_key = self.key
+        if self.key is None:
+            self.key = self.frequency_key()
+        key, score = self.polish(max_rounds)
+        changed = None
+        if previous_key is not None:
+            changed = "".join(cipher for cipher, old, new in zip(string.ascii_lowercase, previous_key, key) if old != new)
+        return {"appended": len(text), "characters": self.characters, "previous_key": previous_key, "key": key, "score": score,
+                "changed": changed, "seconds": time.perf_counter() - started}
+    
+    def update_from_file(self, filename, max_rounds=DEFAULT_MAX_ROUNDS):
+        """
+        Count the bytes appended to a file since the last update, then polish (see update).
+        
+        Only the part of the file after 'offset' is read; a UTF-8 character cut
+        off at the end of the file is left for the next update. Raises
+        ValueError if the file no longer ends its counted part with the kept tail
+        (it was replaced or truncated).
+        """
+        tail = self.tail.encode("utf-8")
+        with open(filename, "rb") as file:
+            file.seek(self.offset - len(tail))
+            if file.read(len(tail)) != tail:
+                raise ValueError(f"{filename} does not continue the text counted so far")
+            data = file.read()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        text = decoder.decode(data)
+        self.offset += len(data) - len(decoder.getstate()[0])
+        return self.update(text, max_rounds)
+    
+    def save(self, filename):
+        """Write the state to an .npz file (counts stored sparse), replacing it atomically."""
+        arrays = {}
+        for n, order_counts in self.counts.items():
+            arrays[f"index{n}"] = np.flatnonzero(order_counts)
+            arrays[f"counts{n}"] = order_counts[arrays[f"index{n}"]]
+        temporary = f"{filename}.tmp"
+        with open(temporary, "wb") as state_file:
+            np.savez(state_file, key=self.key or "", weights=np.array(self.weights), characters=self.characters,
+                     offset=self.offset, tail=self.tail, **arrays)
+        os.replace(temporary, filename)
+    
+    @classmethod
+    def load(cls, filename):
+        """Read a state written by save."""
+        with np.load(filename) as state:
+            solver = cls(str(state["key"]) or None, *state["weights"].tolist())
+            solver.characters = int(state["characters"])
+            solver.offset = int(state["offset"])
+            solver.tail = str(state["tail"])
+            for n in solver.counts:
+                solver.counts[n][state[f"index{n}"]] = state[f"counts{n}"]
+        return solver
+    
+    def _scores(self, inverse_keys):
+        """Scores of keys given as the cipher code of every plaintext code, shape (keys, 26)."""
+        scores = np.zeros(len(inverse_keys), dtype=np.int64)
+        for plain, weight in self._tables:
+            cipher = inverse_keys[:, plain]
+            packed = cipher[..., 0]
+            for position in range(1, plain.shape[1]):
+                packed = packed * 26 + cipher[..., position]
+            scores = scores + weight * self.counts[plain.shape[1]][packed].sum(axis=1, dtype=np.int64)
+        return scores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-solve a growing ciphertext file from the counts of the text seen before.")
+    parser.add_argument("filename", help="file containing the encrypted text, appended to over time")
+    parser.add_argument("--state", required=True, help="state file (.npz) kept between runs; created on the first run")
+    parser.add_argument("--key", default=None, help="key to start from on the first run (default: letter frequencies)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_MAX_ROUNDS, help="maximum rounds of the polish")
+    args = parser.parse_args()
+    if args.key is not None and sorted(args.key) != list(string.ascii_lowercase):
+        parser.error("--key must be a permutation of the 26 letters a-z")
+    
+    solver = IncrementalSolver.load(args.state) if os.path.exists(args.state) else IncrementalSolver(args.key)
+    try:
+        report = solver.update_from_file(args.filename, args.rounds)
+    except ValueError as error:
+        parser.error(f"{error}; start a new --state file to count it from the beginning")
+    solver.save(args.state)
+    
+    if report["changed"] is None:
+        change = "Initial key"
+    elif report["changed"]:
+        change = f"Key changed ({len(report['changed'])} letters: {report['changed']})"
+    else:
+        change = "Key unchanged"
+    print(f"Counted {report['appended']} new characters ({report['characters']} in total) in {report['seconds']:.3f} s")
+    print(f"{change}, Score: {report['score']}, Key: {report['key']}")
@@ -0,0 +1,181 @@
+import argparse
+import hashlib
+import json
+import os
+import string
+import time
+
+import numpy as np
+
+from decryption_buffer import LazyDecryption
+from final_attempt_best_results import evaluate_decryption
+
+# Characters of a text scored to verify a key (a prefix is enough to tell a right key from a wrong one)
+VERIFY_CHARACTERS = 50000
+
+# Minimum cosine similarities of the letter and bigram signatures for a near match
+MIN_LETTER_SIMILARITY = 0.95
+MIN_BIGRAM_SIMILARITY = 0.8
+
+# Share of the stored score rate a key must reach on a new text to be trusted
+MIN_SCORE_RATIO = 0.8
+
+
+# Content hash and frequency signature of a ciphertext
+def fingerprint(encrypted_text):
+    """
+    Fingerprint a ciphertext by its content and its letter statistics.
+    
+    The SHA-256 of the text identifies exact repeats. The signature, the
+    normalised counts of the 26 cipher letters and of the 676 cipher bigrams
+    (both cases folded), finds texts under the same key: a substitution only
+    relabels the statistics of the language, so two texts under one key have
+    nearly parallel signature vectors, while the same statistics relabelled by
+    another key point elsewhere (the bigram vector separates them clearly).
+    
+    Returns:
+        dict: 'sha256', the number of 'letters', and the unit 'letter_signature'
+              and 'bigram_signature' vectors as lists.
+    """
+    codes = np.frombuffer(encrypted_text.lower().encode("ascii", errors="replace"), dtype=np.uint8).astype(np.int64) - ord("a")
+    letters = (codes >= 0) & (codes < 26)
+    letter_counts = np.bincount(codes[letters], minlength=26).astype(float)
+    pairs = letters[:-1] & letters[1:]
+    bigram_counts = np.bincount((codes[:-1] * 26 + codes[1:])[pairs], minlength=26 * 26).astype(float)
+    return {
+        "sha256": hashlib.sha256(encrypted_text.encode("utf-8")).hexdigest(),
+        "letters": int(letters.sum()),
+        "letter_signature": _unit(letter_counts).round(6).tolist(),
+        "bigram_signature": _unit(bigram_counts).round(6).tolist(),
+    }
+
+
+# Vector scaled to length one (zero stays zero)
+def _unit(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# Similarity of two fingerprints
+def signature_similarity(fingerprint1, fingerprint2):
+    """Cosine similarities of the letter and of the bigram signatures of two fingerprints."""
+    return (
+        float(np.dot(fingerprint1["letter_signature"], fingerprint2["letter_signature"])),
+        float(np.dot(fingerprint1["bigram_signature"], fingerprint2["bigram_signature"])),
+    )
+
+
+# Score of a key on a text, per 1000 letters
+def score_rate(encrypted_text, key):
+    """
+    Score a key on (a prefix of) a ciphertext, normalised by its number of letters.
+    
+    Rates of the same key on different texts of the same language are comparable,
+    which is what lets a key stored for one text be checked on another.
+    """
+    mapping = dict(zip(string.ascii_lowercase, key))
+    mapping.update({cipher.upper(): plain.upper() for cipher, plain in mapping.items()})
+    prefix = LazyDecryption(encrypted_text, mapping)[:VERIFY_CHARACTERS]
+    letters = sum(character.isalpha() for character in prefix)
+    return 1000 * evaluate_decryption(prefix) / max(letters, 1)
+
+
+# Persistent cache of solved keys
+class KeyCache:
+    """
+    Size-bounded, persistent cache of the keys of solved ciphertexts.
+    
+    Entries are looked up by fingerprint: an exact repeat of a ciphertext (same
+    content hash) returns its stored key, a near match (letter and bigram
+    signatures close enough, e.g. a new chapter of a book already broken)
+    returns the key of the most similar entry as a starting point for the
+    optimiser. No cached key is trusted on its fingerprint alone: its score
+    rate on the new text is computed and must match the stored rate (exact
+    repeats) or reach MIN_SCORE_RATIO of it (near matches); entries whose key
+    fails on their own text are dropped. The least recently used entries are
+    evicted beyond 'max_entries'. The file is replaced atomically whenever an
+    entry is stored or dropped; lookups only mark entries as used in memory,
+    which is saved with the next write.
+    
+    Attributes:
+        filename (str): JSON file holding the cache.
+        max_entries (int): Maximum number of entries kept.
+    """
+    
+    def __init__(self, filename, max_entries=256):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.entries = []
+        if os.path.exists(filename):
+            with open(filename) as cache_file:
+                self.entries = json.load(cache_file)["entries"]
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def lookup(self, encrypted_text, text_fingerprint=None):
+        """
+        Find a verified key for a ciphertext.
+        
+        Args:
+            encrypted_text (str): The ciphertext.
+            text_fingerprint (dict): Its fingerprint, if already computed.
+        
+        Returns:
+            tuple: ('exact' or 'near', key, similarity) for a verified hit, or None.
+        """
+        text_fingerprint = text_fingerprint or fingerprint(encrypted_text)
+        for entry in self.entries:
+            if entry["fingerprint"]["sha256"] == text_fingerprint["sha256"]:
+                if abs(score_rate(encrypted_text, entry["key"]) - entry["score_rate"]) > 1e-9:
+                    # The stored key does not reproduce its own score: never trust it again
+                    self.entries.remove(entry)
+                    self._write()
+                    return None
+                self._touch(entry)
+                return "exact", entry["key"], 1.0
+        
+        candidates = []
+        for entry in self.entries:
+            letter_similarity, bigram_similarity = signature_similarity(text_fingerprint, entry["fingerprint"])
+            if letter_similarity >= MIN_LETTER_SIMILARITY and bigram_similarity >= MIN_BIGRAM_SIMILARITY:
+                candidates.append((bigram_similarity, entry))
+        for similarity, entry in sorted(candidates, key=lambda candidate: -candidate[0]):
+            if score_rate(encrypted_text, entry["key"]) >= MIN_SCORE_RATIO * entry["score_rate"]:
+                self._touch(entry)
+                return "near", entry["key"], similarity
+        return None
+    
+    def store(self, encrypted_text, key, text_fingerprint=None):
+        """Store (or replace) the key of a ciphertext, evicting the least recently used entries if full."""
+        text_fingerprint = text_fingerprint or fingerprint(encrypted_text)
+        self.entries = [entry for entry in self.entries if entry["fingerprint"]["sha256"] != text_fingerprint["sha256"]]
+        self.entries.append({"fingerprint": text_fingerprint, "key": key, "score_rate": score_rate(encrypted_text, key), "last_used": time.time()})
+        self.entries.sort(key=lambda entry: entry["last_used"])
+        del self.entries[:max(len(self.entries) - self.max_entries, 0)]
+        self._write()
+    
+    def _touch(self, entry):
+        entry["last_used"] = time.time()
+    
+    def _write(self):
+        temporary = f"{self.filename}.tmp"
+        with open(temporary, "w") as cache_file:
+            json.dump({"entries": self.entries}, cache_file)
+        os.replace(temporary, self.filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up ciphertexts in a key cache, or list its entries.")
+    parser.add_argument("cache", help="JSON key cache file")
+    parser.add_argument("filenames", nargs="*", help="files containing encrypted texts to look up")
+    args = parser.parse_args()
+    
+    cache = KeyCache(args.cache)
+    if not args.filenames:
+        for entry in sorted(cache.entries, key=lambda entry: -entry["last_used"]):
+            print(f"{entry['fingerprint']['sha256'][:12]} {entry['fingerprint']['letters']:>9} letters  Rate: {entry['score_rate']:.1f}  Key: {entry['key']}")
+    for filename in args.filenames:
+        with open(filename, "r") as file:
+            hit = cache.lookup(file.read())
+        print(f"{filename}: " + ("no verified key" if hit is None else f"{hit[0]} match (similarity {hit[2]:.3f}), Key: {hit[1]}"))
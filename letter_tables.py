@@ -0,0 +1,9 @@
+import itertools
+
+import numpy as np
+
+# Letters of English from most to least frequent, for keys that start from letter frequencies
+ENGLISH_FREQUENCY_ORDER = "etaoinshrdlcumwfgypbvkjxqz"
+
+# All unordered pairs of cipher letters as codes 0-25, the swap moves of the hill climbing
+LETTER_PAIRS = np.array(list(itertools.combinations(range(26), 2)), dtype=np.intp)
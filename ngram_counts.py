@@ -0,0 +1,363 @@
+import argparse
+import concurrent.futures
+import string
+import time
+from collections import Counter
+
+import numpy as np
+
+# Highest n-gram order counted by default (pentagrams)
+DEFAULT_MAX_ORDER = 5
+
+# Characters per chunk when counting in parallel
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Largest n-gram lookup table (in entries) stored as a dense array
+DENSE_TABLE_LIMIT = 1 << 22
+
+
+# Integer-code the ASCII letters of a text
+def ascii_codes(text):
+    """
+    Encode the ASCII letters of a text as case-folded codes 0-25 (-1 for anything else).
+    
+    Args:
+        text (str): The text to encode.
+    
+    Returns:
+        numpy.ndarray: One int64 code per character of the text.
+    """
+    points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    # Folding sets the 0x20 bit, which maps A-Z onto a-z and leaves a-z alone
+    folded = points | 0x20
+    is_ascii_letter = (folded >= ord("a")) & (folded <= ord("z"))
+    return np.where(is_ascii_letter, folded.astype(np.int64) - ord("a"), -1)
+
+
+# Integer-code a text
+def encode_text(text):
+    """
+    Encode a text as integer arrays, once for all n-gram orders.
+    
+    Args:
+        text (str): The text to encode.
+    
+    Returns:
+        tuple: (codes, symbols, alphabet) where 'codes' holds the case-folded ASCII
+               letters as 0-25 (-1 for anything else), 'symbols' holds every letter
+               (anything str.isalpha accepts, case kept) as an index into 'alphabet'
+               (-1 for non-letters), and 'alphabet' is the string of those letters.
+    """
+    codes = ascii_codes(text)
+    points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    
+    # Only the distinct characters are tested with isalpha, not every position
+    unique_points, inverse = np.unique(points, return_inverse=True)
+    is_letter = np.array([chr(point).isalpha() for point in unique_points.tolist()], dtype=bool)
+    symbol_of_point = np.full(len(unique_points), -1, dtype=np.int64)
+    symbol_of_point[is_letter] = np.arange(is_letter.sum())
+    symbols = symbol_of_point[inverse.reshape(-1)]
+    alphabet = "".join(chr(point) for point in unique_points[is_letter].tolist())
+    return codes, symbols, alphabet
+
+
+# Pack every n-gram of letters into one integer
+def pack_ngrams(codes, n, radix):
+    """
+    Pack the n-grams of a coded text into integers in base 'radix'.
+    
+    Only n-grams made entirely of letters (codes >= 0) are packed; an n-gram
+    'c0 c1 ... c(n-1)' becomes c0 * radix**(n-1) + ... + c(n-1).
+    
+    Args:
+        codes (numpy.ndarray): Letter codes, -1 for non-letters.
+        n (int): The n-gram order.
+        radix (int): Number of distinct letter codes.
+    
+    Returns:
+        tuple: (packed, starts), the packed n-grams and the positions they start at.
+    """
+    count = len(codes) - n + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    
+    # An n-gram is valid if no non-letter falls inside its window
+    non_letters = np.concatenate(([0], np.cumsum(codes < 0)))
+    starts = np.flatnonzero(non_letters[n:n + count] == non_letters[:count])
+    packed = np.zeros(len(starts), dtype=np.int64)
+    for offset in range(n):
+        packed = packed * radix + codes[starts + offset]
+    return packed, starts
+
+
+# Vectorized 1- to 5-gram counts of a text
+class NgramCounts:
+    """
+    Letter and n-gram counts of a text, computed with NumPy in one pass per order.
+    
+    The text is integer-coded once; the n-grams of each order are packed into
+    integers and counted with np.bincount, instead of building a Python list of
+    sliced substrings and feeding it to a Counter.
+    
+    Two kinds of results are offered:
+    
+    - 'dense_counts(n)' and 'counts': dense count arrays of the case-folded ASCII
+      n-grams, of length 26**n and indexed by the packed n-gram (see 'index').
+      The arrays for orders 4 and 5 take 3.7 MB and 95 MB, so each order is
+      only counted when it is first asked for.
+    - 'counter(n)' and 'frequencies()': Counters identical, including the order of
+      'most_common' ties, to those of the ngram_analysis/digraph_analysis and
+      frequency_analysis functions of the earlier attempts, so their refine_mapping
+      and scoring functions can use them unchanged.
+    
+    Attributes:
+        length (int): Length of the text in characters.
+        max_order (int): Highest order in 'counts'.
+    """
+    
+    def __init__(self, text, max_order=DEFAULT_MAX_ORDER):
+        self.length = len(text)
+        self.max_order = max_order
+        self._text = text
+        self._codes, self._symbols, self._alphabet = encode_text(text)
+        self._dense_counts = {}
+        self._counters = {}
+    
+    @property
+    def counts(self):
+        """Order n -> dense numpy.ndarray of 26**n counts, for the orders 1 to 'max_order'."""
+        return {n: self.dense_counts(n) for n in range(1, self.max_order + 1)}
+    
+    @staticmethod
+    def index(ngram):
+        """Position of a (case-insensitive) ASCII n-gram in the dense array of its order."""
+        index = 0
+        for letter in ngram.lower():
+            index = index * 26 + string.ascii_lowercase.index(letter)
+        return index
+    
+    def dense_counts(self, n):
+        """Dense array of the counts of the case-folded ASCII n-grams, indexed as by 'index'."""
+        if n not in self._dense_counts:
+            packed, _ = pack_ngrams(self._codes, n, 26)
+            self._dense_counts[n] = np.bincount(packed, minlength=26 ** n)
+        return self._dense_counts[n]
+    
+    def count(self, ngram):
+        """Number of occurrences of an ASCII n-gram, ignoring case."""
+        return int(self.dense_counts(len(ngram))[self.index(ngram)])
+    
+    def counter(self, n):
+        """
+        Counter of the n-grams made of letters, with case kept, like ngram_analysis(text, n).
+        
+        Keys are inserted in order of first occurrence, as a Counter built from
+        the list of n-grams would, so 'most_common' breaks ties the same way.
+        """
+        if n not in self._counters:
+            packed, starts = pack_ngrams(self._symbols, n, max(len(self._alphabet), 1))
+            unique_packed, first_index, counts = np.unique(packed, return_index=True, return_counts=True)
+            order = np.argsort(first_index, kind="stable")
+            text = self._text
+            self._counters[n] = Counter({
+                text[position:position + n]: count
+                for position, count in zip(starts[first_index[order]].tolist(), counts[order].tolist())
+            })
+        return self._counters[n]
+    
+    def frequencies(self):
+        """Counter of the letters folded to lowercase, like frequency_analysis(text)."""
+        frequencies = Counter()
+        for letter, count in self.counter(1).items():
+            frequencies[letter.lower()] += count
+        return frequencies
+
+
+# Drop-in replacements for the Counter-over-list-comprehension analysis functions
+def frequency_analysis(text):
+    """Perform frequency analysis on the text to count letter occurrences."""
+    return NgramCounts(text, max_order=0).frequencies()
+
+
+def ngram_analysis(text, n=2):
+    """Perform n-gram analysis (bigrams, trigrams, etc.) on the text."""
+    return NgramCounts(text, max_order=0).counter(n)
+
+
+def digraph_analysis(text):
+    """Identify common digraphs (letter pairs)."""
+    return ngram_analysis(text, n=2)
+
+
+def trigram_analysis(text):
+    """Identify common trigrams (three-letter sequences)."""
+    return ngram_analysis(text, n=3)
+
+
+# Count the n-grams of one chunk of a text
+def count_chunk(chunk, own_length, max_order=DEFAULT_MAX_ORDER):
+    """
+    Sparse counts of the case-folded ASCII n-grams that start in the first 'own_length' characters of a chunk.
+    
+    The chunk carries up to max_order - 1 characters of the next chunk, so the 
+    n-grams straddling the boundary are complete here and counted exactly once: 
+    by the chunk they start in.
+    
+    Args:
+        chunk (str): The characters of the chunk plus the overlap.
+        own_length (int): Number of characters that belong to the chunk itself.
+        max_order (int): Highest n-gram order to count.
+    
+    Returns:
+        dict: Order n -> (packed n-grams, counts), both numpy arrays.
+    """
+    codes = ascii_codes(chunk)
+    sparse = {}
+    for n in range(1, max_order + 1):
+        packed, starts = pack_ngrams(codes, n, 26)
+        sparse[n] = np.unique(packed[starts < own_length], return_counts=True)
+    return sparse
+
+
+# Count n-grams of a large text on a process pool
+def parallel_ngram_counts(text, max_order=DEFAULT_MAX_ORDER, processes=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Dense case-folded n-gram counts of a text, counted in chunks on a process pool.
+    
+    The text is split into chunks of 'chunk_size' characters that overlap the 
+    next chunk by max_order - 1 characters (see count_chunk). Every worker sends 
+    back sparse counts only, which are added up in integers, so the result is 
+    identical, array for array and dtype for dtype, to NgramCounts(text).counts.
+    
+    Args:
+        text (str): The text to count.
+        max_order (int): Highest n-gram order to count.
+        processes (int): Number of worker processes (all CPUs if None).
+        chunk_size (int): Characters per chunk.
+    
+    Returns:
+        dict: Order n -> numpy.ndarray of 26**n counts.
+    """
+    counts = {n: np.zeros(26 ** n, dtype=np.int64) for n in range(1, max_order + 1)}
+    starts = range(0, len(text), chunk_size)
+    chunks = (text[start:start + chunk_size + max_order - 1] for start in starts)
+    own_lengths = (min(chunk_size, len(text) - start) for start in starts)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        for sparse in executor.map(count_chunk, chunks, own_lengths, [max_order] * len(starts)):
+            for n, (packed, packed_counts) in sparse.items():
+                np.add.at(counts[n], packed, packed_counts)
+    return counts
+
+
+# Lookup table of one n-gram Counter
+class NgramTable:
+    """
+    Array form of an n-gram Counter, for scoring every n-gram of a text with one gather.
+    
+    The keys of length 'n' are packed in base 'radix' over a shared alphabet. If 
+    radix**n fits DENSE_TABLE_LIMIT, the counts are stored in a dense array indexed 
+    by the packed n-gram; otherwise (quadgrams over an alphabet with upper case 
+    and accented letters) the packed keys are kept sorted and looked up with 
+    np.searchsorted.
+    
+    Attributes:
+        n (int): The n-gram order.
+        dense (bool): Whether the table is a dense array.
+    """
+    
+    def __init__(self, counter, n, alphabet_index, radix):
+        self.n = n
+        keys = [key for key in counter if len(key) == n]
+        packed = np.zeros(len(keys), dtype=np.int64)
+        for position in range(n):
+            packed = packed * radix + np.array([alphabet_index[key[position]] for key in keys], dtype=np.int64)
+        counts = np.array([counter[key] for key in keys], dtype=np.int64)
+        
+        self.dense = radix ** n <= DENSE_TABLE_LIMIT
+        if self.dense:
+            self._table = np.zeros(radix ** n, dtype=np.int64)
+            self._table[packed] = counts
+        else:
+            order = np.argsort(packed)
+            self._keys, self._counts = packed[order], counts[order]
+    
+    def total(self, packed):
+        """Sum of the counts of the packed n-grams (0 for n-grams not in the Counter)."""
+        if self.dense:
+            return int(self._table[packed].sum())
+        if len(self._keys) == 0:
+            return 0
+        positions = np.minimum(np.searchsorted(self._keys, packed), len(self._keys) - 1)
+        found = self._keys[positions] == packed
+        return int(self._counts[positions[found]].sum())
+
+
+# Frequency-weighted n-gram scorer on lookup tables
+class WeightedNgramScorer:
+    """
+    Vectorized form of the Counter-weighted scorers of the earlier attempts.
+    
+    calculate_score (brek_substitution_digraph_trigram_..._grid_search.py) and 
+    score_decryption (break_substitution_grid_search_all_hyperparameters_....py) 
+    look up every slice of the decrypted text in an n-gram Counter of the 
+    ciphertext and add up weight * sum of counts per order. Here the Counters 
+    are turned into NgramTables once; a score then encodes the text, packs all 
+    its n-grams and gathers their counts with NumPy. The sums are exact integers 
+    and the weights are applied in the same order as the scripts do, so the 
+    result is identical to theirs, float for float.
+    
+    Args:
+        counters (list): The n-gram Counters, in the order of the score formula.
+        orders (list): The n-gram order of every Counter.
+        weights (list): The weight of every Counter.
+    """
+    
+    def __init__(self, counters, orders, weights):
+        self.orders = list(orders)
+        self.weights = list(weights)
+        
+        # Characters that occur in any key; all others can only give a count of 0
+        characters = sorted({character for counter in counters for key in counter for character in key})
+        alphabet_index = {character: index for index, character in enumerate(characters)}
+        self._radix = max(len(characters), 1)
+        self._symbol_of_point = np.full((ord(characters[-1]) if characters else 0) + 2, -1, dtype=np.int64)
+        for character, index in alphabet_index.items():
+            self._symbol_of_point[ord(character)] = index
+        self._tables = [NgramTable(counter, n, alphabet_index, self._radix) for counter, n in zip(counters, self.orders)]
+    
+    def order_totals(self, decrypted_text):
+        """Sum of the Counter values of every n-gram of the text, per Counter."""
+        points = np.frombuffer(decrypted_text.encode("utf-32-le"), dtype=np.uint32)
+        symbols = self._symbol_of_point[np.minimum(points, len(self._symbol_of_point) - 1)]
+        return [table.total(pack_ngrams(symbols, table.n, self._radix)[0]) for table in self._tables]
+    
+    def __call__(self, decrypted_text):
+        totals = self.order_totals(decrypted_text)
+        score = self.weights[0] * totals[0]
+        for weight, total in zip(self.weights[1:], totals[1:]):
+            score = score + weight * total
+        return score
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count the letter n-grams of a (large) text file.")
+    parser.add_argument("filename", help="text file to analyze")
+    parser.add_argument("--max-order", type=int, default=DEFAULT_MAX_ORDER, help="highest n-gram order")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (1 counts in this process)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="characters per chunk")
+    parser.add_argument("--top", type=int, default=10, help="most common n-grams to print per order")
+    args = parser.parse_args()
+    
+    with open(args.filename, "r", encoding="utf-8") as file:
+        text = file.read()
+    started = time.perf_counter()
+    if args.processes == 1:
+        counts = NgramCounts(text, args.max_order).counts
+    else:
+        counts = parallel_ngram_counts(text, args.max_order, args.processes, args.chunk_size)
+    print(f"Counted {len(text)} characters in {time.perf_counter() - started:.2f} s")
+    
+    for n, order_counts in counts.items():
+        top = np.argsort(order_counts, kind="stable")[::-1][:args.top]
+        ngrams = ["".join(string.ascii_lowercase[index // 26 ** power % 26] for power in range(n - 1, -1, -1)) for index in top.tolist()]
+        print(f"{n}-grams: " + ", ".join(f"{ngram} {order_counts[index]}" for ngram, index in zip(ngrams, top.tolist())))
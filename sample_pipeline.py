@@ -0,0 +1,239 @@
+import argparse
+import re
+import string
+
+import numpy as np
+
+from final_attempt_best_results import hill_climbing_polish, initialize_random_mapping, load_encrypted_book, mapping_from_key, simulated_annealing_key
+from key_cache import KeyCache, fingerprint
+from stream_decrypt import stream_decrypt
+
+# Lines such as "Hfxqkir 12" or "Nikkir 3" (chapter and letter headings of the contents)
+HEADING_LINE = re.compile(r"^\s*[A-Za-z]+\s+\d+\s*$")
+
+
+# Split a ciphertext into prose paragraphs
+def prose_paragraphs(encrypted_text, min_letters=60):
+    """
+    Split a ciphertext into paragraphs and keep only the ones that look like prose.
+    
+    Front matter and structure are skipped: blank-line separated blocks with
+    fewer than 'min_letters' letters (titles, signatures, dates) and blocks
+    made of heading lines only (the repeated 'Hfxqkir N' contents lines).
+    
+    Args:
+        encrypted_text (str): The full ciphertext.
+        min_letters (int): Minimum number of letters of a prose paragraph.
+    
+    Returns:
+        list: The prose paragraphs, in text order.
+    """
+    paragraphs = []
+    for block in re.split(r"\n\s*\n", encrypted_text):
+        lines = [line for line in block.splitlines() if line.strip()]
+        if not lines or all(HEADING_LINE.match(line) for line in lines):
+            continue
+        if sum(character.isalpha() for character in block) < min_letters:
+            continue
+        paragraphs.append(block)
+    return paragraphs
+
+
+# Select a sample spread over the whole text
+def select_sample(paragraphs, letter_count):
+    """
+    Select prose paragraphs evenly spread over the text until a letter budget is met.
+    
+    Taking every k-th paragraph instead of the first ones keeps the sample
+    representative of the whole book rather than of its first chapter.
+    
+    Args:
+        paragraphs (list): Prose paragraphs (see prose_paragraphs).
+        letter_count (int): Number of letters wanted in the sample.
+    
+    Returns:
+        str: The selected paragraphs joined by blank lines.
+    """
+    letter_counts = [sum(character.isalpha() for character in paragraph) for paragraph in paragraphs]
+    stride = max(1, sum(letter_counts) // max(1, letter_count))
+    order = [index for offset in range(stride) for index in range(offset, len(paragraphs), stride)]
+    
+    selected, total = [], 0
+    for index in order:
+        if total >= letter_count:
+            break
+        selected.append(index)
+        total += letter_counts[index]
+    return "\n\n".join(paragraphs[index] for index in sorted(selected))
+
+
+# Agreement of restarts with the best key
+def key_confidence(sample_text, keys, best_index):
+    """
+    Estimate how settled a key is from the agreement of independent restarts.
+    
+    Every restart is compared to the best key letter by letter; each cipher letter
+    counts with its frequency in the sample, since a wrong mapping of a frequent
+    letter spoils much more of the text than one of a rare letter.
+    
+    Args:
+        sample_text (str): The ciphertext sample the keys were found on.
+        keys (list): The keys of all restarts (26-letter strings).
+        best_index (int): Index of the best restart in 'keys'.
+    
+    Returns:
+        float: Mean frequency-weighted agreement of the other restarts with the best key (0-1).
+    """
+    weights = np.array([sample_text.count(letter) + sample_text.count(letter.upper()) for letter in string.ascii_lowercase], dtype=float)
+    weights /= max(weights.sum(), 1.0)
+    best_key = keys[best_index]
+    others = keys[:best_index] + keys[best_index + 1:]
+    if not others:
+        return 0.0
+    agreements = [sum(weight for weight, plain, best in zip(weights, key, best_key) if plain == best) for key in others]
+    return float(np.mean(agreements))
+
+
+# Solve a sample with independent restarts
+def solve_sample(sample_text, restarts, seed_sequence, max_iterations=1000, temperature=1000, cooling_rate=0.995):
+    """
+    Run independent annealing restarts on a sample of the ciphertext.
+    
+    Args:
+        sample_text (str): The ciphertext sample.
+        restarts (int): Number of restarts (at least two to measure confidence).
+        seed_sequence (numpy.random.SeedSequence): Seed sequence for the restarts.
+        max_iterations (int): Maximum number of annealing iterations per restart.
+        temperature (float): Initial temperature.
+        cooling_rate (float): Cooling rate of the schedule.
+    
+    Returns:
+        tuple: The best key, its score, the keys of all restarts and the index of the best one.
+    """
+    keys, best_index, best_score = [], None, -float('inf')
+    for restart_seed in seed_sequence.spawn(restarts):
+        rng = np.random.default_rng(restart_seed)
+        mapping, score = simulated_annealing_key(
+            sample_text, initialize_random_mapping(rng), temperature=temperature, cooling_rate=cooling_rate, max_iterations=max_iterations, rng=rng
+        )
+        key = "".join(mapping[letter] for letter in string.ascii_lowercase)
+        if score > best_score:
+            best_index, best_score = len(keys), score
+        keys.append(key)
+    return keys[best_index], best_score, keys, best_index
+
+
+# Solve on a sample, polish on a window, decrypt the whole text
+def solve_on_sample(filename, output=None, initial_letters=2000, max_letters=32000, confidence_target=0.9, restarts=4,
+                    window_factor=4, max_iterations=1000, seed=None, key_cache=None):
+    """
+    Break the cipher on a growing sample, then apply the key to the whole text.
+    
+    1. Prose paragraphs are taken from the ciphertext, skipping front matter.
+    2. A sample of 'initial_letters' letters is solved with several restarts; while
+       the restarts agree less than 'confidence_target' (see key_confidence), the
+       sample is doubled, up to 'max_letters'.
+    3. The best key is verified and polished by hill climbing on a larger window
+       ('window_factor' times the final sample, or the first sample size for
+       cached keys).
+    4. The whole file is streamed through the key (only if 'output' is given).
+    
+    With a key cache, a ciphertext solved before, or one that nearly matches a
+    cached text (e.g. another chapter of the same book), skips step 2 and
+    polishes the cached key instead. Cached keys are verified by score first
+    (see KeyCache), but that only shows a key was stored for this text, not
+    that it is good, so exact hits are polished as well. Polished keys are stored.
+    
+    Args:
+        filename (str): The file containing the encrypted text.
+        output (str): File for the full decryption.
+        initial_letters (int): Letters in the first sample.
+        max_letters (int): Largest sample size.
+        confidence_target (float): Agreement of the restarts at which the sample stops growing.
+        restarts (int): Annealing restarts per sample.
+        window_factor (int): Size of the polishing window relative to the sample.
+        max_iterations (int): Maximum number of annealing iterations per restart.
+        seed (int): Master seed of the run (fresh entropy if None).
+        key_cache (str): JSON key cache file to look the text up in and store the key to.
+    
+    Returns:
+        dict: The final key, the confidence and the size of the last sample solved
+              (both None for cached keys), the polished score and the kind of
+              cache hit ('exact', 'near' or None).
+    """
+    encrypted_text = load_encrypted_book(filename)
+    paragraphs = prose_paragraphs(encrypted_text)
+    
+    # Texts solved before start from their verified cached key
+    cache, hit = None, None
+    if key_cache is not None:
+        cache = KeyCache(key_cache)
+        text_fingerprint = fingerprint(encrypted_text)
+        hit = cache.lookup(encrypted_text, text_fingerprint)
+        if hit is not None:
+            print(f"Key Cache: {hit[0].capitalize()} match (similarity {hit[2]:.3f}), Key: {hit[1]}")
+    
+    seed_sequence = np.random.SeedSequence(seed)
+    print(f"Master Seed: {seed_sequence.entropy}")
+    
+    # The sample doubles from 'initial_letters' until it reaches 'max_letters'
+    sample_sizes = [initial_letters]
+    while sample_sizes[-1] < max_letters:
+        sample_sizes.append(min(2 * sample_sizes[-1], max_letters))
+    
+    letter_count = None
+    confidence = None
+    if hit is None:
+        for letter_count, sample_seed in zip(sample_sizes, seed_sequence.spawn(len(sample_sizes))):
+            sample_text = select_sample(paragraphs, letter_count)
+            best_key, best_score, keys, best_index = solve_sample(sample_text, restarts, sample_seed, max_iterations)
+            confidence = key_confidence(sample_text, keys, best_index)
+            print(f"Sample of {letter_count} letters: Score: {best_score}, Confidence: {confidence:.3f}, Key: {best_key}")
+            if confidence >= confidence_target:
+                break
+        window_letters = window_factor * letter_count
+    else:
+        # No sample was solved: a cached key is polished on the window of the first sample size
+        best_key = hit[1]
+        window_letters = window_factor * initial_letters
+    
+    # Verify and polish the key on a larger window
+    window_text = select_sample(paragraphs, window_letters)
+    polished_mapping, polished_score = hill_climbing_polish(window_text, mapping_from_key(best_key))
+    polished_key = "".join(polished_mapping[letter] for letter in string.ascii_lowercase)
+    changed = sum(plain != best for plain, best in zip(polished_key, best_key))
+    print(f"Polished on {window_letters} letters: Score: {polished_score}, Letters changed: {changed}, Key: {polished_key}")
+    if cache is not None:
+        cache.store(encrypted_text, polished_key, text_fingerprint)
+    
+    if output is not None:
+        total = stream_decrypt(filename, output, polished_key)
+        print(f"Decrypted {total} bytes to {output}")
+    
+    return {
+        "key": polished_key,
+        "confidence": confidence,
+        "sample_letters": letter_count,
+        "score": polished_score,
+        "cache": hit[0] if hit is not None else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve the cipher on a sample of the text, then decrypt the whole file with the key.")
+    parser.add_argument("filename", nargs="?", default="encrypted_book.txt", help="file containing the encrypted text")
+    parser.add_argument("--output", metavar="FILE", default=None, help="stream the full decryption to FILE")
+    parser.add_argument("--initial-letters", type=int, default=2000, help="letters in the first sample")
+    parser.add_argument("--max-letters", type=int, default=32000, help="largest sample size")
+    parser.add_argument("--confidence", type=float, default=0.9, help="agreement of the restarts at which the sample stops growing")
+    parser.add_argument("--restarts", type=int, default=4, help="annealing restarts per sample")
+    parser.add_argument("--window-factor", type=int, default=4, help="size of the polishing window relative to the sample")
+    parser.add_argument("--iterations", type=int, default=1000, help="maximum annealing iterations per restart")
+    parser.add_argument("--seed", type=int, default=None, help="master seed of the run (printed when omitted)")
+    parser.add_argument("--key-cache", metavar="FILE", default=None, help="reuse and store verified keys of solved texts in this JSON cache")
+    args = parser.parse_args()
+    
+    if args.restarts < 2:
+        parser.error("at least two restarts are needed to measure confidence")
+    solve_on_sample(args.filename, args.output, args.initial_letters, args.max_letters, args.confidence, args.restarts,
+                    args.window_factor, args.iterations, args.seed, args.key_cache)
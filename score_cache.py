@@ -0,0 +1,119 @@
+import collections
+import string
+import struct
+
+# Most named caches kept per process (one per run; older runs' caches are dropped)
+MAX_SHARED_CACHES = 2
+
+# Caches shared by every grid cell that runs in this process, by name, least recently used first
+_shared_caches = collections.OrderedDict()
+
+
+# Bounded memo of scores per key
+class ScoreCache:
+    """
+    Size-bounded LRU memo of scores, keyed by substitution key and scorer settings.
+
+    A key is the packed 26-byte permutation of the lowercase mapping followed by
+    a hash of the scorer settings (the n-gram weights and the scored text length),
+    so one cache can sit in front of any scorer and be shared by every chain that
+    scores the same ciphertext with the same settings. Only the lowercase part of
+    a mapping is packed: the n-gram scorers only count lowercase n-grams, so the
+    uppercase entries never change a score.
+
+    A cache pickles by name: when it is handed to a worker process, the worker
+    gets its own cache of that name (created on first use and then reused by all
+    cells the worker runs), so cells share hits within each process.
+
+    Attributes:
+        name (str): Name under which the cache is shared in worker processes.
+        max_entries (int): Maximum number of cached scores.
+        hits (int): Number of lookups that found a score.
+        misses (int): Number of lookups that did not.
+        evictions (int): Number of scores dropped to stay within 'max_entries'.
+    """
+
+    def __init__(self, max_entries=65536, name=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._scores = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __reduce__(self):
+        return shared_score_cache, (self.name, self.max_entries)
+
+    @staticmethod
+    def key(mapping, settings):
+        """
+        Build the cache key of a mapping under the given scorer settings.
+
+        Args:
+            mapping (dict): Substitution mapping of (at least) the lowercase letters.
+            settings (tuple): Hashable scorer settings, e.g. the n-gram weights.
+
+        Returns:
+            bytes: 26 bytes of permutation followed by 8 bytes of settings hash.
+        """
+        permutation = bytes(ord(mapping[letter]) - ord("a") for letter in string.ascii_lowercase)
+        return permutation + struct.pack("<q", hash(settings))
+
+    def get(self, key):
+        """Return the cached score of 'key' (and mark it as recently used), or None."""
+        score = self._scores.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._scores.move_to_end(key)
+        return score
+
+    def put(self, key, score):
+        """Store the score of 'key', evicting the least recently used scores if full."""
+        self._scores[key] = score
+        self._scores.move_to_end(key)
+        while len(self._scores) > self.max_entries:
+            self._scores.popitem(last=False)
+            self.evictions += 1
+
+    def summary(self):
+        """Hit/miss statistics of the cache as a dict."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._scores),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Cache of a given name in this process
+def shared_score_cache(name, max_entries):
+    """
+    Return the score cache called 'name' in this process, creating it on first use.
+
+    Unnamed caches are never shared; every call returns a new one. A long-lived
+    worker process (of the service or the daemon) runs cells of many runs, each
+    with its own cache name, so only the MAX_SHARED_CACHES most recently used
+    caches are kept and older ones are dropped.
+    """
+    if name is None:
+        return ScoreCache(max_entries)
+    if name not in _shared_caches:
+        _shared_caches[name] = ScoreCache(max_entries, name)
+        while len(_shared_caches) > MAX_SHARED_CACHES:
+            _shared_caches.popitem(last=False)
+    _shared_caches.move_to_end(name)
+    return _shared_caches[name]
+
+
+# Drop the cache of a finished run
+def release_score_cache(name):
+    """Forget the cache called 'name' in this process, if it holds one."""
+    _shared_caches.pop(name, None)
@@ -0,0 +1,107 @@
+import json
+import math
+import time
+
+
+# Counters for one optimiser run
+class SearchInstrumentation:
+    """
+    Aggregate counters for the hot loop of an optimiser run.
+    
+    An optimiser that is handed an instance calls 'lap' after each phase of an 
+    iteration and 'record_move' once the move was accepted or rejected; all 
+    numbers are accumulated in counters, nothing is logged per iteration. 
+    Optimisers skip every call when no instance is passed, so a run without 
+    instrumentation pays only for a few 'is not None' checks.
+    
+    Attributes:
+        metadata (dict): Free-form description of the run (hyperparameters, seed, ...).
+        phase_seconds (dict): Accumulated seconds per phase name.
+        accepted (int): Number of accepted moves.
+        rejected (int): Number of rejected moves.
+        temperature_bands (dict): Decade of the temperature -> [accepted, rejected].
+        best_score_trace (list): (iteration, score) every time the best score improved.
+    """
+    
+    def __init__(self, metadata=None):
+        self.metadata = dict(metadata or {})
+        self.phase_seconds = {}
+        self.accepted = 0
+        self.rejected = 0
+        self.temperature_bands = {}
+        self.best_score_trace = []
+        self._started = None
+        self._last_lap = None
+        self._elapsed = 0.0
+    
+    def start(self):
+        """Start (or restart) the clock of the run and of the first phase."""
+        self._started = self._last_lap = time.perf_counter()
+    
+    def stop(self):
+        """Stop the clock of the run."""
+        self._elapsed += time.perf_counter() - self._started
+    
+    def lap(self, phase):
+        """Charge the time since the previous lap to 'phase'."""
+        now = time.perf_counter()
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + now - self._last_lap
+        self._last_lap = now
+    
+    def record_move(self, accepted, temperature=None):
+        """Count an accepted or rejected move, per temperature decade if a temperature is given."""
+        if accepted:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+        if temperature is not None:
+            band = math.floor(math.log10(temperature)) if temperature > 0 else None
+            counts = self.temperature_bands.setdefault(band, [0, 0])
+            counts[0 if accepted else 1] += 1
+    
+    def record_best(self, iteration, score):
+        """Record that the best score improved to 'score' at 'iteration'."""
+        self.best_score_trace.append((iteration, score))
+    
+    def summary(self):
+        """
+        Summarise the run.
+        
+        Returns:
+            dict: Metadata, move counts and acceptance rate, seconds and share per 
+                  phase, acceptance rate per temperature decade (hottest first) 
+                  and the best-score-versus-iteration trace.
+        """
+        moves = self.accepted + self.rejected
+        timed = sum(self.phase_seconds.values())
+        bands = []
+        for band in sorted(self.temperature_bands, key=lambda band: -math.inf if band is None else band, reverse=True):
+            accepted, rejected = self.temperature_bands[band]
+            bands.append({
+                "temperature_from": None if band is None else 10.0 ** band,
+                "temperature_to": None if band is None else 10.0 ** (band + 1),
+                "accepted": accepted,
+                "rejected": rejected,
+                "acceptance_rate": accepted / (accepted + rejected),
+            })
+        
+        return {
+            "metadata": self.metadata,
+            "seconds": self._elapsed,
+            "iterations": moves,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "acceptance_rate": self.accepted / moves if moves else None,
+            "iterations_per_second": moves / self._elapsed if self._elapsed else None,
+            "phases": {
+                phase: {"seconds": seconds, "share": seconds / timed if timed else None}
+                for phase, seconds in self.phase_seconds.items()
+            },
+            "temperature_bands": bands,
+            "best_score_trace": [list(point) for point in self.best_score_trace],
+        }
+    
+    def write_json(self, filename):
+        """Write the summary of the run to a JSON file."""
+        with open(filename, "w") as file:
+            json.dump(self.summary(), file, indent=2)
@@ -0,0 +1,178 @@
+import json
+import sys
+import threading
+import time
+import uuid
+
+
+# Buffered JSONL event stream of a search run
+class SearchTrace:
+    """
+    Buffered, structured event stream of a search run, written as JSON lines.
+    
+    Every event is one JSON object with at least 'event', 'time' (seconds since 
+    the epoch) and 'run_id'; events of an annealing chain also carry 'cell_id' 
+    and 'chain_id'. Lines are buffered and written in batches, and progress 
+    events are sampled (every 'progress_every' iterations, at most once per 
+    'min_interval' seconds and chain), so tracing stays cheap under load.
+    
+    A trace is itself the callable that chains emit to. For worker processes, 
+    use 'queue_emitter' to get a picklable emitter forwarding into this trace.
+    
+    Args:
+        destination (str or file): File name, '-' for stdout, or an open text file.
+        run_id (str): Identifier of the run (random if None).
+        progress_every (int): Iterations between progress samples of a chain.
+        min_interval (float): Minimum seconds between two progress events of a chain.
+        buffer_lines (int): Number of buffered lines that triggers a write.
+        flush_interval (float): Maximum seconds a line stays buffered.
+    """
+    
+    def __init__(self, destination, run_id=None, progress_every=100, min_interval=0.5, buffer_lines=256, flush_interval=1.0):
+        if destination == "-":
+            self._file, self._owns_file = sys.stdout, False
+        elif isinstance(destination, str):
+            self._file, self._owns_file = open(destination, "a"), True
+        else:
+            self._file, self._owns_file = destination, False
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.progress_every = progress_every
+        self.min_interval = min_interval
+        self.buffer_lines = buffer_lines
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def __call__(self, event):
+        """Add an event (a dict with at least 'event') to the stream."""
+        event.setdefault("time", time.time())
+        event.setdefault("run_id", self.run_id)
+        line = json.dumps(event)
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.buffer_lines or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._write_buffer()
+    
+    def emit(self, event, **fields):
+        """Add an event of type 'event' with the given fields."""
+        self({"event": event, **fields})
+    
+    def chain(self, cell_id, chain_id):
+        """Return the tracer for one annealing chain of a grid cell."""
+        return ChainTrace(self, cell_id, chain_id)
+    
+    def queue_emitter(self, queue):
+        """Return a picklable emitter that sends events through 'queue' (see forward_from)."""
+        return QueueEmitter(queue, self.run_id, self.progress_every, self.min_interval)
+    
+    def forward_from(self, queue):
+        """
+        Write events arriving on 'queue' into this trace on a background thread.
+        
+        Returns:
+            threading.Thread: The forwarding thread; put None on the queue and 
+                              join it to stop forwarding.
+        """
+        def forward():
+            while True:
+                event = queue.get()
+                if event is None:
+                    break
+                self(event)
+        
+        thread = threading.Thread(target=forward, daemon=True)
+        thread.start()
+        return thread
+    
+    def flush(self):
+        """Write all buffered events."""
+        with self._lock:
+            self._write_buffer()
+    
+    def close(self):
+        """Write all buffered events and close the destination if this trace opened it."""
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _write_buffer(self):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+
+# Picklable emitter for worker processes
+class QueueEmitter:
+    """
+    Emitter that forwards events to a SearchTrace in another process through a queue.
+    
+    It carries the run id and the sampling settings of the trace, so chains in 
+    worker processes sample and label their events exactly like local ones.
+    """
+    
+    def __init__(self, queue, run_id, progress_every, min_interval):
+        self.queue = queue
+        self.run_id = run_id
+        self.progress_every = progress_every
+        self.min_interval = min_interval
+    
+    def __call__(self, event):
+        event.setdefault("time", time.time())
+        event.setdefault("run_id", self.run_id)
+        self.queue.put(event)
+    
+    def chain(self, cell_id, chain_id):
+        """Return the tracer for one annealing chain of a grid cell."""
+        return ChainTrace(self, cell_id, chain_id)
+
+
+# Tracer of a single annealing chain
+class ChainTrace:
+    """
+    Events of one annealing chain (one restart of one grid cell).
+    
+    The optimiser calls 'progress' only every 'progress_every' iterations; the 
+    chain additionally drops samples that arrive within 'min_interval' seconds 
+    of the previous one.
+    """
+    
+    def __init__(self, emitter, cell_id, chain_id):
+        self.emitter = emitter
+        self.cell_id = cell_id
+        self.chain_id = chain_id
+        self.progress_every = emitter.progress_every
+        self.min_interval = emitter.min_interval
+        self._started = None
+        self._last_progress = -float("inf")
+    
+    def emit(self, event, **fields):
+        """Add an event of this chain."""
+        self.emitter({"event": event, "cell_id": self.cell_id, "chain_id": self.chain_id, **fields})
+    
+    def start(self, **fields):
+        """Mark the start of the chain."""
+        self._started = time.perf_counter()
+        self.emit("chain_start", **fields)
+    
+    def progress(self, iteration, temperature, current_score, best_score):
+        """Report sampled progress of the chain (dropped if too soon after the last one)."""
+        now = time.perf_counter()
+        if now - self._last_progress < self.min_interval:
+            return
+        self._last_progress = now
+        self.emit("progress", iteration=iteration, elapsed=now - self._started, temperature=temperature,
+                  current_score=current_score, best_score=best_score)
+    
+    def finish(self, iterations, best_score):
+        """Mark the end of the chain with its final result."""
+        elapsed = time.perf_counter() - self._started
+        self.emit("chain_end", iterations=iterations, elapsed=elapsed, best_score=best_score)
@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import string
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from final_attempt_best_results import hill_climbing_polish, initialize_random_mapping, simulated_annealing_key
+
+# Default path of the daemon's socket (one per user)
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"substitution_solver_{os.getuid()}.sock")
+
+# Jobs a worker process runs before it is replaced by a fresh one
+DEFAULT_JOBS_PER_WORKER = 200
+
+# Jobs the current worker process has run (set in each worker)
+_worker_jobs = 0
+
+
+# Load everything a worker needs once, when the worker starts
+def preload_worker():
+    """
+    Warm up the solver in a new worker process.
+    
+    Importing this module in the worker already imported NumPy and built the
+    (encoded) n-gram tables of evaluate_decryption; a short annealing run then
+    brings the generator, the buffer and the scorer through their first calls,
+    so the first real job of the worker runs as fast as every later one.
+    """
+    rng = np.random.default_rng(0)
+    simulated_annealing_key("the quick brown fox jumps over the lazy dog", initialize_random_mapping(rng), max_iterations=10, rng=rng)
+
+
+# Run one job in a worker process
+def run_job(request):
+    """
+    Solve one ciphertext with independent annealing restarts in this worker.
+    
+    Args:
+        request (dict): The job: 'ciphertext' and optionally 'restarts' (4),
+                        'max_iterations' (1000), 'weights' ([2, 3, 4, 5]),
+                        'temperature' (1000), 'cooling_rate' (0.995), 'seed'
+                        and 'polish' (hill climbing on the best key, False).
+                        The op 'noop' returns at once, to measure dispatch.
+    
+    Returns:
+        dict: The best 'key', its 'score', the scores of all restarts, and the
+              pid and job count of the worker that ran it.
+    """
+    global _worker_jobs
+    _worker_jobs += 1
+    result = {"worker": os.getpid(), "worker_jobs": _worker_jobs}
+    if request.get("op") == "noop":
+        return result
+    
+    weights = tuple(request.get("weights", (2, 3, 4, 5)))
+    best_mapping, best_score, scores = None, -float("inf"), []
+    for restart_seed in np.random.SeedSequence(request.get("seed")).spawn(int(request.get("restarts", 4))):
+        rng = np.random.default_rng(restart_seed)
+        mapping, score = simulated_annealing_key(
+            request["ciphertext"], initialize_random_mapping(rng), *weights, temperature=request.get("temperature", 1000),
+            cooling_rate=request.get("cooling_rate", 0.995), max_iterations=int(request.get("max_iterations", 1000)), rng=rng,
+        )
+        scores.append(score)
+        if score > best_score:
+            best_mapping, best_score = mapping, score
+    if request.get("polish"):
+        best_mapping, best_score = hill_climbing_polish(request["ciphertext"], best_mapping, *weights)
+    result.update(key="".join(best_mapping[letter] for letter in string.ascii_lowercase), score=best_score, restart_scores=scores)
+    return result
+
+
+# Long-lived pool of warm solver processes behind a Unix socket
+class SolveDaemon:
+    """
+    Daemon that runs solve jobs on a pool of preloaded worker processes.
+    
+    Clients keep a connection to the Unix socket open and send one JSON object
+    per line; every request is answered with one JSON line carrying the same
+    'id'. Requests on a connection are handed to the pool as they arrive, so a
+    client may pipeline many jobs and receive the answers as they finish.
+    The workers import and warm up the solver once (see preload_worker), so a
+    job costs a pickle round trip to a waiting process instead of the start of
+    an interpreter. After 'jobs_per_worker' jobs a worker exits and the pool
+    starts a fresh one, which bounds the memory any one process can accumulate.
+    
+    Ops: 'solve' (the default, see run_job), 'noop' (a round trip through a
+    worker), 'ping' (answered by the daemon itself) and 'stats'.
+    
+    Attributes:
+        path (str): Path of the Unix socket.
+        processes (int): Number of worker processes.
+        jobs_per_worker (int): Jobs after which a worker is replaced.
+    """
+    
+    def __init__(self, path=DEFAULT_SOCKET, processes=None, jobs_per_worker=DEFAULT_JOBS_PER_WORKER):
+        self.path = path
+        self.processes = processes or os.cpu_count()
+        self.jobs_per_worker = jobs_per_worker
+        self.jobs = 0
+        self.failed = 0
+        self.pool_restarts = 0
+        self.workers = set()
+        self.started = None
+    
+    async def serve(self):
+        """Start the pool and answer requests on the socket until SIGTERM or SIGINT."""
+        loop = asyncio.get_running_loop()
+        self._executor = self._new_executor()
+        # Start and warm up all workers before accepting jobs
+        await asyncio.gather(*(loop.run_in_executor(self._executor, run_job, {"op": "noop"}) for _ in range(self.processes)))
+        
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        # Create the socket accessible to this user only, with no moment in which others could connect
+        previous_umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(self._handle_connection, self.path)
+        finally:
+            os.umask(previous_umask)
+        os.chmod(self.path, 0o600)
+        self.started = time.time()
+        print(f"Solve daemon listening on {self.path} with {self.processes} worker processes", flush=True)
+        
+        stopped = asyncio.Event()
+        for stop_signal in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(stop_signal, stopped.set)
+        try:
+            await stopped.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+    
+    def stats(self):
+        """Jobs served and workers used so far."""
+        return {"processes": self.processes, "jobs_per_worker": self.jobs_per_worker, "jobs": self.jobs, "failed": self.failed,
+                "workers_started": len(self.workers), "pool_restarts": self.pool_restarts, "uptime": time.time() - self.started}
+    
+    def _new_executor(self):
+        """A pool of warmed-up workers, each replaced after 'jobs_per_worker' jobs."""
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"),
+            initializer=preload_worker, max_tasks_per_child=self.jobs_per_worker,
+        )
+    
+    async def _run(self, request):
+        """
+        Run a job on the pool, replacing the pool if a worker died.
+        
+        When a worker process is killed (e.g. by the OOM killer), the executor
+        is broken and fails every job it holds. Those jobs fail, but the daemon
+        starts a fresh pool, so later jobs run normally. Jobs that fail together
+        replace the broken pool only once.
+        """
+        executor = self._executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, run_job, request)
+        except concurrent.futures.process.BrokenProcessPool:
+            if self._executor is executor:
+                self._executor = self._new_executor()
+                self.pool_restarts += 1
+                executor.shutdown(wait=False, cancel_futures=True)
+                print("A worker process died; started a new pool", file=sys.stderr, flush=True)
+            raise
+    
+    async def _handle_connection(self, reader, writer):
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(self._answer(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def _answer(self, line, writer):
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                request = {}
+                raise ValueError("a request must be a JSON object")
+            op = request.get("op", "solve")
+            if op == "ping":
+                response = {"ok": True}
+            elif op == "stats":
+                response = {"ok": True, **self.stats()}
+            elif op in ("solve", "noop"):
+                if op == "solve" and not isinstance(request.get("ciphertext"), str):
+                    raise ValueError("a solve request needs a 'ciphertext' string")
+                result = await self._run(request)
+                self.jobs += 1
+                self.workers.add(result["worker"])
+                response = {"ok": True, **result}
+            else:
+                raise ValueError(f"unknown op {op!r}")
+        except Exception as error:
+            self.failed += 1
+            response = {"ok": False, "error": repr(error)}
+        response["id"] = request.get("id")
+        writer.write(json.dumps(response).encode("utf-8") + b"\n")
+        await writer.drain()
+
+
+# Blocking client of the daemon
+class DaemonClient:
+    """
+    Connection to a SolveDaemon, kept open for any number of requests.
+    
+    Attributes:
+        path (str): Path of the daemon's Unix socket.
+    """
+    
+    def __init__(self, path=DEFAULT_SOCKET):
+        self.path = path
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(path)
+        self._file = self._socket.makefile("rwb")
+        self._next_id = 0
+    
+    def request(self, **request):
+        """Send one request and wait for its answer (a dict; raises RuntimeError if it failed)."""
+        self._next_id += 1
+        request["id"] = self._next_id
+        self._file.write(json.dumps(request).encode("utf-8") + b"\n")
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response
+    
+    def solve(self, ciphertext, **options):
+        """Solve a ciphertext; options as in run_job."""
+        return self.request(op="solve", ciphertext=ciphertext, **options)
+    
+    def close(self):
+        self._file.close()
+        self._socket.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Compare the dispatch overhead of the daemon with starting an interpreter per job
+def measure_overhead(path, requests=1000):
+    """
+    Time no-op jobs through the daemon against a cold start of the solver.
+    
+    Returns:
+        dict: Median and 95th percentile of a no-op round trip through a warm
+              worker, and the time to start Python and import the solver.
+    """
+    with DaemonClient(path) as client:
+        round_trips = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.request(op="noop")
+            round_trips.append(time.perf_counter() - started)
+        stats = client.request(op="stats")
+    
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import final_attempt_best_results"], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    cold_start = time.perf_counter() - started
+    return {
+        "noop_round_trip_p50_ms": 1000 * float(np.percentile(round_trips, 50)),
+        "noop_round_trip_p95_ms": 1000 * float(np.percentile(round_trips, 95)),
+        "cold_start_ms": 1000 * cold_start,
+        "workers_started": stats["workers_started"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm pool of solver processes behind a Unix socket.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="path of the Unix socket")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="run the daemon")
+    serve_parser.add_argument("--processes", type=int, default=None, help="worker processes (default: one per CPU)")
+    serve_parser.add_argument("--jobs-per-worker", type=int, default=DEFAULT_JOBS_PER_WORKER, help="jobs after which a worker is replaced")
+    solve_parser = subparsers.add_parser("solve", help="solve files through a running daemon")
+    solve_parser.add_argument("filenames", nargs="+", help="files containing encrypted texts")
+    solve_parser.add_argument("--restarts", type=int, default=4, help="annealing restarts per file")
+    solve_parser.add_argument("--iterations", type=int, default=1000, help="annealing iterations per restart")
+    solve_parser.add_argument("--seed", type=int, default=None, help="seed of the restarts")
+    solve_parser.add_argument("--polish", action="store_true", help="hill-climb the best key")
+    overhead_parser = subparsers.add_parser("overhead", help="measure the dispatch overhead of a running daemon")
+    overhead_parser.add_argument("--requests", type=int, default=1000, help="no-op round trips to time")
+    args = parser.parse_args()
+    
+    if args.command == "serve":
+        asyncio.run(SolveDaemon(args.socket, args.processes, args.jobs_per_worker).serve())
+    elif args.command == "solve":
+        with DaemonClient(args.socket) as client:
+            for filename in args.filenames:
+                with open(filename, "r") as file:
+                    result = client.solve(file.read(), restarts=args.restarts, max_iterations=args.iterations, seed=args.seed, polish=args.polish)
+                print(f"{filename}: Score: {result['score']} Key: {result['key']}")
+    else:
+        print(json.dumps(measure_overhead(args.socket, args.requests), indent=2))
@@ -0,0 +1,254 @@
+import argparse
+import collections
+import contextlib
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import threading
+
+
+# Sampler of the call stacks of one thread
+class StackSampler:
+    """
+    Periodically sample the call stack of one thread into collapsed-stack counts.
+    
+    The result uses the 'frame;frame;frame count' format understood by 
+    flamegraph.pl, speedscope and similar flame-graph tools. Stacks are cut at 
+    the frame that started sampling, so they begin at the profiled code rather 
+    than at the interpreter (or, in forked workers, at the parent's frames).
+    
+    Args:
+        interval (float): Seconds between two samples.
+    """
+    
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.counts = collections.Counter()
+        self._thread = None
+        self._stop = threading.Event()
+    
+    def start(self, root_frame=None):
+        """Start sampling the calling thread, with stacks rooted at 'root_frame' (the caller if None)."""
+        root_frame = sys._getframe(1) if root_frame is None else root_frame
+        base_frames = set()
+        while root_frame is not None:
+            base_frames.add(id(root_frame))
+            root_frame = root_frame.f_back
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(threading.get_ident(), base_frames), daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop sampling."""
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self, target, base_frames):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                if id(frame) in base_frames:
+                    break
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+
+# Profiler for the solving phase of a run
+class SolveProfiler:
+    """
+    Deterministic and sampling profiler for the solving phase of a run.
+    
+    Only code inside 'with profiler.profile():' blocks is profiled, so loading 
+    the text and printing results stay out of the numbers. Blocks may be entered 
+    repeatedly; the statistics accumulate. 'write' produces '<prefix>.pstats' 
+    (cProfile) and '<prefix>.collapsed.txt' (sampled stacks).
+    
+    Args:
+        output_prefix (str): Path prefix of the output files.
+        sample_interval (float): Seconds between stack samples.
+    """
+    
+    def __init__(self, output_prefix, sample_interval=0.005):
+        self.output_prefix = output_prefix
+        self.profile_data = cProfile.Profile()
+        self.sampler = StackSampler(sample_interval)
+    
+    @contextlib.contextmanager
+    def profile(self):
+        """Profile the enclosed block."""
+        # Root the sampled stacks at the function containing the 'with' statement
+        self.sampler.start(sys._getframe(2))
+        self.profile_data.enable()
+        try:
+            yield self
+        finally:
+            self.profile_data.disable()
+            self.sampler.stop()
+    
+    def wrap(self, func):
+        """Return 'func' wrapped so that every call to it is profiled."""
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            with self.profile():
+                return func(*args, **kwargs)
+        return profiled
+    
+    def write(self):
+        """
+        Write the pstats file and the collapsed-stack file.
+        
+        Returns:
+            tuple: Paths of the pstats file and of the collapsed-stack file.
+        """
+        pstats_path = f"{self.output_prefix}.pstats"
+        collapsed_path = f"{self.output_prefix}.collapsed.txt"
+        self.profile_data.dump_stats(pstats_path)
+        write_collapsed(collapsed_path, self.sampler.counts)
+        return pstats_path, collapsed_path
+
+
+# Write collapsed stacks
+def write_collapsed(filename, counts):
+    """Write collapsed-stack counts, one 'stack count' line each, most frequent first."""
+    with open(filename, "w") as file:
+        for stack, count in counts.most_common():
+            file.write(f"{stack} {count}\n")
+
+
+# Read collapsed stacks
+def read_collapsed(filename):
+    """Read a collapsed-stack file back into a Counter."""
+    counts = collections.Counter()
+    with open(filename, "r") as file:
+        for line in file:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack:
+                counts[stack] += int(count)
+    return counts
+
+
+# Decide which grid cells to profile
+def profiled_cells(cell_count, fraction):
+    """
+    Choose an evenly spread subset of grid cells to profile.
+    
+    Cell i is chosen when floor((i + 1) * fraction) > floor(i * fraction), which 
+    selects round(cell_count * fraction) cells spread over the whole grid and 
+    is the same on every run.
+    
+    Args:
+        cell_count (int): Number of cells in the grid.
+        fraction (float): Share of cells to profile, above 0 and at most 1.
+    
+    Returns:
+        set: Indices of the cells to profile.
+    
+    Raises:
+        ValueError: If 'fraction' is not above 0 and at most 1.
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError(f"the share of cells to profile must be above 0 and at most 1, not {fraction!r}")
+    return {index for index in range(cell_count) if int((index + 1) * fraction) > int(index * fraction)}
+
+
+# Merge per-cell profiles into one
+def merge_profiles(part_prefixes, output_prefix):
+    """
+    Merge the profiles of several cells (possibly from worker processes) into one.
+    
+    The part files are removed once merged.
+    
+    Args:
+        part_prefixes (list): Output prefixes of the per-cell profilers.
+        output_prefix (str): Prefix of the merged files.
+    
+    Returns:
+        tuple: Paths of the merged pstats file and collapsed-stack file, or None 
+               if there was nothing to merge.
+    """
+    part_prefixes = [prefix for prefix in part_prefixes if os.path.exists(f"{prefix}.pstats")]
+    if not part_prefixes:
+        return None
+    
+    stats = pstats.Stats(f"{part_prefixes[0]}.pstats")
+    counts = collections.Counter()
+    for prefix in part_prefixes:
+        if prefix != part_prefixes[0]:
+            stats.add(f"{prefix}.pstats")
+        counts.update(read_collapsed(f"{prefix}.collapsed.txt"))
+    
+    pstats_path = f"{output_prefix}.pstats"
+    collapsed_path = f"{output_prefix}.collapsed.txt"
+    stats.dump_stats(pstats_path)
+    write_collapsed(collapsed_path, counts)
+    for prefix in part_prefixes:
+        os.remove(f"{prefix}.pstats")
+        os.remove(f"{prefix}.collapsed.txt")
+    return pstats_path, collapsed_path
+
+
+# The benchmarks directory, which holds the loader of the earlier scripts
+BENCHMARKS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+# Entry points of the earlier scripts: name -> (script, entry function, solving function)
+ATTEMPT_ENTRY_POINTS = {
+    "break_cipher_with_ngrams": ("break_substitution_trigram_adjust_weight_digraph_trigram.py", "break_cipher_with_ngrams", "simulated_annealing_with_ngrams"),
+    "break_cipher": ("hill_climbing_with_simulated_annealing.py", "break_cipher", "simulated_annealing"),
+    "hill_climbing_algorithm.break_cipher": ("hill_climbing_algorithm.py", "break_cipher", "hill_climbing"),
+}
+
+
+# Profile the entry point of an earlier script
+def profile_attempt(entry_point, filename, output_prefix, sample_interval=0.005):
+    """
+    Run the entry point of a previous attempt with its solving function profiled.
+    
+    The script is loaded without running its module-level call, and only its 
+    solving function (the annealing or hill-climbing loop) is profiled; loading 
+    and frequency analysis printouts are not.
+    
+    Args:
+        entry_point (str): Key of ATTEMPT_ENTRY_POINTS.
+        filename (str): The encrypted text.
+        output_prefix (str): Path prefix of the profile files.
+        sample_interval (float): Seconds between stack samples.
+    
+    Returns:
+        tuple: Paths of the pstats file and of the collapsed-stack file.
+    """
+    if BENCHMARKS_DIRECTORY not in sys.path:
+        sys.path.insert(0, BENCHMARKS_DIRECTORY)
+    from attempts import load_attempt
+    
+    script, entry_name, solver_name = ATTEMPT_ENTRY_POINTS[entry_point]
+    module = load_attempt(script)
+    profiler = SolveProfiler(output_prefix, sample_interval)
+    setattr(module, solver_name, profiler.wrap(getattr(module, solver_name)))
+    getattr(module, entry_name)(filename)
+    return profiler.write()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the solving phase of a cipher-breaking entry point.")
+    parser.add_argument("entry_point", choices=["break_cipher_with_grid_search"] + sorted(ATTEMPT_ENTRY_POINTS), help="entry point to run")
+    parser.add_argument("filename", nargs="?", default="encrypted_book.txt", help="file containing the encrypted text")
+    parser.add_argument("--profile", metavar="PREFIX", default="solve_profile", help="prefix of the .pstats and .collapsed.txt files")
+    parser.add_argument("--profile-fraction", type=float, default=1.0, help="share of grid cells to profile (grid search only)")
+    parser.add_argument("--sample-interval", type=float, default=0.005, help="seconds between stack samples")
+    parser.add_argument("--seed", type=int, default=None, help="master seed (grid search only)")
+    args = parser.parse_args()
+    if not 0 < args.profile_fraction <= 1:
+        parser.error("--profile-fraction must be above 0 and at most 1")
+    
+    if args.entry_point == "break_cipher_with_grid_search":
+        from final_attempt_best_results import break_cipher_with_grid_search
+        break_cipher_with_grid_search(args.filename, seed=args.seed, profile_prefix=args.profile,
+                                      profile_fraction=args.profile_fraction, profile_interval=args.sample_interval)
+    else:
+        paths = profile_attempt(args.entry_point, args.filename, args.profile, args.sample_interval)
+        print(f"\nProfile written to {paths[0]} and {paths[1]}")
@@ -0,0 +1,526 @@
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import heapq
+import itertools
+import json
+import math
+import multiprocessing
+import signal
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from decryption_buffer import LazyDecryption
+from final_attempt_best_results import run_grid_cell
+from search_trace import QueueEmitter
+from top_keys import TopKeys
+
+# Largest request body accepted (the ciphertext of a job)
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+# Events kept per job for the event stream (older ones are dropped)
+MAX_JOB_EVENTS = 10000
+
+# Finished jobs kept for status queries (the oldest are forgotten first)
+MAX_FINISHED_JOBS = 1000
+
+# Job states
+QUEUED, RUNNING, DONE, CANCELLED, EXPIRED, FAILED = "queued", "running", "done", "cancelled", "expired", "failed"
+
+HTTP_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large"}
+
+
+# Request that cannot be served
+class BadRequest(Exception):
+    """A malformed or oversized HTTP request, answered with 'status'."""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Raised in a worker to stop an annealing chain early
+class JobInterrupted(Exception):
+    """The job of a running chain was cancelled or passed its deadline."""
+
+
+# Trace emitter that also stops cancelled chains
+class JobEmitter(QueueEmitter):
+    """
+    Emitter for the chains of one job, forwarding their events to the service.
+    
+    Every event a chain emits passes through here (sampled progress at most every
+    'min_interval' seconds), so this is also where a running chain learns that its
+    job was cancelled or has passed its deadline: the emitter raises JobInterrupted,
+    which ends the chain and the work unit in the worker process.
+    
+    Attributes:
+        cancelled (dict): Manager dict shared with the service; a job id in it means cancelled.
+        deadline (float): Epoch time after which the job's chains stop (None for no deadline).
+    """
+    
+    def __init__(self, queue, job_id, cancelled, deadline, progress_every, min_interval):
+        super().__init__(queue, job_id, progress_every, min_interval)
+        self.cancelled = cancelled
+        self.deadline = deadline
+    
+    def __call__(self, event):
+        if (self.deadline is not None and time.time() > self.deadline) or self.run_id in self.cancelled:
+            raise JobInterrupted(self.run_id)
+        super().__call__(event)
+
+
+# One submitted ciphertext
+class SolveJob:
+    """
+    A ciphertext to solve with a number of independent annealing restarts.
+    
+    The restarts are the work units of a job: each is queued separately, so jobs
+    of higher priority overtake the remaining restarts of earlier ones, and the
+    best key is updated as the restarts finish.
+    
+    Attributes:
+        id (str): Job identifier.
+        state (str): One of 'queued', 'running', 'done', 'cancelled', 'expired', 'failed'.
+        events (list): Events of the job so far, streamed to subscribers.
+    """
+    
+    def __init__(self, ciphertext, priority=0, restarts=4, max_iterations=1000, weights=(2, 3, 4, 5), temperature=1000, cooling_rate=0.995,
+                 seed=None, deadline=None, min_window=None, top_k=5):
+        self.id = uuid.uuid4().hex[:12]
+        self.ciphertext = ciphertext
+        self.priority = priority
+        self.restarts = restarts
+        self.max_iterations = max_iterations
+        self.combination = (*weights, temperature, cooling_rate)
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.deadline = time.time() + deadline if deadline is not None else None
+        self.min_window = min_window
+        self.state = QUEUED
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.pending = restarts
+        self.completed_restarts = 0
+        self.best_mapping = None
+        self.best_score = None
+        self.top_keys = TopKeys(top_k)
+        self.error = None
+        self.events = []
+        self.dropped_events = 0
+        self.changed = asyncio.Event()
+    
+    @property
+    def done(self):
+        return self.finished is not None
+    
+    def add_event(self, event):
+        """Record an event and wake up the subscribers of the event stream."""
+        self.events.append(event)
+        if len(self.events) > MAX_JOB_EVENTS:
+            del self.events[0]
+            self.dropped_events += 1
+        self.changed.set()
+        self.changed = asyncio.Event()
+    
+    def status(self, preview=300):
+        """The state and the best result of the job so far, as a JSON-serialisable dict."""
+        status = {
+            "id": self.id,
+            "state": self.state,
+            "priority": self.priority,
+            "length": len(self.ciphertext),
+            "restarts": self.restarts,
+            "completed_restarts": self.completed_restarts,
+            "max_iterations": self.max_iterations,
+            "combination": list(self.combination),
+            "seed_entropy": str(self.seed_sequence.entropy),
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "deadline": self.deadline,
+            "best_score": self.best_score,
+            "key": None,
+            "preview": None,
+            "top_keys": self.top_keys.to_list(),
+            "error": self.error,
+        }
+        if self.best_mapping is not None:
+            decryption = LazyDecryption(self.ciphertext, self.best_mapping)
+            status["key"] = decryption.key()
+            status["preview"] = decryption[:preview]
+        return status
+
+
+# The job queue, worker pool and HTTP front end
+class SolveService:
+    """
+    Local HTTP service that solves submitted ciphertexts on a bounded process pool.
+    
+    Jobs are split into their restarts, which wait in a priority queue (higher
+    priority first, then in order of submission) and are run by as many
+    dispatchers as there are worker processes, each restart as one grid cell
+    (see run_grid_cell). The chains trace their progress through a manager queue
+    into the job's event list, from which clients read a server-sent event stream.
+    
+    Cancelling a job, or reaching its deadline, drops its queued restarts and
+    stops the running ones at their next progress sample (see JobEmitter); the
+    results of the restarts that finished until then are kept. Routes:
+        
+        POST   /jobs              submit a job (JSON, see 'job_from_request')
+        GET    /jobs              status of all jobs
+        GET    /jobs/<id>         status of a job
+        GET    /jobs/<id>/events  server-sent events of a job until it ends
+        GET    /jobs/<id>/result  the full decryption with the best key (text/plain)
+        DELETE /jobs/<id>         cancel a job
+        GET    /health            queue and pool statistics
+    
+    Attributes:
+        processes (int): Number of worker processes (and dispatchers).
+        progress_interval (float): Minimum seconds between two progress events of a chain.
+    """
+    
+    def __init__(self, processes=2, progress_interval=0.5):
+        self.processes = processes
+        self.progress_interval = progress_interval
+        self.jobs = {}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._queue_ready = None
+        self._running = 0
+    
+    async def start(self, host="127.0.0.1", port=8765):
+        """Start the worker pool, the dispatchers and the HTTP server; returns the asyncio server."""
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._events = self._manager.Queue()
+        self._cancelled = self._manager.dict()
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+        self._queue_ready = asyncio.Condition()
+        self._forwarder = threading.Thread(target=self._forward_events, args=(loop,), daemon=True)
+        self._forwarder.start()
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.processes)]
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+    
+    async def close(self):
+        """Stop accepting requests, cancel the dispatchers and shut the pool down."""
+        self._server.close()
+        await self._server.wait_closed()
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        for job in self.jobs.values():
+            if not job.done:
+                self._cancelled[job.id] = True
+        await asyncio.get_running_loop().run_in_executor(None, functools.partial(self._executor.shutdown, wait=True, cancel_futures=True))
+        self._events.put(None)
+        self._forwarder.join()
+        self._manager.shutdown()
+    
+    def submit(self, job):
+        """Queue all restarts of a job and arm its deadline."""
+        self.jobs[job.id] = job
+        for restart, restart_seed in enumerate(job.seed_sequence.spawn(job.restarts)):
+            heapq.heappush(self._queue, (-job.priority, next(self._sequence), job.id, restart, restart_seed))
+        job.add_event({"event": "job_queued", "time": time.time(), "run_id": job.id, "priority": job.priority, "restarts": job.restarts})
+        if job.deadline is not None:
+            asyncio.get_running_loop().call_later(max(job.deadline - time.time(), 0), self._finish, job, EXPIRED)
+        self._forget_finished_jobs()
+        asyncio.get_running_loop().create_task(self._notify_dispatchers())
+        return job
+    
+    def cancel(self, job):
+        """Cancel a job; its running restarts stop at their next progress sample."""
+        self._finish(job, CANCELLED)
+    
+    def health(self):
+        """Queue and pool statistics."""
+        states = {}
+        for job in self.jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        return {"status": "ok", "processes": self.processes, "queued_restarts": len(self._queue), "running_restarts": self._running, "jobs": states}
+    
+    def _finish(self, job, state, error=None):
+        if job.done:
+            return
+        job.state = state
+        job.error = error
+        job.finished = time.time()
+        if state in (CANCELLED, EXPIRED, FAILED):
+            self._cancelled[job.id] = True
+        job.add_event({"event": "job_end", "time": job.finished, "run_id": job.id, "state": state, "best_score": job.best_score,
+                       "key": job.status()["key"], "completed_restarts": job.completed_restarts, "error": error})
+    
+    def _forget_finished_jobs(self):
+        finished = [job for job in self.jobs.values() if job.done]
+        for job in sorted(finished, key=lambda job: job.finished)[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job.id]
+            self._cancelled.pop(job.id, None)
+    
+    async def _notify_dispatchers(self):
+        async with self._queue_ready:
+            self._queue_ready.notify_all()
+    
+    async def _next_restart(self):
+        """Wait for the highest-priority queued restart of a job that is still open."""
+        async with self._queue_ready:
+            while True:
+                while self._queue:
+                    _, _, job_id, restart, restart_seed = heapq.heappop(self._queue)
+                    job = self.jobs.get(job_id)
+                    if job is not None and not job.done:
+                        return job, restart, restart_seed
+                await self._queue_ready.wait()
+    
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, restart, restart_seed = await self._next_restart()
+            if job.state == QUEUED:
+                job.state = RUNNING
+                job.started = time.time()
+                job.add_event({"event": "job_start", "time": job.started, "run_id": job.id})
+            
+            emitter = JobEmitter(self._events, job.id, self._cancelled, job.deadline, progress_every=100, min_interval=self.progress_interval)
+            run_cell = functools.partial(run_grid_cell, job.ciphertext, job.combination, restart_seed, cell_id=restart, max_iterations=job.max_iterations,
+                                         trace=emitter, min_window=job.min_window, top_k=job.top_keys.capacity)
+            self._running += 1
+            try:
+                mapping, score, cell_top_keys, _ = await loop.run_in_executor(self._executor, run_cell)
+            except JobInterrupted:
+                continue
+            except Exception as error:
+                self._finish(job, FAILED, error=repr(error))
+                continue
+            finally:
+                self._running -= 1
+                job.pending -= 1
+            
+            # Keep what finished before a cancellation or deadline, but do not reopen the job
+            job.completed_restarts += 1
+            job.top_keys.merge(cell_top_keys)
+            if job.best_score is None or score > job.best_score:
+                job.best_mapping, job.best_score = mapping, score
+            job.add_event({"event": "restart_end", "time": time.time(), "run_id": job.id, "restart": restart, "score": score, "best_score": job.best_score})
+            if job.pending == 0:
+                self._finish(job, DONE)
+    
+    def _forward_events(self, loop):
+        """Hand the chain events arriving from the workers to the event loop (runs on a thread)."""
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            loop.call_soon_threadsafe(self._on_worker_event, event)
+    
+    def _on_worker_event(self, event):
+        job = self.jobs.get(event.get("run_id"))
+        if job is not None and not job.done:
+            job.add_event(event)
+    
+    async def _handle_connection(self, reader, writer):
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            await self._route(*request, writer)
+        except BadRequest as error:
+            await send_json(writer, error.status, {"error": str(error)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _route(self, method, path, body, writer):
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if parts == ["health"] and method == "GET":
+            return await send_json(writer, 200, self.health())
+        if parts == ["jobs"]:
+            if method == "GET":
+                return await send_json(writer, 200, [job.status(preview=0) for job in self.jobs.values()])
+            if method == "POST":
+                try:
+                    job = job_from_request(json.loads(body or b"{}"))
+                except (ValueError, TypeError) as error:
+                    return await send_json(writer, 400, {"error": str(error)})
+                self.submit(job)
+                return await send_json(writer, 201, job.status(), headers={"Location": f"/jobs/{job.id}"})
+            return await send_json(writer, 405, {"error": f"{method} not allowed"})
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return await send_json(writer, 404, {"error": f"no job {parts[1]}"})
+            if len(parts) == 2 and method == "GET":
+                return await send_json(writer, 200, job.status())
+            if len(parts) == 2 and method == "DELETE":
+                self.cancel(job)
+                return await send_json(writer, 200, job.status())
+            if parts[2:] == ["events"] and method == "GET":
+                return await self._stream_events(job, writer)
+            if parts[2:] == ["result"] and method == "GET":
+                if job.best_mapping is None:
+                    return await send_json(writer, 409, {"error": f"job {job.id} has no result yet", "state": job.state})
+                return await send_response(writer, 200, str(LazyDecryption(job.ciphertext, job.best_mapping)).encode("utf-8"), "text/plain; charset=utf-8")
+        return await send_json(writer, 404, {"error": f"no route for {method} {path}"})
+    
+    async def _stream_events(self, job, writer):
+        """Send the events of a job as server-sent events, from its first event until it ends."""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        sent = job.dropped_events
+        while True:
+            changed = job.changed
+            for event in job.events[max(sent - job.dropped_events, 0):]:
+                writer.write(f"event: {event['event']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+            sent = job.dropped_events + len(job.events)
+            await writer.drain()
+            if job.done and job.events and job.events[-1]["event"] == "job_end":
+                return
+            await changed.wait()
+
+
+# Build a job from the JSON body of a request
+def job_from_request(request):
+    """
+    Validate a job submission.
+    
+    The body is a JSON object with the 'ciphertext' and optionally 'priority'
+    (higher runs first, default 0), 'restarts' (4), 'max_iterations' (1000),
+    'weights' (the four n-gram weights, [2, 3, 4, 5]), 'temperature' (1000),
+    'cooling_rate' (0.995), 'seed', 'deadline' (seconds from submission),
+    'min_window' and 'top_k' (5).
+    
+    Every value is checked here, so a bad one is answered with 400 instead of
+    failing the job in a worker.
+    
+    Returns:
+        SolveJob: The job (not queued yet).
+    """
+    if not isinstance(request, dict) or not isinstance(request.get("ciphertext"), str) or not request["ciphertext"]:
+        raise ValueError("the body must be a JSON object with a non-empty 'ciphertext' string")
+    weights = request.get("weights", [2, 3, 4, 5])
+    if not isinstance(weights, list) or len(weights) != 4:
+        raise ValueError("'weights' must be a list of four numbers (digraph, trigram, quadgram, pentagram)")
+    weights = tuple(float(weight) for weight in weights)
+    if not all(math.isfinite(weight) for weight in weights):
+        raise ValueError("'weights' must be finite numbers")
+    restarts = int(request.get("restarts", 4))
+    if restarts < 1:
+        raise ValueError("'restarts' must be at least 1")
+    max_iterations = int(request.get("max_iterations", 1000))
+    if max_iterations < 1:
+        raise ValueError("'max_iterations' must be at least 1")
+    temperature = float(request.get("temperature", 1000))
+    if not 0 < temperature < math.inf:
+        raise ValueError("'temperature' must be a positive number")
+    cooling_rate = float(request.get("cooling_rate", 0.995))
+    if not 0 < cooling_rate < 1:
+        raise ValueError("'cooling_rate' must be between 0 and 1 (exclusive)")
+    seed = request.get("seed")
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        raise ValueError("'seed' must be a non-negative integer")
+    deadline = request.get("deadline")
+    if deadline is not None:
+        deadline = float(deadline)
+        if not deadline > 0:
+            raise ValueError("'deadline' must be a positive number of seconds")
+    min_window = request.get("min_window")
+    if min_window is not None:
+        min_window = int(min_window)
+        if min_window < 1:
+            raise ValueError("'min_window' must be at least 1")
+    top_k = int(request.get("top_k", 5))
+    if top_k < 1:
+        raise ValueError("'top_k' must be at least 1")
+    return SolveJob(
+        request["ciphertext"],
+        priority=int(request.get("priority", 0)),
+        restarts=restarts,
+        max_iterations=max_iterations,
+        weights=weights,
+        temperature=temperature,
+        cooling_rate=cooling_rate,
+        seed=seed,
+        deadline=deadline,
+        min_window=min_window,
+        top_k=top_k,
+    )
+
+
+# Read one HTTP request
+async def read_request(reader):
+    """
+    Read the request line, headers and body of an HTTP/1.1 request.
+    
+    Returns:
+        tuple: (method, path, body), or None if the connection closed first.
+    
+    Raises:
+        BadRequest: If the request line is malformed or the body too large.
+    """
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise BadRequest(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0)) if headers.get("content-length", "0").isdigit() else -1
+    if length < 0:
+        raise BadRequest(400, "invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise BadRequest(413, f"request body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, body
+
+
+# Write an HTTP response and close the exchange
+async def send_response(writer, status, body, content_type, headers=None):
+    head = [f"HTTP/1.1 {status} {HTTP_REASONS[status]}", f"Content-Type: {content_type}", f"Content-Length: {len(body)}", "Connection: close"]
+    head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+# Write a JSON response
+async def send_json(writer, status, payload, headers=None):
+    await send_response(writer, status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+
+# Run the service until interrupted
+async def serve(host, port, processes, progress_interval):
+    service = SolveService(processes, progress_interval)
+    server = await service.start(host, port)
+    bound_host, bound_port = server.sockets[0].getsockname()[:2]
+    print(f"Solving service listening on http://{bound_host}:{bound_port} with {processes} worker processes", flush=True)
+    stopped = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    try:
+        await stopped.wait()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve ciphertexts submitted over a local HTTP API on a pool of worker processes.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (keep it on localhost: there is no authentication)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (0 picks a free one)")
+    parser.add_argument("--processes", type=int, default=2, help="worker processes, i.e. restarts solved at the same time")
+    parser.add_argument("--progress-interval", type=float, default=0.5, help="minimum seconds between two progress events of a restart")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(serve(args.host, args.port, args.processes, args.progress_interval))
+    except KeyboardInterrupt:
+        pass
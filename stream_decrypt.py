@@ -0,0 +1,104 @@
+import argparse
+import contextlib
+import string
+import sys
+
+# Bytes read and translated per chunk
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+# Build a 256-byte translation table from a key
+def build_translation_table(key):
+    """
+    Build a bytes.translate table that applies a substitution key.
+    
+    Only ASCII letters are translated; every other byte, including the bytes of 
+    multi-byte UTF-8 characters, maps to itself. Uppercase letters always follow 
+    the lowercase mapping.
+    
+    Args:
+        key (dict or str): Mapping from cipher letters to plaintext letters, or a 
+                           26-letter string giving the plaintext of 'a'..'z' 
+                           ('?' or '.' keeps a letter unchanged).
+    
+    Returns:
+        bytes: The 256-byte translation table.
+    
+    Raises:
+        ValueError: If the plaintext of a cipher letter is not an ASCII letter
+                    (its byte would not be valid UTF-8 on its own).
+    """
+    if isinstance(key, str):
+        key = {cipher: plain for cipher, plain in zip(string.ascii_lowercase, key) if plain not in "?."}
+    
+    table = bytearray(range(256))
+    for cipher, plain in key.items():
+        if cipher not in string.ascii_lowercase:
+            continue
+        if len(plain) != 1 or plain not in string.ascii_letters:
+            raise ValueError(f"the plaintext of {cipher!r} must be an ASCII letter, not {plain!r}")
+        table[ord(cipher)] = ord(plain.lower())
+        table[ord(cipher.upper())] = ord(plain.upper())
+    return bytes(table)
+
+
+# Decrypt a file in constant memory
+def stream_decrypt(source, destination, key, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Decrypt a ciphertext of any size chunk by chunk with a fixed key.
+    
+    The input is read in large binary chunks, each chunk is translated with 
+    the precomputed table and written straight to the output, so memory use 
+    is bounded by the chunk size and the throughput by the disk.
+    
+    Args:
+        source (str or file): Input path or binary file object.
+        destination (str or file): Output path or binary file object.
+        key (dict or str): The substitution key (see build_translation_table).
+        chunk_size (int): Bytes per chunk.
+    
+    Returns:
+        int: Number of bytes decrypted.
+    """
+    table = build_translation_table(key)
+    with _open_binary(source, "rb") as input_file, _open_binary(destination, "wb") as output_file:
+        total = 0
+        while True:
+            chunk = input_file.read(chunk_size)
+            if not chunk:
+                break
+            output_file.write(chunk.translate(table))
+            total += len(chunk)
+        return total
+
+
+# Open a path, or pass an already open binary file through
+@contextlib.contextmanager
+def _open_binary(file, mode):
+    """Open 'file' if it is a path (and close it afterwards), otherwise just flush it at the end."""
+    if isinstance(file, str):
+        with open(file, mode) as opened:
+            yield opened
+    else:
+        yield file
+        if "w" in mode:
+            file.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decrypt a ciphertext file of any size with a known key.")
+    parser.add_argument("input", help="encrypted file ('-' for stdin)")
+    parser.add_argument("output", help="decrypted file ('-' for stdout)")
+    parser.add_argument("--key", required=True, help="26 letters: the plaintext of cipher letters a..z ('?' keeps a letter)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="bytes per chunk")
+    args = parser.parse_args()
+    
+    key = args.key.lower()
+    letters = [plain for plain in key if plain not in "?."]
+    if len(key) != 26 or not all(plain in string.ascii_lowercase for plain in letters) or len(set(letters)) != len(letters):
+        parser.error("the key must be 26 distinct ASCII letters ('?' or '.' for letters kept unchanged)")
+    source = sys.stdin.buffer if args.input == "-" else args.input
+    destination = sys.stdout.buffer if args.output == "-" else args.output
+    total = stream_decrypt(source, destination, key, args.chunk_size)
+    if args.output != "-":
+        print(f"Decrypted {total} bytes to {args.output}", file=sys.stderr)
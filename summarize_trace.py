@@ -0,0 +1,118 @@
+import argparse
+import collections
+import csv
+import json
+
+
+# Read a JSONL trace
+def load_trace(filename):
+    """
+    Read the events of a trace written by SearchTrace.
+    
+    Args:
+        filename (str): The JSONL trace file.
+    
+    Returns:
+        list: The events in file order.
+    """
+    with open(filename, "r") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+# Convergence curve of every chain
+def convergence_curves(events):
+    """
+    Extract the best-score-versus-iteration curve of every chain.
+    
+    Args:
+        events (list): Events of one or more runs.
+    
+    Returns:
+        dict: (run_id, cell_id, chain_id) -> list of (iteration, elapsed, best_score), 
+              starting with the initial score and ending with the final result.
+    """
+    curves = collections.defaultdict(list)
+    for event in events:
+        key = (event.get("run_id"), event.get("cell_id"), event.get("chain_id"))
+        if event["event"] == "chain_start":
+            curves[key].append((0, 0.0, event["initial_score"]))
+        elif event["event"] == "progress":
+            curves[key].append((event["iteration"], event["elapsed"], event["best_score"]))
+        elif event["event"] == "chain_end":
+            curves[key].append((event["iterations"], event["elapsed"], event["best_score"]))
+    return dict(curves)
+
+
+# Cost and result of every grid cell
+def cell_costs(events):
+    """
+    Aggregate the cost and result of every grid cell over its chains.
+    
+    Args:
+        events (list): Events of one or more runs.
+    
+    Returns:
+        list: One dict per (run_id, cell_id) with the combination, number of 
+              chains, iterations, seconds spent in the chains, iterations per 
+              second and best score, most expensive cell first.
+    """
+    cells = {}
+    for event in events:
+        if event["event"] not in ("chain_end", "cell_end"):
+            continue
+        key = (event.get("run_id"), event["cell_id"])
+        cell = cells.setdefault(key, {
+            "run_id": key[0], "cell_id": key[1], "combination": None,
+            "chains": 0, "iterations": 0, "seconds": 0.0, "best_score": None,
+        })
+        if event["event"] == "chain_end":
+            cell["chains"] += 1
+            cell["iterations"] += event["iterations"]
+            cell["seconds"] += event["elapsed"]
+            if cell["best_score"] is None or event["best_score"] > cell["best_score"]:
+                cell["best_score"] = event["best_score"]
+        else:
+            cell["combination"] = event.get("combination")
+    
+    for cell in cells.values():
+        cell["iterations_per_second"] = cell["iterations"] / cell["seconds"] if cell["seconds"] else None
+    return sorted(cells.values(), key=lambda cell: -cell["seconds"])
+
+
+# Write convergence curves as CSV
+def write_curves_csv(filename, curves):
+    """Write the convergence curves in long format (one row per point) for plotting."""
+    with open(filename, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["run_id", "cell_id", "chain_id", "iteration", "elapsed", "best_score"])
+        for (run_id, cell_id, chain_id), points in sorted(curves.items(), key=lambda item: (str(item[0][0]), item[0][1], item[0][2])):
+            for iteration, elapsed, best_score in points:
+                writer.writerow([run_id, cell_id, chain_id, iteration, f"{elapsed:.6f}", best_score])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise a JSONL search trace into per-cell costs and convergence curves.")
+    parser.add_argument("trace", help="JSONL trace written with --trace")
+    parser.add_argument("--top", type=int, default=20, help="number of most expensive cells to print")
+    parser.add_argument("--curves", metavar="CSV", default=None, help="write the convergence curves to a CSV file")
+    parser.add_argument("--json", metavar="FILE", default=None, help="write the per-cell cost table to a JSON file")
+    args = parser.parse_args()
+    
+    events = load_trace(args.trace)
+    for event in events:
+        if event["event"] == "run_end":
+            print(f"Run {event['run_id']}: best score {event['best_score']} with {event['best_combination']} "
+                  f"in {event['elapsed']:.1f} s")
+    
+    costs = cell_costs(events)
+    print(f"\n{'cell':>5} {'chains':>6} {'iterations':>10} {'seconds':>9} {'iter/s':>9} {'best':>8}  combination")
+    for cell in costs[:args.top]:
+        rate = f"{cell['iterations_per_second']:9.1f}" if cell["iterations_per_second"] else f"{'-':>9}"
+        print(f"{cell['cell_id']:>5} {cell['chains']:>6} {cell['iterations']:>10} {cell['seconds']:>9.2f} {rate} "
+              f"{cell['best_score']!s:>8}  {cell['combination']}")
+    
+    if args.curves:
+        write_curves_csv(args.curves, convergence_curves(events))
+    if args.json:
+        with open(args.json, "w") as output_file:
+            json.dump(costs, output_file, indent=2)
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+
+
+# A stretch of the encrypted book, with mixed case, accented letters and punctuation
+@pytest.fixture(scope="session")
+def book_text():
+    with open(os.path.join(REPO_ROOT, "encrypted_book.txt"), "r", encoding="utf-8") as file:
+        return file.read()[20000:60000]
@@ -0,0 +1,36 @@
+import string
+
+import numpy as np
+import pytest
+
+from final_attempt_best_results import evaluate_decryption, initialize_random_mapping, iterate_random_moves, simulated_annealing_key, substitute_text
+
+
+def test_same_seed_gives_the_same_moves():
+    moves = list(iterate_random_moves(np.random.default_rng(7), 2500, block_size=1000))
+    assert moves == list(iterate_random_moves(np.random.default_rng(7), 2500, block_size=1000))
+    assert moves != list(iterate_random_moves(np.random.default_rng(8), 2500, block_size=1000))
+    assert len(moves) == 2500
+    for letter1, letter2, log_threshold in moves:
+        assert letter1 != letter2 and letter1 in string.ascii_lowercase and letter2 in string.ascii_lowercase
+        assert -np.inf < log_threshold <= 0
+
+
+# The same seed reproduces the key and the score of a run, whichever way the text is kept
+def test_same_seed_gives_the_same_key_and_score(book_text):
+    text = book_text[:5000]
+    runs = [
+        simulated_annealing_key(text, initialize_random_mapping(3), max_iterations=300, rng=5, in_place=in_place)
+        for in_place in (True, True, False)
+    ]
+    assert runs[0] == runs[1] == runs[2]
+    assert runs[0] != simulated_annealing_key(text, initialize_random_mapping(3), max_iterations=300, rng=6)
+
+
+# With a progressive window the returned score is still the integer score of the full text
+@pytest.mark.parametrize("max_iterations", [50, 3000])
+def test_progressive_window_returns_the_full_text_score(book_text, max_iterations):
+    text = book_text[:8000]
+    mapping, score = simulated_annealing_key(text, initialize_random_mapping(3), max_iterations=max_iterations, rng=5, min_window=1000)
+    assert type(score) is int
+    assert score == evaluate_decryption(substitute_text(text, mapping))
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from batch_solver import solve_batch
+
+
+# A cryptogram is solved alike in either case
+def test_uppercase_letters_are_folded(book_text):
+    ciphertext = " ".join(book_text[:2000].split())[:400]
+    lower = solve_batch([ciphertext.lower()], [np.random.SeedSequence(4)])
+    upper = solve_batch([ciphertext.upper()], [np.random.SeedSequence(4)])
+    assert upper == lower
+    assert upper[0][1] > 0
+
+
+def test_restarts_must_be_positive():
+    with pytest.raises(ValueError):
+        solve_batch(["abc"], [np.random.SeedSequence(0)], restarts=0)
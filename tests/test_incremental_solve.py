@@ -0,0 +1,87 @@
+import re
+import string
+
+import numpy as np
+import pytest
+
+from final_attempt_best_results import NGRAM_TABLES, evaluate_decryption
+from incremental_solve import MAX_ORDER, IncrementalSolver
+
+KEY = "qwertyuiopasdfghjklzxcvbnm"
+
+
+# Counts of a solver that saw the whole text at once
+@pytest.fixture(scope="module")
+def whole(book_text):
+    solver = IncrementalSolver(KEY)
+    solver.append(book_text)
+    return solver
+
+
+# Score of evaluate_decryption's n-gram lists, counting overlapping occurrences
+def overlapping_score(decrypted_text, weights=(2, 3, 4, 5, -1)):
+    return sum(
+        weight * len(re.findall(f"(?={ngram})", decrypted_text))
+        for ngrams, weight in zip(NGRAM_TABLES, weights)
+        for ngram in ngrams
+    )
+
+
+def test_counts_in_pieces_equal_counts_of_the_whole(book_text, whole):
+    rng = np.random.default_rng(2)
+    cuts = sorted(rng.choice(len(book_text), 40, replace=False).tolist()) + [1, 2, 3]
+    solver = IncrementalSolver(KEY)
+    for start, end in zip([0] + sorted(cuts), sorted(cuts) + [len(book_text)]):
+        solver.append(book_text[start:end])
+    assert solver.characters == len(book_text)
+    for n in range(1, MAX_ORDER + 1):
+        assert np.array_equal(solver.counts[n], whole.counts[n])
+
+
+def test_score_equals_overlapping_count_of_the_decryption(book_text, whole):
+    decrypted_text = book_text.translate(str.maketrans(string.ascii_lowercase, KEY))
+    assert whole.score() == overlapping_score(decrypted_text)
+    reversed_key = KEY[::-1]
+    assert whole.score(reversed_key) == overlapping_score(book_text.translate(str.maketrans(string.ascii_lowercase, reversed_key)))
+
+
+# Overlapping occurrences count, unlike in evaluate_decryption's str.count
+@pytest.mark.parametrize("text, ngram, overlaps", [("erere", "ere", 1), ("zzz", "zz", 1), ("the theme", "the", 0)])
+def test_score_counts_overlaps_unlike_evaluate_decryption(text, ngram, overlaps):
+    solver = IncrementalSolver(string.ascii_lowercase)
+    solver.append(text)
+    weight = next(weight for ngrams, weight in zip(NGRAM_TABLES, (2, 3, 4, 5, -1)) for listed in ngrams if listed == ngram)
+    assert solver.score() == overlapping_score(text)
+    assert solver.score() - evaluate_decryption(text) == overlaps * weight
+
+
+# A UTF-8 character cut off at the end of the file waits for the next update
+def test_update_from_file_with_a_split_character(tmp_path, book_text, whole):
+    data = book_text.encode("utf-8")
+    split = next(index for index in range(len(data)) if data[index] >= 0xC0) + 1
+    filename = str(tmp_path / "growing.txt")
+    state = str(tmp_path / "state.npz")
+    with open(filename, "wb") as file:
+        file.write(data[:split])
+    solver = IncrementalSolver(KEY)
+    solver.update_from_file(filename, max_rounds=0)
+    solver.save(state)
+    with open(filename, "ab") as file:
+        file.write(data[split:])
+    solver = IncrementalSolver.load(state)
+    solver.update_from_file(filename, max_rounds=0)
+    assert solver.offset == len(data)
+    for n in range(1, MAX_ORDER + 1):
+        assert np.array_equal(solver.counts[n], whole.counts[n])
+
+
+def test_replaced_file_is_refused(tmp_path, book_text):
+    filename = str(tmp_path / "growing.txt")
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(book_text[:1000])
+    solver = IncrementalSolver(KEY)
+    solver.update_from_file(filename, max_rounds=0)
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(book_text[1000:3000])
+    with pytest.raises(ValueError):
+        solver.update_from_file(filename, max_rounds=0)
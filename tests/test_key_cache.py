@@ -0,0 +1,86 @@
+import json
+import os
+import string
+
+from key_cache import KeyCache, fingerprint
+from sample_pipeline import solve_on_sample
+
+KEY = "qwertyuiopasdfghjklzxcvbnm"
+
+
+# Re-encrypt a text with another letter permutation
+def relabel(text, permutation):
+    return text.translate(str.maketrans(string.ascii_lowercase + string.ascii_uppercase, permutation + permutation.upper()))
+
+
+def test_exact_hit(tmp_path, book_text):
+    cache = KeyCache(str(tmp_path / "cache.json"))
+    cache.store(book_text, KEY)
+    assert cache.lookup(book_text) == ("exact", KEY, 1.0)
+    assert KeyCache(cache.filename).lookup(book_text) == ("exact", KEY, 1.0)
+
+
+# Another stretch of the book is under the same key, a relabelled one is not
+def test_near_hit_only_under_the_same_key(tmp_path, book_text):
+    cache = KeyCache(str(tmp_path / "cache.json"))
+    cache.store(book_text[:20000], KEY)
+    kind, key, similarity = cache.lookup(book_text[20000:])
+    assert (kind, key) == ("near", KEY)
+    assert similarity < 1.0
+    assert cache.lookup(relabel(book_text[20000:], string.ascii_lowercase[1:] + "a")) is None
+
+
+# A stored key that no longer reproduces its score is dropped, never returned
+def test_wrong_key_is_rejected(tmp_path, book_text):
+    filename = str(tmp_path / "cache.json")
+    KeyCache(filename).store(book_text, KEY)
+    with open(filename) as cache_file:
+        entries = json.load(cache_file)
+    entries["entries"][0]["key"] = KEY[::-1]
+    with open(filename, "w") as cache_file:
+        json.dump(entries, cache_file)
+    cache = KeyCache(filename)
+    assert cache.lookup(book_text) is None
+    assert len(cache) == 0
+    assert len(KeyCache(filename)) == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, book_text):
+    cache = KeyCache(str(tmp_path / "cache.json"), max_entries=2)
+    texts = [book_text[start:start + 5000] for start in (0, 10000, 20000)]
+    for text in texts:
+        cache.store(text, KEY)
+    assert [entry["fingerprint"]["sha256"] for entry in cache.entries] == [fingerprint(text)["sha256"] for text in texts[1:]]
+    assert len(KeyCache(cache.filename)) == 2
+
+
+def test_lookup_does_not_rewrite_the_file(tmp_path, book_text):
+    cache = KeyCache(str(tmp_path / "cache.json"))
+    cache.store(book_text, KEY)
+    written = os.stat(cache.filename).st_ino
+    assert cache.lookup(book_text)[0] == "exact"
+    assert cache.lookup(book_text[20000:])[0] == "near"
+    assert os.stat(cache.filename).st_ino == written
+
+
+# An exact hit whose key was stored honestly but is bad is still polished
+def test_pipeline_polishes_an_exact_hit(tmp_path, book_text):
+    filename = str(tmp_path / "cipher.txt")
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(book_text)
+    cache_file = str(tmp_path / "cache.json")
+    KeyCache(cache_file).store(book_text, string.ascii_lowercase)
+    result = solve_on_sample(filename, initial_letters=300, key_cache=cache_file)
+    assert result["cache"] == "exact"
+    assert result["confidence"] is None and result["sample_letters"] is None
+    assert result["key"] != string.ascii_lowercase
+    assert KeyCache(cache_file).entries[0]["key"] == result["key"]
+
+
+# Without a cache the sample stops at max_letters even if the confidence target is never met
+def test_pipeline_stops_at_max_letters(tmp_path, book_text):
+    filename = str(tmp_path / "cipher.txt")
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(book_text)
+    result = solve_on_sample(filename, initial_letters=200, max_letters=500, confidence_target=2.0, restarts=2, max_iterations=200)
+    assert result["sample_letters"] == 500
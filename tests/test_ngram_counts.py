@@ -0,0 +1,87 @@
+import string
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from attempts import load_attempt
+from ngram_counts import NgramCounts, WeightedNgramScorer, frequency_analysis, ngram_analysis, parallel_ngram_counts
+
+COUNTER_WEIGHTED = "brek_substitution_digraph_trigram_hill_climbing_simulated_annealing_grid_search.py"
+BIGRAM_TRIGRAM_WEIGHTED = "break_substitution_grid_search_all_hyperparameters_bigraphs_trigrams_hill_climbing_simulated_annealing_combined.py"
+
+
+@pytest.fixture(scope="module")
+def counter_weighted():
+    return load_attempt(COUNTER_WEIGHTED)
+
+
+# Counters equal to the scripts', including the order of most_common ties
+@pytest.mark.parametrize("n", [1, 2, 3, 4])
+def test_ngram_analysis_matches_script(book_text, counter_weighted, n):
+    assert any(not character.isascii() and character.isalpha() for character in book_text)
+    expected = counter_weighted.ngram_analysis(book_text, n)
+    counter = ngram_analysis(book_text, n)
+    assert counter == expected
+    assert counter.most_common() == expected.most_common()
+
+
+def test_frequency_analysis_matches_script(book_text, counter_weighted):
+    expected = counter_weighted.frequency_analysis(book_text)
+    assert frequency_analysis(book_text).most_common() == expected.most_common()
+
+
+# Dense counts of the case-folded ASCII n-grams
+@pytest.mark.parametrize("n", [1, 2, 3])
+def test_dense_counts_match_sliced_ngrams(book_text, n):
+    folded = book_text.lower()
+    expected = Counter(
+        folded[i:i + n] for i in range(len(folded) - n + 1)
+        if all(character in string.ascii_lowercase for character in folded[i:i + n])
+    )
+    counts = NgramCounts(book_text)
+    dense = counts.dense_counts(n)
+    assert int(dense.sum()) == sum(expected.values())
+    for ngram, count in expected.items():
+        assert dense[NgramCounts.index(ngram)] == count
+        assert counts.count(ngram.upper()) == count
+
+
+def test_dense_counts_are_built_on_first_use(book_text):
+    counts = NgramCounts(book_text)
+    assert counts.count("th") > 0
+    assert sorted(counts._dense_counts) == [2]
+    assert list(counts.counts) == [1, 2, 3, 4, 5]
+
+
+# Chunks overlap by max_order - 1 characters, so every n-gram is counted exactly once
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 100000])
+def test_parallel_counts_equal_single_process(book_text, chunk_size):
+    text = book_text[:3000]
+    expected = NgramCounts(text, max_order=4).counts
+    counts = parallel_ngram_counts(text, max_order=4, processes=1, chunk_size=chunk_size)
+    assert list(counts) == list(expected)
+    for n in expected:
+        assert counts[n].dtype == expected[n].dtype
+        assert np.array_equal(counts[n], expected[n])
+
+
+# Scores identical to the Counter-weighted scorers of the scripts, float for float
+def test_weighted_scorer_matches_calculate_score(book_text, counter_weighted):
+    weights = {'bigram': 0.4, 'trigram': 0.4, 'quadgram': 0.2}
+    counters = [counter_weighted.ngram_analysis(book_text, n) for n in (2, 3, 4)]
+    scorer = WeightedNgramScorer(counters, (2, 3, 4), [weights[order] for order in ('bigram', 'trigram', 'quadgram')])
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        key = dict(zip(string.ascii_lowercase, rng.permutation(list(string.ascii_lowercase)).tolist()))
+        decrypted_text = counter_weighted.substitute_text(book_text[:5000], key)
+        assert scorer(decrypted_text) == counter_weighted.calculate_score(decrypted_text, *counters, weights)
+
+
+def test_weighted_scorer_matches_score_decryption(book_text):
+    module = load_attempt(BIGRAM_TRIGRAM_WEIGHTED)
+    weights = {'bigram': 1, 'trigram': 1}
+    counters = [ngram_analysis(book_text, n) for n in (2, 3)]
+    scorer = WeightedNgramScorer(counters, (2, 3), [weights['bigram'], weights['trigram']])
+    decrypted_text = book_text[:5000].swapcase()
+    assert scorer(decrypted_text) == module.score_decryption(decrypted_text, *counters, weights)
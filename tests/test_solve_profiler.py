@@ -0,0 +1,16 @@
+import pytest
+
+from solve_profiler import profiled_cells
+
+
+# The chosen cells are the same on every run and spread over the whole grid
+def test_profiled_cells_are_spread_evenly():
+    assert profiled_cells(10, 1.0) == set(range(10))
+    assert profiled_cells(10, 0.3) == {3, 6, 9}
+    assert profiled_cells(10, 0.3) == profiled_cells(10, 0.3)
+
+
+@pytest.mark.parametrize("fraction", [0, -0.5, 1.5, float("nan")])
+def test_fraction_must_be_in_range(fraction):
+    with pytest.raises(ValueError):
+        profiled_cells(10, fraction)
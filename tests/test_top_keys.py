@@ -0,0 +1,67 @@
+import itertools
+import string
+
+import numpy as np
+import pytest
+
+from top_keys import TopKeys, key_distance, load_checkpoint, write_checkpoint
+
+
+# A key with two of its letters swapped
+def swapped(key, first, second):
+    letters = list(key)
+    letters[first], letters[second] = letters[second], letters[first]
+    return "".join(letters)
+
+
+def test_near_duplicate_needs_a_better_score():
+    top_keys = TopKeys(capacity=3, min_distance=3)
+    key = string.ascii_lowercase
+    assert top_keys.offer(10, key)
+    assert not top_keys.offer(10, swapped(key, 0, 1))
+    assert top_keys.offer(11, swapped(key, 0, 1))
+    assert top_keys.items() == [(11, swapped(key, 0, 1))]
+
+
+def test_full_set_drops_the_worst():
+    top_keys = TopKeys(capacity=2, min_distance=3)
+    keys = [string.ascii_lowercase[shift:] + string.ascii_lowercase[:shift] for shift in range(1, 4)]
+    for score, key in zip([5, 7, 6], keys):
+        top_keys.offer(score, key)
+    assert top_keys.items() == [(7, keys[1]), (6, keys[2])]
+    assert not top_keys.offer(6, string.ascii_lowercase)
+
+
+# Whatever is offered, the kept keys are the best, sorted and mutually distant
+def test_random_offers_keep_the_invariants():
+    rng = np.random.default_rng(1)
+    top_keys = TopKeys(capacity=5, min_distance=3)
+    base = string.ascii_lowercase
+    for _ in range(500):
+        key = base
+        for _ in range(int(rng.integers(0, 4))):
+            key = swapped(key, *rng.choice(26, 2, replace=False).tolist())
+        top_keys.offer(int(rng.integers(0, 1000)), key)
+    items = top_keys.items()
+    assert 0 < len(items) <= 5
+    assert items == sorted(items, reverse=True)
+    for (_, key1), (_, key2) in itertools.combinations(items, 2):
+        assert key_distance(key1, key2) >= 3
+
+
+def test_checkpoint_round_trip(tmp_path):
+    top_keys = TopKeys(capacity=3, min_distance=4)
+    top_keys.offer(3, string.ascii_lowercase)
+    top_keys.offer(5, string.ascii_lowercase[::-1])
+    filename = str(tmp_path / "checkpoint.json")
+    write_checkpoint(filename, top_keys, cells_done=2)
+    loaded, checkpoint = load_checkpoint(filename)
+    assert loaded.items() == top_keys.items()
+    assert loaded.min_distance == 4
+    assert checkpoint["cells_done"] == 2
+
+
+@pytest.mark.parametrize("capacity", [0, -1, None])
+def test_capacity_must_be_positive(capacity):
+    with pytest.raises(ValueError):
+        TopKeys(capacity)
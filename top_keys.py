@@ -0,0 +1,142 @@
+import argparse
+import heapq
+import json
+import os
+import string
+
+from decryption_buffer import LazyDecryption
+
+
+# Number of positions in which two keys differ
+def key_distance(key1, key2):
+    """Hamming distance of two 26-letter keys (a single swap gives 2)."""
+    return sum(plain1 != plain2 for plain1, plain2 in zip(key1, key2))
+
+
+# The key string of a mapping
+def mapping_key(mapping):
+    """The plaintext letters of cipher letters 'a'..'z' of a mapping, as a 26-letter string."""
+    return "".join(mapping[letter] for letter in string.ascii_lowercase)
+
+
+# Bounded set of the best, mutually distinct keys
+class TopKeys:
+    """
+    The best 'capacity' keys seen by a search, kept at least 'min_distance' apart.
+    
+    Keys are offered with their score. A key closer than 'min_distance' to keys
+    already kept (a near-duplicate, e.g. one swap away) only gets in if it scores
+    better than all of them, and then replaces them; so the list holds several
+    genuinely different candidates instead of the neighbours of the best one.
+    The keys are kept in a min-heap on score, so the worst is dropped first
+    when the set is full.
+    
+    Attributes:
+        capacity (int): Maximum number of keys kept (at least 1).
+        min_distance (int): Minimum Hamming distance between two kept keys.
+    
+    Raises:
+        ValueError: If 'capacity' is not a positive integer.
+    """
+    
+    def __init__(self, capacity=5, min_distance=3):
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError(f"a TopKeys must keep at least one key, not {capacity!r}")
+        self.capacity = capacity
+        self.min_distance = min_distance
+        self._heap = []
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def offer(self, score, key):
+        """
+        Offer a key with its score.
+        
+        Args:
+            score (float): Score of the key (higher is better).
+            key (str): 26-letter key (see mapping_key).
+        
+        Returns:
+            bool: Whether the key was kept.
+        """
+        if len(self._heap) >= self.capacity and score <= self._heap[0][0]:
+            return False
+        near = [entry for entry in self._heap if key_distance(entry[1], key) < self.min_distance]
+        if any(near_score >= score for near_score, _ in near):
+            return False
+        if near:
+            self._heap = [entry for entry in self._heap if entry not in near]
+            heapq.heapify(self._heap)
+        heapq.heappush(self._heap, (score, key))
+        if len(self._heap) > self.capacity:
+            heapq.heappop(self._heap)
+        return True
+    
+    def merge(self, other):
+        """Offer every key of another TopKeys (e.g. of a grid cell)."""
+        for score, key in other.items():
+            self.offer(score, key)
+    
+    def items(self):
+        """The kept (score, key) pairs, best first."""
+        return sorted(self._heap, reverse=True)
+    
+    def to_list(self):
+        """The kept keys as JSON-serialisable dicts, best first."""
+        return [{"score": score, "key": key} for score, key in self.items()]
+    
+    @classmethod
+    def from_list(cls, entries, capacity=None, min_distance=3):
+        """Rebuild a TopKeys from the output of 'to_list'."""
+        top_keys = cls(capacity or max(len(entries), 1), min_distance)
+        for entry in entries:
+            top_keys.offer(entry["score"], entry["key"])
+        return top_keys
+
+
+# Write a checkpoint of a search
+def write_checkpoint(filename, top_keys, **fields):
+    """
+    Write the top keys of a search and free-form progress fields to a JSON checkpoint.
+    
+    The file is replaced atomically, so an interrupted run never leaves a
+    half-written checkpoint behind.
+    """
+    checkpoint = dict(fields, min_key_distance=top_keys.min_distance, top_keys=top_keys.to_list())
+    temporary = f"{filename}.tmp"
+    with open(temporary, "w") as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file, indent=2)
+    os.replace(temporary, filename)
+
+
+# Read a checkpoint
+def load_checkpoint(filename):
+    """
+    Read a checkpoint written by write_checkpoint.
+    
+    Returns:
+        tuple: The TopKeys and the dict of all fields of the checkpoint.
+    """
+    with open(filename) as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    return TopKeys.from_list(checkpoint["top_keys"], min_distance=checkpoint.get("min_key_distance", 3)), checkpoint
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the candidate keys of a checkpoint with a preview of their decryption.")
+    parser.add_argument("checkpoint", help="JSON checkpoint of a grid search")
+    parser.add_argument("filename", nargs="?", default="encrypted_book.txt", help="file containing the encrypted text")
+    parser.add_argument("--preview", type=int, default=300, help="characters of decryption to show per key")
+    parser.add_argument("--offset", type=int, default=0, help="where in the text the preview starts")
+    args = parser.parse_args()
+    
+    top_keys, checkpoint = load_checkpoint(args.checkpoint)
+    with open(args.filename, "r") as file:
+        encrypted_text = file.read()
+    for rank, (score, key) in enumerate(top_keys.items(), 1):
+        mapping = dict(zip(string.ascii_lowercase, key))
+        mapping.update({cipher.upper(): plain.upper() for cipher, plain in mapping.items()})
+        print(f"#{rank} Score: {score} Key: {key}")
+        print(LazyDecryption(encrypted_text, mapping)[args.offset:args.offset + args.preview])
+        print()